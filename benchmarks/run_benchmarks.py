@@ -0,0 +1,418 @@
+# run_benchmarks.py
+#
+# Benchmarks do código Python executado entre as levas de simulação.
+#
+# Uso (a partir da raiz do projeto):
+#   python -m benchmarks.run_benchmarks                  # mede e compara com a referência salva
+#   python -m benchmarks.run_benchmarks --save-baseline  # mede e salva como nova referência
+#   python -m benchmarks.run_benchmarks --quick --filter evolve
+
+import os
+import sys
+import glob
+import json
+import time
+import shutil
+import argparse
+import datetime
+import platform
+import tempfile
+import subprocess
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+import h5py
+import matplotlib
+matplotlib.use('Agg')
+
+from utils.genetic import GeneticOptimizer
+from utils.post_processing import calculate_delta_amp_batch, delta_amp_from_spectra, _read_spectrum
+from utils.results_log import ResultsLogWriter, ResultsLogReader
+from utils.analysis import RunningStatistics, run_full_analysis
+from utils.experiment_end import record_experiment_results
+from utils.spectrum_archive import SpectrumArchive
+from utils.simulation_backend import synthetic_monitor_fields
+from utils.optimizers import experiment_param_ranges
+
+_BENCHMARK_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+_PROJECT_DIRECTORY = os.path.dirname(_BENCHMARK_DIRECTORY)
+_DEFAULT_BASELINE_PATH = os.path.join(_BENCHMARK_DIRECTORY, "baseline.json")
+_DEFAULT_CSV_PATTERN = os.path.join(_PROJECT_DIRECTORY, "simulation_results", "full_optimization_data_*.csv")
+
+PARAM_NAMES = ['s', 'w', 'l', 'height']
+
+# Os ranges padrão do main.py
+PARAM_RANGES = experiment_param_ranges()
+
+# Tamanho de geração usado para simular execuções longas (linhas por geração)
+GENERATION_SIZE = 30
+
+
+# --- Entradas ---
+
+def load_recorded_individuals(csv_pattern=_DEFAULT_CSV_PATTERN, seed=0):
+    """
+    Lê os indivíduos avaliados dos CSVs registrados em simulation_results/.
+
+    Returns:
+        Um DataFrame (s, w, l, height, delta_amp) só com avaliações válidas. Sem
+        CSVs, gera indivíduos aleatórios nos ranges do main.py, pontuados pelo
+        modelo sintético.
+    """
+    frames = [pd.read_csv(path) for path in sorted(glob.glob(csv_pattern))]
+    if frames:
+        df = pd.concat(frames, ignore_index=True)
+        df = df[np.isfinite(df['delta_amp'])]
+        if 'fidelity' in df:
+            df = df[df['fidelity'].fillna('high') == 'high']
+        if len(df):
+            return df[PARAM_NAMES + ['delta_amp']].reset_index(drop=True)
+
+    print("  [Benchmark] Nenhum CSV registrado encontrado; usando indivíduos sintéticos.")
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({p: rng.uniform(*PARAM_RANGES[p], size=500) for p in PARAM_NAMES})
+    df['delta_amp'] = delta_amp_from_spectra(synthesize_spectra(df)[1])
+    return df
+
+
+def sample_individuals(df, n, seed=0):
+    """'n' linhas sorteadas (com reposição) dos indivíduos registrados."""
+    rng = np.random.default_rng(seed)
+    return df.iloc[rng.integers(0, len(df), size=n)].reset_index(drop=True)
+
+
+def synthesize_spectra(df, points=500):
+    """
+    Espectros |E|(f) dos indivíduos, gerados pelo modelo do backend sintético.
+
+    Returns:
+        Uma tupla (frequências, matriz n x points de |E|).
+    """
+    spectra = []
+    for row in df.itertuples(index=False):
+        f, Ex, Ey, Ez = synthetic_monitor_fields(row.s, row.w, row.l, row.height, points=points)
+        spectra.append(np.sqrt(np.abs(Ex[0, 0, 0]) ** 2 + np.abs(Ey[0, 0, 0]) ** 2 + np.abs(Ez[0, 0, 0]) ** 2))
+    return f, np.vstack(spectra)
+
+
+def write_spectrum_file(h5_path, frequencies_hz, spectrum, monitor_name='in'):
+    # Mesmo formato de extract_monitor_spectrum (um arquivo por indivíduo)
+    with h5py.File(h5_path, 'w') as hf:
+        hf.create_dataset('frequencies_hz', data=frequencies_hz)
+        hf.create_dataset(f'{monitor_name}_spectrum_E_magnitude', data=spectrum)
+
+
+def rows_of(df, generation_size=GENERATION_SIZE):
+    """Linhas no formato de all_individuals_data do main.py."""
+    rows = df.to_dict('records')
+    for i, row in enumerate(rows):
+        row['generation'] = i // generation_size + 1
+    return rows
+
+
+# --- Medição ---
+
+def measure(function, setup=None, repeat=5, min_time=0.05):
+    """
+    Mede o tempo de 'function', descontando 'setup' (chamado antes de cada medição).
+
+    Cada medição repete a chamada até somar pelo menos 'min_time' segundos,
+    para que funções muito rápidas não fiquem abaixo da resolução do relógio.
+
+    Returns:
+        Um dicionário com a mediana e o mínimo, em segundos por chamada.
+    """
+    timings = []
+    for _ in range(repeat):
+        calls = 0
+        elapsed = 0.0
+        while calls == 0 or elapsed < min_time:
+            state = setup() if setup is not None else None
+            start = time.perf_counter()
+            function(state)
+            elapsed += time.perf_counter() - start
+            calls += 1
+        timings.append(elapsed / calls)
+    return {'median_s': float(np.median(timings)), 'min_s': float(np.min(timings)), 'repeat': repeat}
+
+
+@contextlib.contextmanager
+def quiet():
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+# --- Benchmarks ---
+
+def bench_delta_amp(individuals, work_directory, quick=False):
+    results = {}
+    n_files = 50 if quick else 200
+    sample = sample_individuals(individuals, n_files)
+    frequencies_hz, spectra = synthesize_spectra(sample)
+    h5_paths = []
+    for i, spectrum in enumerate(spectra):
+        h5_path = os.path.join(work_directory, f"spectrum_{i}.h5")
+        write_spectrum_file(h5_path, frequencies_hz, spectrum)
+        h5_paths.append(h5_path)
+
+    results[f'delta_amp.calculate_delta_amp[{n_files} arquivos]'] = measure(
+        lambda _: calculate_delta_amp_batch(h5_paths)
+    )
+    results[f'delta_amp.from_spectra[{n_files}x500]'] = measure(lambda _: delta_amp_from_spectra(spectra))
+    return results
+
+
+def bench_evolve(individuals, work_directory, quick=False):
+    results = {}
+    for population_size in ((30, 300) if quick else (30, 300, 3000)):
+        sample = sample_individuals(individuals, population_size)
+        population = sample[PARAM_NAMES].to_dict('records')
+        delta_amps = sample['delta_amp'].tolist()
+
+        def setup():
+            optimizer = GeneticOptimizer(population_size, 0.2, 100, *PARAM_RANGES.values(), seed=0)
+            optimizer.population = population
+            return optimizer
+
+        results[f'evolve[pop={population_size}]'] = measure(lambda optimizer: optimizer.evolve(delta_amps), setup)
+    return results
+
+
+def bench_results_and_analysis(individuals, work_directory, quick=False):
+    """CSV e análise de uma geração, com execuções de comprimentos crescentes."""
+    results = {}
+    for n_generations in ((10, 50) if quick else (10, 100, 300)):
+        rows = rows_of(sample_individuals(individuals, n_generations * GENERATION_SIZE))
+        previous_rows, new_rows = rows[:-GENERATION_SIZE], rows[-GENERATION_SIZE:]
+        csv_path = os.path.join(work_directory, f"full_optimization_data_{n_generations}.csv")
+
+        def setup():
+            # CSV e estatísticas no estado do fim da geração anterior
+            if os.path.exists(csv_path):
+                os.remove(csv_path)
+            writer = ResultsLogWriter(csv_path)
+            writer.append_rows(previous_rows)
+            reader = ResultsLogReader(csv_path)
+            statistics = RunningStatistics().update(reader.read_new())
+            return writer, reader, statistics
+
+        def append_generation(state):
+            writer, reader, statistics = state
+            writer.append_rows(new_rows)
+            statistics.update(reader.read_new())
+            writer.close()
+
+        results[f'csv.append_generation[{n_generations} gerações]'] = measure(append_generation, setup)
+
+        with ResultsLogWriter(csv_path) as writer:
+            writer.append_rows(new_rows)
+
+        def full_analysis(_):
+            with quiet():
+                run_full_analysis(csv_path)
+
+        results[f'analysis.run_full_analysis[{n_generations} gerações]'] = measure(
+            full_analysis, repeat=1 if quick else 3
+        )
+    return results
+
+
+def bench_record_experiment_results(individuals, work_directory, quick=False):
+    results = {}
+    best = individuals.loc[individuals['delta_amp'].idxmax()]
+    for n_generations in ((10, 100) if quick else (10, 100, 1000)):
+        optimizer = GeneticOptimizer(GENERATION_SIZE, 0.2, n_generations, *PARAM_RANGES.values(), seed=0)
+        optimizer.best_individual = {p: float(best[p]) for p in PARAM_NAMES}
+        optimizer.best_fitness = float(best['delta_amp'])
+        optimizer.fitness_history = np.maximum.accumulate(
+            sample_individuals(individuals, n_generations)['delta_amp'].to_numpy()
+        ).tolist()
+        start_time = datetime.datetime(2025, 1, 1)
+
+        def record(_):
+            with quiet():
+                record_experiment_results(work_directory, optimizer, start_time, *PARAM_RANGES.values(),
+                                          n_generations)
+
+        results[f'record_experiment_results[{n_generations} gerações]'] = measure(
+            record, repeat=1 if quick else 3
+        )
+    return results
+
+
+def bench_hdf5(individuals, work_directory, quick=False):
+    results = {}
+    sample = sample_individuals(individuals, GENERATION_SIZE)
+    frequencies_hz, spectra = synthesize_spectra(sample)
+    chromosomes = sample[PARAM_NAMES].to_dict('records')
+
+    # Um arquivo .h5 por indivíduo (workflow sem o arquivo consolidado)
+    def write_files(_):
+        for i, spectrum in enumerate(spectra):
+            write_spectrum_file(os.path.join(work_directory, f"individual_{i}.h5"), frequencies_hz, spectrum)
+
+    def read_files(_):
+        for i in range(len(spectra)):
+            _read_spectrum(os.path.join(work_directory, f"individual_{i}.h5"))
+
+    results[f'hdf5.per_file_write[{GENERATION_SIZE} espectros]'] = measure(write_files)
+    results[f'hdf5.per_file_read[{GENERATION_SIZE} espectros]'] = measure(read_files)
+
+    # Arquivo consolidado, já com 'n_generations' gerações gravadas
+    for n_generations in ((10, 100) if quick else (10, 100, 1000)):
+        archive_path = os.path.join(work_directory, f"spectra_{n_generations}.h5")
+        archive = SpectrumArchive(archive_path)
+        for generation in range(1, n_generations + 1):
+            for chromosome, spectrum in zip(chromosomes, spectra):
+                archive.append(chromosome, frequencies_hz, spectrum, generation)
+        archive.flush()
+
+        def append_generation(_):
+            for chromosome, spectrum in zip(chromosomes, spectra):
+                archive.append(chromosome, frequencies_hz, spectrum, n_generations + 1)
+            archive.flush()
+
+        def read_generation(_):
+            archive.read(archive.find(generation=n_generations // 2))
+
+        results[f'hdf5.archive_append_generation[{n_generations} gerações]'] = measure(append_generation)
+        results[f'hdf5.archive_read_generation[{n_generations} gerações]'] = measure(read_generation)
+    return results
+
+
+def bench_cold_start(individuals, work_directory, quick=False):
+    """Tempo de um interpretador novo até importar o módulo (o custo de cada processo do pool ou de uma varredura)."""
+    results = {}
+    for module in ('main', 'utils.session_pool', 'utils.job_broker'):
+        command = [sys.executable, '-c', f'import {module}']
+        results[f'cold_start.import[{module}]'] = measure(
+            lambda _: subprocess.run(command, cwd=_PROJECT_DIRECTORY, check=True), repeat=3 if quick else 7
+        )
+    return results
+
+
+BENCHMARKS = {
+    'delta_amp': bench_delta_amp,
+    'evolve': bench_evolve,
+    'results_and_analysis': bench_results_and_analysis,
+    'record_experiment_results': bench_record_experiment_results,
+    'hdf5': bench_hdf5,
+    'cold_start': bench_cold_start,
+}
+
+
+def run_benchmarks(csv_pattern=_DEFAULT_CSV_PATTERN, name_filter=None, quick=False):
+    """
+    Executa os benchmarks cujo nome contém 'name_filter' (todos, se None).
+
+    Returns:
+        Um dicionário {nome da medição: {'median_s', 'min_s', 'repeat'}}.
+    """
+    individuals = load_recorded_individuals(csv_pattern)
+    print(f"  [Benchmark] {len(individuals)} indivíduos registrados usados como entrada.")
+    results = {}
+    work_directory = tempfile.mkdtemp(prefix="benchmarks_")
+    try:
+        for group_name, benchmark in BENCHMARKS.items():
+            if name_filter and name_filter not in group_name:
+                continue
+            group_directory = os.path.join(work_directory, group_name)
+            os.makedirs(group_directory)
+            for name, result in benchmark(individuals, group_directory, quick).items():
+                results[name] = result
+                print(f"  [Benchmark] {name:<55} {result['median_s'] * 1e3:10.3f} ms")
+    finally:
+        shutil.rmtree(work_directory, ignore_errors=True)
+    return results
+
+
+def machine_info():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'h5py': h5py.__version__,
+    }
+
+
+def save_baseline(results, baseline_path=_DEFAULT_BASELINE_PATH):
+    with open(baseline_path, 'w') as f:
+        json.dump({'created': datetime.datetime.now().isoformat(), 'machine': machine_info(),
+                   'results': results}, f, indent=4)
+
+
+def compare_with_baseline(results, baseline_path=_DEFAULT_BASELINE_PATH, threshold=0.25):
+    """
+    Compara as medições com a referência salva.
+
+    Uma medição é uma regressão se a sua mediana passar a mediana da
+    referência em mais de 'threshold' (fração) e o seu mínimo também passar o
+    mínimo da referência, o que filtra medições afetadas por ruído pontual.
+
+    Returns:
+        Uma lista de (nome, referência em s, atual em s, razão) das regressões.
+    """
+    with open(baseline_path, 'r') as f:
+        baseline = json.load(f)
+    if baseline['machine'] != machine_info():
+        print("  [Benchmark] Aviso: a referência foi medida em outra máquina ou com outras versões.")
+
+    regressions = []
+    print(f"\n  {'Medição':<55} {'Referência':>12} {'Atual':>12} {'Razão':>7}")
+    for name, result in results.items():
+        reference = baseline['results'].get(name)
+        if reference is None:
+            print(f"  {name:<55} {'-':>12} {result['median_s'] * 1e3:10.3f}ms {'novo':>7}")
+            continue
+        ratio = result['median_s'] / reference['median_s']
+        regressed = ratio > 1 + threshold and result['min_s'] > reference['min_s'] * (1 + threshold)
+        flag = "  <-- REGRESSÃO" if regressed else ""
+        print(f"  {name:<55} {reference['median_s'] * 1e3:10.3f}ms {result['median_s'] * 1e3:10.3f}ms "
+              f"{ratio:6.2f}x{flag}")
+        if regressed:
+            regressions.append((name, reference['median_s'], result['median_s'], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks do código Python entre as levas de simulação.")
+    parser.add_argument('--save-baseline', action='store_true', help="Salva as medições como nova referência.")
+    parser.add_argument('--baseline', default=_DEFAULT_BASELINE_PATH, help="Arquivo JSON da referência.")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="Aumento relativo da mediana considerado regressão (padrão: 0.25).")
+    parser.add_argument('--csv', default=_DEFAULT_CSV_PATTERN, help="Padrão glob dos CSVs usados como entrada.")
+    parser.add_argument('--filter', default=None, help="Executa só os grupos cujo nome contém este texto.")
+    parser.add_argument('--quick', action='store_true', help="Menos tamanhos e repetições.")
+    parser.add_argument('--output', default=None, help="Salva também as medições desta execução neste JSON.")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.csv, args.filter, args.quick)
+    if args.output:
+        save_baseline(results, args.output)
+
+    if args.save_baseline:
+        if os.path.exists(args.baseline):
+            # A referência anterior é mantida: as medições novas são acrescentadas ou substituídas
+            with open(args.baseline, 'r') as f:
+                results = dict(json.load(f)['results'], **results)
+        save_baseline(results, args.baseline)
+        print(f"\n  [Benchmark] Referência salva em {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\n  [Benchmark] Nenhuma referência em {args.baseline}; use --save-baseline para criá-la.")
+        return 0
+    regressions = compare_with_baseline(results, args.baseline, args.threshold)
+    if regressions:
+        print(f"\n  [Benchmark] {len(regressions)} regressão(ões) acima de {args.threshold:.0%}.")
+        return 1
+    print("\n  [Benchmark] Nenhuma regressão.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
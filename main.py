@@ -4,178 +4,842 @@ import sys
 import os
 import datetime
 import shutil
-import pandas as pd
+import argparse
+import contextlib
 
 _lumapi_module_path = "C:\\Program Files\\Lumerical\\v241\\api\\python"
 
-if _lumapi_module_path not in sys.path:
-    sys.path.append(_lumapi_module_path)
-
-import lumapi
 # Importações dos módulos personalizados
-from utils.genetic import GeneticOptimizer
-from utils.experiment_end import record_experiment_results
-from utils.lumerical_workflow import simulate_generation_lumerical
-from utils.post_processing import calculate_delta_amp
-from utils.file_handler import clean_simulation_directory
-from utils.analysis import run_full_analysis
+# Só os módulos leves ficam aqui: os processos "spawn" do pool de sessões reimportam este
+# módulo, e o backend de simulação, o pandas e os gráficos são importados por run_experiment
+from utils.experiment_config import load_experiment_config, apply_config
+from utils.checkpoint import (
+    save_checkpoint, load_checkpoint, remove_checkpoint, capture_rng_state, restore_rng_state,
+    PartialGenerationLog
+)
+from utils.fidelity import LOW_FIDELITY
+from utils.telemetry import RunTelemetry, timed
+from utils.convergence import (
+    ConvergenceMonitor, RelativeImprovementCriterion, DiversityCriterion, PlateauTestCriterion
+)
+
+_names_before_settings = set(globals())
 
 # --- Configurações Globais ---
-_project_directory = os.getcwd()
+# Os valores abaixo são os padrões de run_experiment; um arquivo TOML ou JSON com os mesmos
+# nomes (python main.py --config experimento.toml) substitui só os valores que informa
+project_directory = None  # Diretório dos arquivos do experimento (None = diretório atual)
 _original_fsp_file_name = "guide.fsp"
 _geometry_lsf_script_name = "create_guide_fdtd.lsf"
 _simulation_lsf_script_name = "run_simu_guide_fdtd.lsf"
+_update_lsf_script_name = "update_simu_guide_fdtd.lsf"
+_structure_lsf_script_name = "metamaterial_guide.lsf"  # Script do grupo estrutural, lido pelo create_guide_fdtd.lsf
 _simulation_spectra_directory_name = "simulation_spectra"
 _simulation_results_directory_name = "simulation_results"
+# Os scripts LSF acompanham o código; o projeto base (guide.fsp) e os resultados ficam no diretório do projeto
+_resources_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources")
+
 
 # --- Diretórios ---
-_temp_directory = os.path.join(_project_directory, "temp")
-os.makedirs(_temp_directory, exist_ok=True)
-_temp_fsp_base_path = os.path.join(_project_directory, "guide_temp_base.fsp")
-_original_fsp_path = os.path.join(_project_directory, _original_fsp_file_name)
-_geometry_lsf_script_path = os.path.join(_project_directory, "resources", _geometry_lsf_script_name)
-_simulation_lsf_script_path = os.path.join(_project_directory, "resources", _simulation_lsf_script_name)
-_simulation_spectra_directory = os.path.join(_project_directory, _simulation_spectra_directory_name)
-_simulation_results_directory = os.path.join(_project_directory, _simulation_results_directory_name)
+def _configure_paths(directory):
+    """Define os caminhos dos arquivos do experimento a partir do diretório do projeto."""
+    global _project_directory, _temp_directory, _temp_fsp_base_path, _original_fsp_path
+    global _geometry_lsf_script_path, _simulation_lsf_script_path, _update_lsf_script_path, _template_fsp_path
+    global _structure_lsf_script_path
+    global _simulation_spectra_directory, _simulation_results_directory
+    global _fitness_cache_path, _fitness_cache_seed_pattern, _checkpoint_path, _partial_checkpoint_path
+    _project_directory = os.path.abspath(directory)
+    _temp_directory = os.path.join(_project_directory, "temp")
+    _temp_fsp_base_path = os.path.join(_project_directory, "guide_temp_base.fsp")
+    _original_fsp_path = os.path.join(_project_directory, _original_fsp_file_name)
+    _geometry_lsf_script_path = os.path.join(_resources_directory, _geometry_lsf_script_name)
+    _simulation_lsf_script_path = os.path.join(_resources_directory, _simulation_lsf_script_name)
+    _update_lsf_script_path = os.path.join(_resources_directory, _update_lsf_script_name)
+    _structure_lsf_script_path = os.path.join(_resources_directory, _structure_lsf_script_name)
+    _template_fsp_path = os.path.join(_project_directory, "guide_temp_template.fsp")
+    _simulation_spectra_directory = os.path.join(_project_directory, _simulation_spectra_directory_name)
+    _simulation_results_directory = os.path.join(_project_directory, _simulation_results_directory_name)
+    _fitness_cache_path = os.path.join(_simulation_results_directory, "fitness_cache.sqlite")
+    _fitness_cache_seed_pattern = os.path.join(_simulation_results_directory, "full_optimization_data_*.csv")
+    _checkpoint_path = os.path.join(_simulation_results_directory, "checkpoint.pkl")
+    _partial_checkpoint_path = os.path.join(_simulation_results_directory, "checkpoint_generation.pkl")
+
 
-os.makedirs(_simulation_spectra_directory, exist_ok=True)
+# Os diretórios só são criados quando o experimento começa (ver run_experiment)
+_configure_paths(os.getcwd())
 
 # --- Configuração do Algoritmo Genético ---
 population_size = 3
 mutation_rate = 0.2
 num_generations = 1
 
+# --- Algoritmo de Otimização ---
+# 'genetic' (GeneticOptimizer), 'cmaes' ou 'differential_evolution' (utils/optimizers.py), todos
+# com a mesma interface ask/tell e os mesmos ranges; 'mutation_rate' só vale para o genético.
+# 'python -m utils.optimizers [experimento.toml]' compara os algoritmos em um substituto ajustado aos CSVs registrados
+optimizer_algorithm = "genetic"
+optimizer_options = {
+    "genetic": {},
+    "cmaes": {"sigma0": 0.3},
+    "differential_evolution": {"differential_weight": 0.7, "crossover_rate": 0.9},
+}
+
 # --- Ranges de Parâmetros ---
 s_range = (0.1e-6, 0.25e-6)
 w_range = (0.3e-6, 0.7e-6)
 l_range = (0.1e-6, 0.25e-6)
 height_range = (0.15e-6, 0.3e-6)
 
+# --- Backend de Simulação ---
+# 'lumerical' usa o FDTD real; 'synthetic' gera espectros sintéticos para testes de carga
+simulation_backend = "lumerical"
+backend_options = {
+    # separate_extraction_session: abre uma segunda sessão (mais uma licença) para extrair os jobs durante o runjobs
+    "lumerical": {"lumapi_path": _lumapi_module_path, "hide": False, "separate_extraction_session": False},
+    "synthetic": {"job_latency": (0.5, 2.0), "failure_rate": 0.02, "max_concurrent_jobs": 4},
+}
+
+# --- Modo Template ---
+# Monta o projeto completo uma vez e, por indivíduo, só atualiza os parâmetros do guia.
+# Desligado até a saída do template ser validada contra projetos reconstruídos por completo
+use_job_template = False
+
+# --- Pool de Sessões ---
+# Número de processos, cada um com a sua sessão, para preparar e extrair os jobs (0 = só a sessão principal)
+session_pool_workers = 0
+
+# --- Espaço em Disco dos Projetos ---
+# Cada FSP é removido assim que o seu espectro é extraído. Com um orçamento (em GB), as levas de
+# jobs são divididas para que os projetos simulados ao mesmo tempo caibam nele (None = sem limite)
+workspace_disk_budget_gb = None
+workspace_project_size_mb = None  # Tamanho estimado de um projeto simulado (None = mede o primeiro)
+keep_failed_projects = False  # Guarda os projetos dos jobs que falharam em temp/failed_jobs
+
+# --- Avaliação Distribuída ---
+# Com um diretório compartilhado entre as máquinas, os jobs são publicados para os workers
+# (python -m utils.job_broker --broker-dir <diretório>, em cada máquina) em vez da fila local
+broker_directory = None
+broker_local_workers = 0  # Workers iniciados nesta máquina (ex.: com o backend sintético, para testes)
+broker_lease_timeout_s = 120  # Sem heartbeat por esse tempo, os jobs do worker voltam para a fila
+
+# --- Confiabilidade dos Jobs ---
+# Jobs que falham (ou esgotam o tempo limite) são executados novamente, com uma espera que dobra a cada rodada
+job_max_retries = 2
+job_retry_backoff_s = 5.0
+job_timeout_s = None  # Tempo máximo de execução de um job (None = sem limite)
+straggler_factor = None  # Copia jobs que demoram mais que esse fator vezes a mediana (None = desligado)
+
+# --- Cache de Avaliações ---
+# Cromossomos já avaliados (elite, repetidos ou de execuções anteriores) não são simulados novamente
+enable_fitness_cache = True
+
+# --- Arquivo de Espectros ---
+# Todos os espectros do experimento ficam em um único HDF5 comprimido (spectra_<timestamp>.h5),
+# em vez de um .h5 por indivíduo apagado a cada geração
+enable_spectrum_archive = True
+
+# --- Pré-seleção por Modelo Substituto ---
+# Gera mais filhos do que o necessário e só simula os mais promissores (ou mais incertos)
+# segundo um processo gaussiano ajustado com as avaliações já feitas
+enable_surrogate_screening = False
+surrogate_oversample_factor = 4
+surrogate_exploration_fraction = 0.25
+
+# --- Avaliação Multi-fidelidade ---
+# Cada geração é simulada primeiro em baixa fidelidade (malha grossa, tempo menor, menos
+# pontos de frequência) e só a fração mais promissora é simulada com os valores completos
+# de run_simu_guide_fdtd.lsf; a coluna 'fidelity' do CSV indica a origem de cada delta_amp.
+# Disponível nos modos 'generational' e 'islands'
+enable_multi_fidelity = False
+multi_fidelity_promote_fraction = 0.25
+low_fidelity_parameters = LOW_FIDELITY
+
+# --- Gráficos em Segundo Plano ---
+# Os gráficos são desenhados por outro processo; o loop de otimização não espera o matplotlib
+use_background_plotting = True
+pairplot_interval_seconds = 60
+
+# --- Checkpoints ---
+# O estado completo é salvo ao final de cada geração; 'python main.py --resume' continua
+# a execução interrompida a partir da última geração concluída
+enable_checkpoints = True
+
+# --- Telemetria ---
+# Tempos por fase e por job de cada geração, uma linha por geração em telemetry_<timestamp>.jsonl;
+# o resumo vai para o experiment_results_<timestamp>.json
+enable_telemetry = True
+
 # --- Critério de Convergência ---
 enable_convergence_check = True
 CONVERGENCE_PATIENCE = 20
-print("--------------------------------------------------------------------------")
-print(f"Iniciando o script principal (main.py) para otimização do guia de onda...")
-print("--------------------------------------------------------------------------")
+# Critérios adicionais (None = desligado); qualquer um deles também encerra a otimização.
+# 'python -m utils.convergence' mostra quanto cada um teria economizado nas execuções registradas
+convergence_relative_window = None  # Gerações em que o melhor fitness precisa melhorar pelo menos o mínimo abaixo (ex.: 12)
+convergence_min_relative_improvement = 1e-3
+convergence_min_diversity = None  # Desvio médio dos parâmetros normalizados da população (ex.: 0.02)
+convergence_plateau_window = None  # Gerações do teste de Mann-Kendall (ex.: 15)
+convergence_plateau_alpha = 0.05
 
-shutil.copy(_original_fsp_path, _temp_fsp_base_path)
-print(f"Copiado {_original_fsp_path} para {_temp_fsp_base_path}")
+# --- Modo de Evolução ---
+# 'generational' avalia gerações completas; 'steady_state' gera um filho sempre que um
+# processo do pool fica livre (usa max(1, session_pool_workers) processos); 'islands'
+# evolui 'num_islands' populações de 'population_size' indivíduos, com sementes e taxas
+# de mutação próprias, avaliadas juntas na mesma fila de jobs, com migração em anel
+evolution_mode = "generational"
 
-if not os.path.exists(_temp_fsp_base_path):
-    raise FileNotFoundError(f"Erro: O arquivo base {_temp_fsp_base_path} não foi criado.")
+# --- Modelo de Ilhas ---
+num_islands = 4
+island_mutation_rates = (0.1, 0.2, 0.3, 0.4)  # Uma por ilha (repetida se houver menos valores)
+migration_interval = 5  # Gerações entre migrações
+migration_size = 2  # Indivíduos enviados por ilha a cada migração
 
-optimizer = GeneticOptimizer(
-    population_size, mutation_rate, num_generations,
-    s_range, w_range, l_range, height_range
-)
-optimizer.initialize_population()
-current_population = optimizer.population
-
-experiment_start_time = datetime.datetime.now()
-timestamp_str = experiment_start_time.strftime('%Y%m%d_%H%M%S')
-full_data_csv_path = os.path.join(_simulation_results_directory, f"full_optimization_data_{timestamp_str}.csv")
-realtime_heatmap_path = os.path.join(_simulation_results_directory, f"realtime_correlation_heatmap_{timestamp_str}.png")
-
-generations_processed = 0
-all_individuals_data = []
-
-# --- NOVAS VARIÁVEIS PARA A LÓGICA DE CONVERGÊNCIA ---
-# Armazena o melhor fitness encontrado até agora
-best_fitness_so_far = -float('inf')
-# Conta as gerações consecutivas sem melhoria
-generations_without_improvement = 0
-
-try:
-    with lumapi.FDTD(hide=False) as fdtd:
-        for gen_num in range(num_generations):
-            generations_processed += 1
-            print(f"\n--- Processando Geração {gen_num + 1}/{num_generations} ---")
-            
-            clean_simulation_directory(_simulation_spectra_directory, file_extension=".h5")
-            clean_simulation_directory(_temp_directory, file_extension=".fsp")
-            clean_simulation_directory(_temp_directory, file_extension=".log")
-            
-            h5_paths_for_gen = simulate_generation_lumerical(
-                fdtd, current_population, _temp_fsp_base_path,
-                _geometry_lsf_script_path, _simulation_lsf_script_path,
-                _simulation_spectra_directory, _temp_directory
+# Valores padrão de todas as configurações acima (os nomes aceitos por run_experiment)
+_DEFAULT_SETTINGS = {name: value for name, value in globals().items()
+                     if name not in _names_before_settings and not name.startswith('_')}
+
+
+def create_convergence_monitor():
+    """Monta o monitor com os critérios de parada adicionais configurados (None se nenhum)."""
+    criteria = []
+    if convergence_relative_window is not None:
+        criteria.append(RelativeImprovementCriterion(convergence_relative_window, convergence_min_relative_improvement))
+    if convergence_min_diversity is not None:
+        param_ranges = {'s': s_range, 'w': w_range, 'l': l_range, 'height': height_range}
+        criteria.append(DiversityCriterion(param_ranges, convergence_min_diversity))
+    if convergence_plateau_window is not None:
+        criteria.append(PlateauTestCriterion(convergence_plateau_window, convergence_plateau_alpha))
+    return ConvergenceMonitor(criteria) if criteria else None
+
+
+def report_generation(generation_number):
+    """
+    Atualiza o relatório, o CSV e a análise ao final de uma geração e aplica o
+    critério de convergência. Retorna True se a otimização deve ser encerrada.
+    """
+    global best_fitness_so_far, generations_without_improvement
+    from utils.experiment_end import record_experiment_results
+    from utils.analysis import run_full_analysis, analysis_output_paths
+
+    print(f"  [Relatório] Atualizando relatório para a Geração {generation_number}...")
+    with timed(telemetry, 'record_results'):
+        record_experiment_results(
+            _simulation_results_directory, optimizer, experiment_start_time,
+            s_range, w_range, l_range, height_range, generations_processed,
+            plot_worker=plot_worker, telemetry=telemetry, backend=simulation_backend
+        )
+    
+    if spectrum_archive is not None:
+        with timed(telemetry, 'spectrum_archive'):
+            spectrum_archive.flush()
+
+    if all_individuals_data:
+        # Só as linhas novas são gravadas (e lidas de volta para a análise)
+        with timed(telemetry, 'csv_write'):
+            results_writer.append_rows(all_individuals_data[results_writer.rows_written:])
+            new_rows = results_reader.read_new()
+        print(f"  [Análise] Dados de {len(all_individuals_data)} indivíduos atualizados em CSV.")
+        with timed(telemetry, 'analysis'):
+            if plot_worker is not None:
+                # A correlação é atualizada só com as linhas novas; os gráficos ficam com o processo de desenho
+                running_statistics.update(new_rows)
+                heatmap_output_path, pairplot_output_path = analysis_output_paths(full_data_csv_path)
+                plot_worker.submit_heatmap(running_statistics.correlation_matrix(), heatmap_output_path)
+                plot_worker.submit_pairplot(full_data_csv_path, pairplot_output_path)
+                print(f"  [Análise] Heatmap de correlação enviado para o processo de desenho.")
+            else:
+                run_full_analysis(full_data_csv_path, df=results_reader.data)
+                print(f"  [Análise] Heatmap de correlação atualizado e salvo.")
+
+    # --- LÓGICA DE CONVERGÊNCIA POR ESTAGNAÇÃO DO FITNESS (TOTALMENTE MODIFICADA) ---
+    if enable_convergence_check:
+        # Pega o melhor fitness encontrado até agora em *toda* a otimização
+        current_best_fitness = optimizer.best_fitness
+
+        # Compara com o melhor fitness que tínhamos registrado
+        if current_best_fitness > best_fitness_so_far:
+            print(f"  [Convergência] ✅ Novo melhor fitness encontrado: {current_best_fitness:.4e}. Reiniciando contador.")
+            best_fitness_so_far = current_best_fitness
+            generations_without_improvement = 0 # Zera o contador pois houve melhoria
+        else:
+            generations_without_improvement += 1 # Incrementa o contador
+            print(f"  [Convergência] ⏳ Nenhuma melhoria no fitness. Gerações sem melhoria: {generations_without_improvement}/{CONVERGENCE_PATIENCE}")
+
+        # Verifica se atingimos o limite de paciência
+        if generations_without_improvement >= CONVERGENCE_PATIENCE:
+            print(f"\n  [Convergência] 🛑 O melhor fitness não melhorou por {CONVERGENCE_PATIENCE} gerações consecutivas.")
+            print("  [Convergência] Otimização considerada convergente. Encerrando.")
+            save_run_checkpoint(converged=True)
+            return True # Encerra o loop principal de gerações
+
+        # Critérios adicionais: a população avaliada a seguir entra no critério de diversidade
+        if convergence_monitor is not None and convergence_monitor.update(current_best_fitness, optimizer.population):
+            print(f"\n  [Convergência] 🛑 {convergence_monitor.reason}")
+            print("  [Convergência] Otimização considerada convergente. Encerrando.")
+            save_run_checkpoint(converged=True)
+            return True
+    # --- FIM DA LÓGICA DE CONVERGÊNCIA MODIFICADA ---
+    save_run_checkpoint()
+    return False
+
+
+def save_run_checkpoint(converged=False):
+    """Salva o estado do otimizador e do loop principal ao final de uma geração."""
+    if not enable_checkpoints:
+        return
+    with timed(telemetry, 'checkpoint'):
+        _save_run_checkpoint(converged)
+
+
+def _save_run_checkpoint(converged):
+    save_checkpoint(_checkpoint_path, {
+        'optimizer': optimizer,
+        'current_population': current_population,
+        'generations_processed': generations_processed,
+        'all_individuals_data': all_individuals_data,
+        'best_fitness_so_far': best_fitness_so_far,
+        'generations_without_improvement': generations_without_improvement,
+        'convergence_monitor': convergence_monitor,
+        'experiment_start_time': experiment_start_time,
+        'evolution_mode': evolution_mode,
+        'converged': converged,
+        'rng_state': capture_rng_state(),
+    })
+
+
+def evaluate_population(fdtd, population, generation, cache=None, partial_log=None, fidelity=None):
+    """
+    Avalia uma leva de cromossomos de uma geração.
+
+    Consulta o cache (e os resultados de uma geração interrompida) antes de
+    enfileirar os jobs: só os cromossomos inéditos são simulados, e cada um é
+    pontuado e registrado assim que o seu job termina.
+
+    Returns:
+        A lista de delta_amp, na ordem de 'population'.
+    """
+    with timed(telemetry, 'cache_lookup'):
+        if cache is not None:
+            delta_amps = cache.get_many(population)
+        else:
+            delta_amps = [None] * len(population)
+    if partial_log is not None:
+        # Jobs já concluídos antes de uma interrupção desta mesma geração
+        partial_results = partial_log.start(generation, population)
+        for i, delta_amp in partial_results.items():
+            delta_amps[i] = delta_amp
+        if partial_results:
+            print(f"  [Checkpoint] {len(partial_results)} resultados da geração interrompida reaproveitados.")
+    pending_indices = [i for i, d in enumerate(delta_amps) if d is None]
+    pending_population = [population[i] for i in pending_indices]
+    print(f"  [Cache] {len(population) - len(pending_population)} cromossomos reaproveitados, "
+          f"{len(pending_population)} serão simulados.")
+
+    def run_attempt(chromosomes, attempt):
+        if job_broker is not None:
+            from utils.job_broker import iter_broker_results
+            return iter_broker_results(
+                job_broker, chromosomes, _simulation_spectra_directory,
+                spectrum_archive=spectrum_archive, generation=generation, fidelity=fidelity, telemetry=telemetry
             )
-            
-            print("\n  [Job Manager] Pós-processando os resultados da geração...")
-            delta_amp_results_for_gen = []
-            for h5_path in h5_paths_for_gen:
-                try:
-                    delta_amp = calculate_delta_amp(h5_path)
-                except Exception as e:
-                    print(f"!!! Erro no pós-processamento do arquivo {os.path.basename(h5_path)}: {e}")
-                    delta_amp = -float('inf')
-                delta_amp_results_for_gen.append(delta_amp)
-
-            for i, chromosome in enumerate(current_population):
+        from utils.lumerical_workflow import iter_generation_results
+        return iter_generation_results(
+            fdtd, chromosomes, _temp_fsp_base_path,
+            _geometry_lsf_script_path, _simulation_lsf_script_path,
+            _simulation_spectra_directory, _temp_directory,
+            job_template=job_template, session_pool=session_pool,
+            spectrum_archive=spectrum_archive, generation=generation, fidelity=fidelity,
+            telemetry=telemetry, workspace=workspace,
+            job_timeout_s=job_manager.job_timeout_s, straggler_factor=job_manager.straggler_factor
+        )
+
+    # Cada indivíduo é pontuado e registrado assim que o seu resultado é definitivo,
+    # enquanto os demais jobs da geração ainda estão executando; os que falharam são repetidos
+    if pending_population:
+        results = job_manager.run(pending_population, run_attempt, backend=job_broker or fdtd)
+        for pending_index, h5_path, delta_amp in results:
+            delta_amps[pending_indices[pending_index]] = delta_amp
+            if cache is not None:
+                with timed(telemetry, 'cache_store'):
+                    cache.put(pending_population[pending_index], delta_amp)
+            if partial_log is not None:
+                with timed(telemetry, 'checkpoint'):
+                    partial_log.record(pending_indices[pending_index], delta_amp)
+        print("  [Job Manager] Todos os jobs da geração foram concluídos.")
+    return delta_amps
+
+
+def run_experiment(config=None, resume=False):
+    """
+    Executa um experimento de otimização completo.
+
+    As configurações globais deste módulo são restauradas aos valores padrão
+    e substituídas pelas de 'config', de modo que chamadas seguintes (ex.: em
+    uma varredura de parâmetros) não herdam as configurações anteriores.
+
+    Args:
+        config (dict): Opcional. Configurações com os nomes das globais deste
+            módulo (ex.: {'population_size': 30, 'simulation_backend': 'synthetic'}),
+            como as lidas por load_experiment_config.
+        resume (bool): Continua a execução interrompida a partir do checkpoint, se houver.
+
+    Returns:
+        Um dicionário com o melhor indivíduo, o seu fitness, as gerações
+        processadas e o CSV completo da execução, ou None se a execução foi
+        interrompida por um erro fatal.
+
+    Raises:
+        ValueError: Se 'config' tiver configurações desconhecidas.
+    """
+    global optimizer, current_population, generations_processed, all_individuals_data, experiment_start_time
+    global best_fitness_so_far, generations_without_improvement, convergence_monitor, steady_state_converged
+    global telemetry, spectrum_archive, plot_worker, results_writer, results_reader, running_statistics
+    global full_data_csv_path, workspace, job_manager, job_template, session_pool, job_broker
+
+    globals().update(apply_config(_DEFAULT_SETTINGS, config or {}))
+    _configure_paths(project_directory or os.getcwd())
+    os.makedirs(_temp_directory, exist_ok=True)
+    os.makedirs(_simulation_spectra_directory, exist_ok=True)
+    os.makedirs(_simulation_results_directory, exist_ok=True)
+
+    # Importados só aqui: o simulador, o pandas e os gráficos não pesam na importação do módulo
+    from utils.simulation_backend import create_backend
+    from utils.optimizers import create_optimizer
+    from utils.islands import create_island_model
+    from utils.experiment_end import record_experiment_results
+    from utils.lumerical_workflow import LumericalJobTemplate
+    from utils.steady_state import run_steady_state
+    from utils.file_handler import clean_simulation_directory
+    from utils.workspace import SimulationWorkspace
+    from utils.job_manager import JobManager
+    from utils.analysis import RunningStatistics
+    from utils.fitness_cache import FitnessCache, simulation_settings_key
+    from utils.spectrum_archive import SpectrumArchive
+    from utils.results_log import ResultsLogWriter, ResultsLogReader, RESULT_COLUMNS
+
+    print("--------------------------------------------------------------------------")
+    print(f"Iniciando o script principal (main.py) para otimização do guia de onda...")
+    print("--------------------------------------------------------------------------")
+
+    # Projetos deixados no diretório temporário por execuções interrompidas são removidos
+    workspace = SimulationWorkspace(
+        _temp_directory, workspace_disk_budget_gb, workspace_project_size_mb, keep_failed_projects
+    )
+    workspace.collect_garbage()
+    job_manager = JobManager(job_max_retries, job_retry_backoff_s, job_timeout_s, straggler_factor)
+
+    if simulation_backend == "synthetic" and not os.path.exists(_original_fsp_path):
+        # O backend sintético não precisa do projeto real: cria um projeto base vazio
+        with create_backend(simulation_backend, **backend_options[simulation_backend]) as base_session:
+            base_session.save(_temp_fsp_base_path)
+        print(f"Projeto base sintético criado em {_temp_fsp_base_path}")
+    else:
+        shutil.copy(_original_fsp_path, _temp_fsp_base_path)
+        print(f"Copiado {_original_fsp_path} para {_temp_fsp_base_path}")
+
+    if not os.path.exists(_temp_fsp_base_path):
+        raise FileNotFoundError(f"Erro: O arquivo base {_temp_fsp_base_path} não foi criado.")
+
+    resume_state = None
+    if resume:
+        resume_state = load_checkpoint(_checkpoint_path)
+        if resume_state is None:
+            print("[Checkpoint] Nenhum checkpoint encontrado; iniciando uma nova execução.")
+        elif resume_state['evolution_mode'] != evolution_mode:
+            raise ValueError(f"O checkpoint foi salvo no modo '{resume_state['evolution_mode']}', "
+                             f"mas evolution_mode = '{evolution_mode}'.")
+
+    if resume_state is not None:
+        optimizer = resume_state['optimizer']
+        optimizer.generations = num_generations
+        current_population = resume_state['current_population']
+        experiment_start_time = resume_state['experiment_start_time']
+        restore_rng_state(resume_state['rng_state'])
+        print(f"[Checkpoint] Retomando a execução de {experiment_start_time:%Y-%m-%d %H:%M:%S} "
+              f"após a geração {resume_state['generations_processed']} "
+              f"(melhor fitness: {optimizer.best_fitness:.4e}).")
+    else:
+        remove_checkpoint(_partial_checkpoint_path)
+        if evolution_mode == "islands":
+            if optimizer_algorithm != "genetic":
+                raise ValueError("O modelo de ilhas só está disponível com optimizer_algorithm = 'genetic'.")
+            optimizer = create_island_model(
+                num_islands, population_size, island_mutation_rates, num_generations,
+                s_range, w_range, l_range, height_range, migration_interval, migration_size
+            )
+        else:
+            optimizer = create_optimizer(
+                optimizer_algorithm, population_size, mutation_rate, num_generations,
+                s_range, w_range, l_range, height_range, **optimizer_options[optimizer_algorithm]
+            )
+        optimizer.initialize_population()
+        current_population = optimizer.population
+        experiment_start_time = datetime.datetime.now()
+
+    timestamp_str = experiment_start_time.strftime('%Y%m%d_%H%M%S')
+    full_data_csv_path = os.path.join(_simulation_results_directory, f"full_optimization_data_{timestamp_str}.csv")
+    realtime_heatmap_path = os.path.join(_simulation_results_directory, f"realtime_correlation_heatmap_{timestamp_str}.png")
+
+    generations_processed = 0
+    all_individuals_data = []
+    if resume_state is not None:
+        generations_processed = resume_state['generations_processed']
+        all_individuals_data = resume_state['all_individuals_data']
+        for row in all_individuals_data:
+            row.setdefault('backend', simulation_backend)
+        # O CSV pode ter linhas gravadas depois do checkpoint: é refeito com as linhas do checkpoint
+        if os.path.exists(full_data_csv_path):
+            os.remove(full_data_csv_path)
+    # A coluna 'backend' separa as avaliações do FDTD real das sintéticas, que vão para o mesmo diretório
+    result_columns = RESULT_COLUMNS + ('backend',)
+    if enable_multi_fidelity:
+        result_columns += ('fidelity',)
+    if evolution_mode == "islands":
+        result_columns += ('island',)
+    results_writer = ResultsLogWriter(full_data_csv_path, result_columns)
+    results_reader = ResultsLogReader(full_data_csv_path)
+    running_statistics = RunningStatistics()
+    results_writer.append_rows(all_individuals_data)
+    running_statistics.update(results_reader.read_new())
+    plot_worker = None
+    if use_background_plotting:
+        from utils.plot_worker import PlotWorker
+        plot_worker = PlotWorker(pairplot_interval_seconds)
+    spectrum_archive = None
+    if enable_spectrum_archive:
+        spectrum_archive = SpectrumArchive(
+            os.path.join(_simulation_results_directory, f"spectra_{timestamp_str}.h5")
+        )
+    partial_generation_log = PartialGenerationLog(_partial_checkpoint_path) if enable_checkpoints else None
+    telemetry = None
+    if enable_telemetry:
+        telemetry = RunTelemetry(os.path.join(_simulation_results_directory, f"telemetry_{timestamp_str}.jsonl"))
+
+    multi_fidelity_scheduler = None
+    if enable_multi_fidelity:
+        if evolution_mode == "steady_state":
+            raise ValueError("A avaliação multi-fidelidade não está disponível no modo 'steady_state'.")
+        from utils.fidelity import MultiFidelityScheduler, fidelity_cache_settings, selection_delta_amps
+        multi_fidelity_scheduler = MultiFidelityScheduler(
+            low_fidelity_parameters, promote_fraction=multi_fidelity_promote_fraction
+        )
+        # Os resultados parciais são indexados pela população: com duas levas por geração,
+        # a retomada de uma geração interrompida fica a cargo do cache de avaliações
+        partial_generation_log = None
+
+    job_template = None
+    if use_job_template:
+        job_template = LumericalJobTemplate(
+            _temp_fsp_base_path, _geometry_lsf_script_path, _simulation_lsf_script_path,
+            _update_lsf_script_path, _template_fsp_path
+        )
+
+    fitness_cache = None
+    screening_cache = None
+    if enable_fitness_cache:
+        # Tudo o que define a simulação entra na chave: os scripts LSF e o projeto base
+        simulation_files = (
+            _geometry_lsf_script_path, _structure_lsf_script_path, _simulation_lsf_script_path,
+            _update_lsf_script_path, _temp_fsp_base_path
+        )
+        fitness_cache = FitnessCache(
+            _fitness_cache_path,
+            simulation_settings_key(*simulation_files, backend=simulation_backend, monitor='in')
+        )
+        if multi_fidelity_scheduler is not None:
+            # As triagens ficam no mesmo arquivo, com a fidelidade na chave das configurações
+            screening_cache = FitnessCache(
+                _fitness_cache_path,
+                simulation_settings_key(
+                    *simulation_files, backend=simulation_backend, monitor='in',
+                    **fidelity_cache_settings(low_fidelity_parameters)
+                )
+            )
+        # Só as linhas do FDTD real são importadas; o backend sintético não reaproveita os CSVs
+        seeded_rows = 0
+        if simulation_backend == "lumerical":
+            seeded_rows = fitness_cache.seed_from_csv(_fitness_cache_seed_pattern)
+        print(f"[Cache] {len(fitness_cache)} avaliações disponíveis ({seeded_rows} importadas dos CSVs).")
+
+    surrogate_screener = None
+    if enable_surrogate_screening:
+        from utils.surrogate import GaussianProcessSurrogate, SurrogateScreener, load_training_data
+        surrogate = GaussianProcessSurrogate(optimizer.param_ranges)
+        # Assim como o cache, o modelo só é pré-treinado com os CSVs do FDTD real
+        if simulation_backend == "lumerical":
+            surrogate.fit(*load_training_data(_fitness_cache_seed_pattern))
+        # O modelo prevê o delta_amp completo: as triagens em baixa fidelidade ficam de fora
+        training_rows = [row for row in all_individuals_data if row.get('fidelity', 'high') == 'high']
+        if training_rows:
+            surrogate.update(training_rows, [row['delta_amp'] for row in training_rows])
+        surrogate_screener = SurrogateScreener(
+            surrogate, surrogate_oversample_factor, surrogate_exploration_fraction
+        )
+        print(f"[Substituto] Modelo inicial com {len(surrogate)} avaliações.")
+
+    # --- NOVAS VARIÁVEIS PARA A LÓGICA DE CONVERGÊNCIA ---
+    # Armazena o melhor fitness encontrado até agora
+    best_fitness_so_far = -float('inf')
+    # Conta as gerações consecutivas sem melhoria
+    generations_without_improvement = 0
+    if resume_state is not None:
+        best_fitness_so_far = resume_state['best_fitness_so_far']
+        generations_without_improvement = resume_state['generations_without_improvement']
+    # Os critérios adicionais guardam o histórico: são retomados do checkpoint, se houver
+    convergence_monitor = resume_state.get('convergence_monitor') if resume_state is not None else None
+    if convergence_monitor is None:
+        convergence_monitor = create_convergence_monitor()
+    already_converged = resume_state is not None and resume_state['converged']
+
+    job_broker = None
+    local_workers = []
+    experiment_summary = None
+    try:
+        if broker_directory is not None:
+            from utils.job_broker import JobBroker, start_local_workers
+            job_broker = JobBroker(broker_directory, broker_lease_timeout_s,
+                                   job_timeout_s=job_timeout_s, straggler_factor=straggler_factor)
+            if broker_local_workers > 0:
+                local_workers = start_local_workers(
+                    broker_directory, broker_local_workers, simulation_backend, backend_options[simulation_backend]
+                )
+            print(f"[Broker] Jobs publicados em {broker_directory} ({broker_local_workers} workers locais).")
+
+        session_pool = None
+        template_scripts = None
+        if use_job_template:
+            template_scripts = (_temp_fsp_base_path, _geometry_lsf_script_path,
+                                _simulation_lsf_script_path, _update_lsf_script_path)
+        if session_pool_workers > 0 and job_broker is None:
+            from utils.session_pool import SessionPool
+            session_pool = SessionPool(
+                session_pool_workers, simulation_backend, backend_options[simulation_backend], template_scripts
+            )
+
+        if evolution_mode == "steady_state":
+            if session_pool is None and job_broker is None:
+                from utils.session_pool import SessionPool
+                session_pool = SessionPool(
+                    1, simulation_backend, backend_options[simulation_backend], template_scripts
+                )
+
+            def on_steady_state_result(chromosome, delta_amp, h5_path):
+                global generations_processed, steady_state_converged
                 individual_data = chromosome.copy()
-                individual_data['delta_amp'] = delta_amp_results_for_gen[i]
-                individual_data['generation'] = gen_num + 1
+                individual_data['delta_amp'] = delta_amp
+                individual_data['generation'] = (optimizer.evaluations - 1) // population_size + 1
+                individual_data['backend'] = simulation_backend
                 all_individuals_data.append(individual_data)
+                # A cada 'population_size' avaliações, o relatório é atualizado como em uma geração
+                if optimizer.evaluations % population_size == 0:
+                    generations_processed += 1
+                    if report_generation(generations_processed):
+                        steady_state_converged = True
+                    if telemetry is not None:
+                        telemetry.end_generation(population_size)
+                        telemetry.start_generation(generations_processed + 1)
+
+            steady_state_converged = already_converged
+            if telemetry is not None:
+                telemetry.start_generation(generations_processed + 1)
+            # O broker tem a mesma interface de avaliação do pool; os projetos ficam nos workers
+            run_steady_state(
+                optimizer, job_broker or session_pool, num_generations * population_size - optimizer.evaluations,
+                _temp_fsp_base_path,
+                _geometry_lsf_script_path, _simulation_lsf_script_path,
+                _simulation_spectra_directory, _temp_directory,
+                fitness_cache=fitness_cache, on_result=on_steady_state_result,
+                should_stop=lambda: steady_state_converged, spectrum_archive=spectrum_archive,
+                telemetry=telemetry, workspace=workspace if job_broker is None else None
+            )
+
+        else:
+            # Com o broker, esta máquina não precisa de uma sessão de simulação
+            session = contextlib.nullcontext() if job_broker is not None else \
+                create_backend(simulation_backend, **backend_options[simulation_backend])
+            with session as fdtd:
+                first_generation = num_generations if already_converged else generations_processed
+                for gen_num in range(first_generation, num_generations):
+                    generations_processed += 1
+                    print(f"\n--- Processando Geração {gen_num + 1}/{num_generations} ---")
+                    if telemetry is not None:
+                        telemetry.start_generation(gen_num + 1)
+                    job_manager.start_generation()
+                    if evolution_mode == "islands":
+                        island_indices = optimizer.island_indices
+                
+                    with timed(telemetry, 'cleanup'):
+                        clean_simulation_directory(_simulation_spectra_directory, file_extension=".h5")
+                        # Os projetos já são removidos após a extração: sobram só arquivos não registrados
+                        workspace.collect_garbage()
+                
+                    if multi_fidelity_scheduler is not None:
+                        def evaluate_at_fidelity(population, fidelity_name, fidelity):
+                            print(f"  [Multi-fidelidade] Avaliando {len(population)} cromossomos "
+                                  f"em fidelidade '{fidelity_name}'...")
+                            cache = screening_cache if fidelity_name == 'low' else fitness_cache
+                            # Só os jobs que chegam ao solver contam no custo (não os acertos do cache)
+                            solver_jobs_before = job_manager.solver_jobs
+                            delta_amps = evaluate_population(fdtd, population, gen_num + 1, cache, fidelity=fidelity)
+                            return delta_amps, job_manager.solver_jobs - solver_jobs_before
+
+                        delta_amp_results_for_gen, fidelities_for_gen = multi_fidelity_scheduler.evaluate_generation(
+                            current_population, evaluate_at_fidelity
+                        )
+                        print(f"  [Multi-fidelidade] {fidelities_for_gen.count('high')} de "
+                              f"{len(current_population)} cromossomos promovidos para alta fidelidade.")
+                    else:
+                        delta_amp_results_for_gen = evaluate_population(
+                            fdtd, current_population, gen_num + 1, fitness_cache, partial_generation_log
+                        )
+                        fidelities_for_gen = None
+
+                    for i, chromosome in enumerate(current_population):
+                        individual_data = chromosome.copy()
+                        individual_data['delta_amp'] = delta_amp_results_for_gen[i]
+                        individual_data['generation'] = gen_num + 1
+                        individual_data['backend'] = simulation_backend
+                        if fidelities_for_gen is not None:
+                            individual_data['fidelity'] = fidelities_for_gen[i]
+                        if evolution_mode == "islands":
+                            individual_data['island'] = island_indices[i]
+                        all_individuals_data.append(individual_data)
 
-            # --- MODIFICADO: Salva a população ANTES da evolução para comparar depois ---
-            population_before_evolution = [chrom.copy() for chrom in current_population]
+                    # --- MODIFICADO: Salva a população ANTES da evolução para comparar depois ---
+                    population_before_evolution = [chrom.copy() for chrom in current_population]
 
-            try:
-                current_population = optimizer.evolve(delta_amp_results_for_gen)
-            except ValueError as e:
-                print(f"!!! Erro na evolução da população: {e}")
-                break
+                    if surrogate_screener is not None:
+                        with timed(telemetry, 'surrogate'):
+                            if fidelities_for_gen is None:
+                                surrogate_screener.surrogate.update(current_population, delta_amp_results_for_gen)
+                            else:
+                                promoted = [i for i, fidelity in enumerate(fidelities_for_gen) if fidelity == 'high']
+                                surrogate_screener.surrogate.update(
+                                    [current_population[i] for i in promoted],
+                                    [delta_amp_results_for_gen[i] for i in promoted]
+                                )
 
-            print(f"  [Relatório] Atualizando relatório para a Geração {gen_num + 1}...")
+                    # Os valores de triagem ficam abaixo dos de alta fidelidade: não viram elite nem melhor fitness
+                    selection_values = delta_amp_results_for_gen
+                    if fidelities_for_gen is not None:
+                        selection_values = selection_delta_amps(
+                            delta_amp_results_for_gen, fidelities_for_gen, optimizer.best_fitness
+                        )
+
+                    try:
+                        with timed(telemetry, 'evolve'):
+                            current_population = optimizer.evolve(
+                                selection_values, offspring_selector=surrogate_screener
+                            )
+                    except ValueError as e:
+                        print(f"!!! Erro na evolução da população: {e}")
+                        break
+
+                    print(f"[Job Manager] Geração {gen_num + 1}: {job_manager.generation_report()}")
+                    if telemetry is not None:
+                        telemetry.add_counts(job_manager.generation_counts)
+                    stop = report_generation(gen_num + 1)
+                    if partial_generation_log is not None:
+                        partial_generation_log.clear()
+                    if telemetry is not None:
+                        telemetry.end_generation(len(population_before_evolution))
+                    if stop:
+                        break # Encerra o loop principal de gerações
+
+        if session_pool is not None:
+            session_pool.close()
+        if job_broker is not None:
+            print(f"[Broker] Resultados por worker: {job_broker.results_by_worker}; "
+                  f"{job_broker.requeued_jobs} jobs devolvidos à fila por perda de worker.")
+
+        experiment_summary = {
+            'best_individual': optimizer.best_individual,
+            'best_fitness': optimizer.best_fitness,
+            'generations_processed': generations_processed,
+            'full_data_csv_path': full_data_csv_path,
+        }
+        print("\n--- Otimização Concluída ---")
+        if optimizer.best_individual:
+            print(f"Melhor cromossomo encontrado: {optimizer.best_individual}")
+            print(f"Melhor Delta Amplitude atingido: {optimizer.best_fitness:.4e}")
+        else:
+            print("Nenhum melhor indivíduo encontrado durante a otimização.")
+
+        if telemetry is not None and telemetry.records:
+            # O JSON do relatório da última geração foi gravado antes de ela ser fechada na telemetria
             record_experiment_results(
                 _simulation_results_directory, optimizer, experiment_start_time,
-                s_range, w_range, l_range, height_range, generations_processed
+                s_range, w_range, l_range, height_range, generations_processed,
+                plot_worker=plot_worker, telemetry=telemetry, backend=simulation_backend
             )
-            
-            if all_individuals_data:
-                df_all_data = pd.DataFrame(all_individuals_data)
-                df_all_data.to_csv(full_data_csv_path, index=False)
-                print(f"  [Análise] Dados de {len(all_individuals_data)} indivíduos atualizados em CSV.")
-                run_full_analysis(full_data_csv_path)
-                print(f"  [Análise] Heatmap de correlação atualizado e salvo.")
+            telemetry_summary = telemetry.summary()
+            slowest_phases = list(telemetry_summary['phases'].items())[:4]
+            print(f"[Telemetria] {telemetry_summary['individuals_per_hour']:.0f} indivíduos/hora; fases mais demoradas: "
+                  + ", ".join(f"{name} {phase['fraction']:.0%}" for name, phase in slowest_phases))
 
-            # --- LÓGICA DE CONVERGÊNCIA POR ESTAGNAÇÃO DO FITNESS (TOTALMENTE MODIFICADA) ---
-            if enable_convergence_check:
-                # Pega o melhor fitness encontrado até agora em *toda* a otimização
-                current_best_fitness = optimizer.best_fitness
-
-                # Compara com o melhor fitness que tínhamos registrado
-                if current_best_fitness > best_fitness_so_far:
-                    print(f"  [Convergência] ✅ Novo melhor fitness encontrado: {current_best_fitness:.4e}. Reiniciando contador.")
-                    best_fitness_so_far = current_best_fitness
-                    generations_without_improvement = 0 # Zera o contador pois houve melhoria
-                else:
-                    generations_without_improvement += 1 # Incrementa o contador
-                    print(f"  [Convergência] ⏳ Nenhuma melhoria no fitness. Gerações sem melhoria: {generations_without_improvement}/{CONVERGENCE_PATIENCE}")
-
-                # Verifica se atingimos o limite de paciência
-                if generations_without_improvement >= CONVERGENCE_PATIENCE:
-                    print(f"\n  [Convergência] 🛑 O melhor fitness não melhorou por {CONVERGENCE_PATIENCE} gerações consecutivas.")
-                    print("  [Convergência] Otimização considerada convergente. Encerrando.")
-                    break # Encerra o loop principal de gerações
-            # --- FIM DA LÓGICA DE CONVERGÊNCIA MODIFICADA ---
-
-    print("\n--- Otimização Concluída ---")
-    if optimizer.best_individual:
-        print(f"Melhor cromossomo encontrado: {optimizer.best_individual}")
-        print(f"Melhor Delta Amplitude atingido: {optimizer.best_fitness:.4e}")
-    else:
-        print("Nenhum melhor indivíduo encontrado durante a otimização.")
+        # --- Limpeza final ---
+        clean_simulation_directory(_simulation_spectra_directory, file_extension=".h5")
+        workspace.collect_garbage()
+        workspace_summary = workspace.summary()
+        print(f"[Workspace] {workspace_summary['projects_released']} projetos removidos após a extração "
+              f"({workspace_summary['bytes_released'] / 1e6:.1f} MB); pico estimado de "
+              f"{workspace_summary['peak_bytes'] / 1e6:.1f} MB no diretório temporário.")
+        if workspace_summary['failed_projects_kept']:
+            print(f"[Workspace] {workspace_summary['failed_projects_kept']} projetos de jobs com falha "
+                  f"mantidos em {workspace.failed_directory}")
+        if os.path.exists(_temp_fsp_base_path):
+            os.remove(_temp_fsp_base_path)
+            print(f"\n[Limpeza Final] Arquivo base removido: {_temp_fsp_base_path}")
+        if os.path.exists(_template_fsp_path):
+            os.remove(_template_fsp_path)
+        if surrogate_screener is not None:
+            print(f"[Substituto] {surrogate_screener.candidates_rejected} de "
+                  f"{surrogate_screener.candidates_screened} candidatos descartados sem simulação.")
+        if multi_fidelity_scheduler is not None:
+            print(f"[Multi-fidelidade] {multi_fidelity_scheduler.evaluations['low']} triagens e "
+                  f"{multi_fidelity_scheduler.evaluations['high']} avaliações completas: custo estimado de "
+                  f"{multi_fidelity_scheduler.estimated_cost:.1f} simulações completas "
+                  f"({multi_fidelity_scheduler.savings():.0%} de economia).")
+        results_writer.close()
+        if spectrum_archive is not None:
+            spectrum_archive.flush()
+            print(f"[Espectros] {len(spectrum_archive)} espectros guardados em {spectrum_archive.path}")
+        # Execução concluída: o checkpoint não é mais necessário
+        remove_checkpoint(_checkpoint_path)
+        remove_checkpoint(_partial_checkpoint_path)
+        if plot_worker is not None:
+            print("[Análise] Aguardando os gráficos finais...")
+            plot_worker.close()
+        if fitness_cache is not None:
+            print(f"[Cache] Acertos: {fitness_cache.hits}, falhas: {fitness_cache.misses}.")
+            fitness_cache.close()
+        if screening_cache is not None:
+            screening_cache.close()
+
+    except Exception as e:
+        print(f"!!! Erro fatal no script principal de otimização: {e}")
+    finally:
+        if job_broker is not None:
+            job_broker.close()
+        if local_workers:
+            from utils.job_broker import stop_local_workers
+            stop_local_workers(local_workers)
+
+    print("\nScript principal (main.py) finalizado.")
+    return experiment_summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Otimização do guia de onda metamaterial (FDTD + otimizador).")
+    parser.add_argument('--config', default=None,
+                        help="Arquivo TOML ou JSON com as configurações do experimento (padrão: as deste módulo).")
+    parser.add_argument('--resume', action='store_true',
+                        help="Continua a execução interrompida a partir do último checkpoint.")
+    args = parser.parse_args(argv)
 
-    # --- Limpeza final ---
-    clean_simulation_directory(_simulation_spectra_directory, file_extension=".h5")
-    clean_simulation_directory(_temp_directory, file_extension=".fsp")
-    clean_simulation_directory(_temp_directory, file_extension=".log")
-    if os.path.exists(_temp_fsp_base_path):
-        os.remove(_temp_fsp_base_path)
-        print(f"\n[Limpeza Final] Arquivo base removido: {_temp_fsp_base_path}")
+    config = load_experiment_config(args.config) if args.config else None
+    return 0 if run_experiment(config, resume=args.resume) is not None else 1
 
-except Exception as e:
-    print(f"!!! Erro fatal no script principal de otimização: {e}")
 
-print("\nScript principal (main.py) finalizado.")
\ No newline at end of file
+# O guarda é necessário para o pool de sessões: os processos "spawn" reimportam este módulo
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -1,45 +1,48 @@
 import os
-import json
+import sqlite3
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
+import pandas as pd
 
-def analyze_best_fitness_from_json(results_directory):
+from utils.experiment_catalog import ExperimentCatalog
+
+def analyze_best_fitness_from_json(results_directory, force_plot=False, backend='lumerical'):
     """
-    Lê todos os arquivos .json em um diretório, extrai o valor de 'best_fitness',
-    calcula estatísticas e gera um boxplot da distribuição desses valores.
+    Atualiza o catálogo de experimentos do diretório, extrai o valor de
+    'best_fitness' de cada experimento, calcula estatísticas e gera um boxplot
+    da distribuição desses valores.
+
+    Só os arquivos novos ou modificados desde a última análise são lidos (ver
+    ExperimentCatalog). Se nada mudou e o boxplot já existe, ele não é refeito.
 
     Args:
         results_directory (str): O caminho para a pasta que contém os arquivos .json.
+        force_plot (bool): Refaz o boxplot mesmo sem experimentos novos.
+        backend (str): Só os experimentos deste backend entram na análise; por
+            padrão, os do FDTD real (None para todos).
     """
     
-    fitness_values = []
-    
     print(f"Analisando arquivos .json no diretório: '{results_directory}'\n")
     
     if not os.path.isdir(results_directory):
         print(f"Erro: O diretório '{results_directory}' não foi encontrado.")
         return
 
-    for filename in os.listdir(results_directory):
-        if filename.endswith(".json"):
-            file_path = os.path.join(results_directory, filename)
-            
-            try:
-                with open(file_path, 'r') as f:
-                    data = json.load(f)
-                    
-                    if 'best_fitness_so_far' in data and data['best_fitness_so_far'] is not None:
-                        fitness = data['best_fitness_so_far']
-                        fitness_values.append(fitness)
-                        print(f"  - Arquivo '{filename}': best_fitness = {fitness:.4e}")
-                    else:
-                        print(f"  - AVISO: A chave 'best_fitness' não foi encontrada ou é nula no arquivo '{filename}'.")
-                        
-            except json.JSONDecodeError:
-                print(f"  - ERRO: O arquivo '{filename}' não é um JSON válido.")
-            except Exception as e:
-                print(f"  - ERRO: Ocorreu um erro ao processar o arquivo '{filename}': {e}")
+    catalog_path = os.path.join(results_directory, "experiment_catalog.sqlite")
+    with ExperimentCatalog(catalog_path) as catalog:
+        try:
+            ingested = catalog.ingest(results_directory)
+        except sqlite3.Error as e:
+            print(f"  - ERRO: Ocorreu um erro ao atualizar o catálogo de experimentos: {e}")
+            return
+        experiments = catalog.experiments(backend=backend)
+
+    for _, experiment in experiments.iterrows():
+        filename = f"experiment_results_{experiment['experiment_id']}.json"
+        if pd.notna(experiment['best_fitness']):
+            print(f"  - Arquivo '{filename}': best_fitness = {experiment['best_fitness']:.4e}")
+        else:
+            print(f"  - AVISO: A chave 'best_fitness' não foi encontrada ou é nula no arquivo '{filename}'.")
+    fitness_values = experiments['best_fitness'].dropna().tolist()
 
     # --- CÁLCULO E RESULTADOS ESTATÍSTICOS ---
     
@@ -63,10 +66,17 @@ def analyze_best_fitness_from_json(results_directory):
 
     # --- GERAÇÃO E SALVAMENTO DO BOXPLOT ---
     
-    print("Gerando boxplot da distribuição de fitness...")
-    
     # Define o caminho de saída para a imagem no mesmo diretório
     boxplot_output_path = os.path.join(results_directory, "fitness_distribution_boxplot.png")
+    if not force_plot and ingested['files'] == 0 and os.path.exists(boxplot_output_path):
+        print(f"-> Nenhum experimento novo; boxplot mantido em: {boxplot_output_path}")
+        return
+
+    print("Gerando boxplot da distribuição de fitness...")
+
+    # Importados só aqui: carregar o matplotlib custa mais que a análise inteira
+    import matplotlib.pyplot as plt
+    import seaborn as sns
     
     # Cria a figura do gráfico com um bom tamanho
     plt.figure(figsize=(8, 10))
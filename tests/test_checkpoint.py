@@ -0,0 +1,109 @@
+# test_checkpoint.py
+
+import io
+import os
+import sys
+import contextlib
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from utils.checkpoint import save_checkpoint, load_checkpoint, remove_checkpoint, PartialGenerationLog
+
+POPULATION = [{'s': 1e-7 + i * 1e-9, 'w': 5e-7, 'l': 2e-7, 'height': 2.5e-7} for i in range(4)]
+
+SYNTHETIC_CONFIG = {
+    'simulation_backend': 'synthetic',
+    'population_size': 4,
+    'num_generations': 3,
+    'use_background_plotting': False,
+    'enable_fitness_cache': False,
+    'job_retry_backoff_s': 0.0,
+    'backend_options': {'synthetic': {'job_latency': [0.0, 0.01], 'failure_rate': 0.0}},
+}
+
+
+class CheckpointTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.checkpoint_path = os.path.join(self.directory.name, "checkpoint.pkl")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_save_and_load(self):
+        save_checkpoint(self.checkpoint_path, {'generation': 3, 'population': POPULATION})
+        self.assertEqual(load_checkpoint(self.checkpoint_path), {'generation': 3, 'population': POPULATION})
+        self.assertFalse(os.path.exists(f"{self.checkpoint_path}.tmp"))
+
+    def test_interrupted_save_keeps_previous_checkpoint(self):
+        save_checkpoint(self.checkpoint_path, {'generation': 1})
+        # Uma gravação interrompida só deixa o arquivo temporário
+        with open(f"{self.checkpoint_path}.tmp", 'wb') as f:
+            f.write(b'\x80\x05incompleto')
+        self.assertEqual(load_checkpoint(self.checkpoint_path), {'generation': 1})
+        remove_checkpoint(self.checkpoint_path)
+        self.assertFalse(os.path.exists(self.checkpoint_path))
+        self.assertFalse(os.path.exists(f"{self.checkpoint_path}.tmp"))
+
+    def test_unreadable_checkpoint_loads_as_none(self):
+        self.assertIsNone(load_checkpoint(self.checkpoint_path))
+        with open(self.checkpoint_path, 'wb') as f:
+            f.write(b'corrompido')
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertIsNone(load_checkpoint(self.checkpoint_path))
+
+    def test_partial_log_resumes_the_same_generation(self):
+        log = PartialGenerationLog(self.checkpoint_path)
+        self.assertEqual(log.start(2, POPULATION), {})
+        log.record(0, 10.0)
+        log.record(3, float('-inf'))
+
+        resumed = PartialGenerationLog(self.checkpoint_path)
+        self.assertEqual(resumed.start(2, POPULATION), {0: 10.0, 3: float('-inf')})
+        # Outra geração ou outra população: os resultados salvos não valem
+        self.assertEqual(PartialGenerationLog(self.checkpoint_path).start(3, POPULATION), {})
+        self.assertEqual(PartialGenerationLog(self.checkpoint_path).start(2, POPULATION[::-1]), {})
+
+        resumed.clear()
+        self.assertEqual(PartialGenerationLog(self.checkpoint_path).start(2, POPULATION), {})
+
+    def test_run_resumes_inside_an_interrupted_generation(self):
+        project_directory = os.path.join(self.directory.name, "experimento")
+        config = dict(SYNTHETIC_CONFIG, project_directory=project_directory)
+        results_directory = os.path.join(project_directory, "simulation_results")
+        record = PartialGenerationLog.record
+        calls = []
+
+        def interrupted_record(log, index, delta_amp):
+            # Os 4 resultados da geração 1 e um da geração 2 são registrados; o seguinte interrompe
+            if len(calls) == 5:
+                raise RuntimeError("interrompido")
+            calls.append(index)
+            record(log, index, delta_amp)
+
+        with mock.patch.object(PartialGenerationLog, 'record', interrupted_record), \
+                contextlib.redirect_stdout(io.StringIO()):
+            self.assertIsNone(main.run_experiment(config))
+        checkpoint = load_checkpoint(os.path.join(results_directory, "checkpoint.pkl"))
+        self.assertEqual(checkpoint['generations_processed'], 1)
+        self.assertEqual(len(checkpoint['all_individuals_data']), 4)
+
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            summary = main.run_experiment(config, resume=True)
+        self.assertIn("1 resultados da geração interrompida reaproveitados", output.getvalue())
+        self.assertEqual(summary['generations_processed'], 3)
+        df = pd.read_csv(summary['full_data_csv_path'])
+        self.assertEqual(list(df['generation']), [1] * 4 + [2] * 4 + [3] * 4)
+        self.assertFalse(os.path.exists(os.path.join(results_directory, "checkpoint.pkl")))
+        self.assertFalse(os.path.exists(os.path.join(results_directory, "checkpoint_generation.pkl")))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+# test_convergence.py
+
+import os
+import sys
+import json
+import pickle
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.convergence import (
+    StagnationCriterion, RelativeImprovementCriterion, DiversityCriterion, PlateauTestCriterion,
+    ConvergenceMonitor, population_diversity, mann_kendall_p_value, replay_convergence, default_replay_criteria
+)
+
+PARAM_RANGES = {'s': (0.1e-6, 0.25e-6), 'w': (0.3e-6, 0.7e-6), 'l': (0.1e-6, 0.25e-6), 'height': (0.15e-6, 0.3e-6)}
+
+
+def random_population(rng, n=10):
+    return [{name: rng.uniform(*bounds) for name, bounds in PARAM_RANGES.items()} for _ in range(n)]
+
+
+def collapsed_population(n=10):
+    return [{name: bounds[0] for name, bounds in PARAM_RANGES.items()} for _ in range(n)]
+
+
+def stop_generation(criterion, history, populations=None):
+    """A geração em que o critério pede a parada (None se não pede)."""
+    for generation, best_fitness in enumerate(history, start=1):
+        population = populations[generation - 1] if populations else None
+        if criterion.update(best_fitness, population):
+            return generation
+    return None
+
+
+class ConvergenceCriteriaTest(unittest.TestCase):
+
+    def test_stagnation(self):
+        self.assertEqual(stop_generation(StagnationCriterion(3), [1, 2, 3, 3, 3, 3, 3]), 6)
+        self.assertIsNone(stop_generation(StagnationCriterion(3), [1, 2, 3, 3, 3, 4, 4, 4]))
+
+    def test_relative_improvement(self):
+        criterion = RelativeImprovementCriterion(window=3, min_relative_improvement=1e-2)
+        self.assertEqual(stop_generation(criterion, [1.0, 2.0, 2.001, 2.002, 2.003]), 5)
+        self.assertIn("0.15%", criterion.reason)
+        # Crescimento de 10% por geração nunca para
+        self.assertIsNone(stop_generation(RelativeImprovementCriterion(3, 1e-2), [1.1 ** g for g in range(20)]))
+        # Gerações sem nenhuma avaliação válida (-inf) não contam como estagnação
+        self.assertIsNone(stop_generation(RelativeImprovementCriterion(3, 1e-2), [-np.inf] * 6))
+
+    def test_diversity(self):
+        rng = np.random.default_rng(0)
+        populations = [random_population(rng), collapsed_population(), random_population(rng),
+                       collapsed_population(), collapsed_population()]
+        criterion = DiversityCriterion(PARAM_RANGES, min_diversity=0.02, patience=2)
+        self.assertEqual(stop_generation(criterion, [1, 2, 3, 4, 5], populations), 5)
+        self.assertIsNone(stop_generation(DiversityCriterion(PARAM_RANGES), [1, 2, 3]))
+
+    def test_population_diversity(self):
+        rng = np.random.default_rng(1)
+        self.assertEqual(population_diversity(collapsed_population(), PARAM_RANGES), 0.0)
+        self.assertAlmostEqual(population_diversity(random_population(rng, 2000), PARAM_RANGES), 12 ** -0.5, places=2)
+
+    def test_plateau_test(self):
+        self.assertEqual(stop_generation(PlateauTestCriterion(5, 0.05), [1, 2, 3, 4, 5, 5, 5, 5, 5]), 8)
+        self.assertIsNone(stop_generation(PlateauTestCriterion(5, 0.05), list(range(20))))
+
+    def test_mann_kendall(self):
+        self.assertAlmostEqual(mann_kendall_p_value([1, 2, 3, 4, 5]), 0.01374, places=5)
+        self.assertEqual(mann_kendall_p_value([3, 3, 3, 3]), 1.0)
+        self.assertEqual(mann_kendall_p_value([5, 4, 3, 2]), 1.0)
+        self.assertEqual(mann_kendall_p_value([1, 2]), 1.0)
+
+    def test_monitor_waits_for_min_generations_and_reports_the_criterion(self):
+        monitor = ConvergenceMonitor([StagnationCriterion(1), PlateauTestCriterion(3)], min_generations=4)
+        self.assertEqual(stop_generation(monitor, [1, 1, 1, 1, 1]), 4)
+        self.assertTrue(monitor.reason.startswith("[stagnation]"))
+        # Todos os critérios recebem todas as gerações
+        self.assertEqual([len(criterion.history) for criterion in monitor.criteria], [4, 4])
+
+    def test_monitor_survives_a_checkpoint(self):
+        monitor = ConvergenceMonitor([RelativeImprovementCriterion(3, 1e-2)])
+        self.assertIsNone(stop_generation(monitor, [1.0, 2.0, 2.001, 2.002]))
+        restored = pickle.loads(pickle.dumps(monitor))
+        self.assertTrue(restored.update(2.003))
+
+    def test_replay_over_recorded_runs(self):
+        with tempfile.TemporaryDirectory() as directory:
+            history = [1, 2, 3] + [3] * 25
+            with open(os.path.join(directory, "experiment_results_20250101_000000.json"), 'w') as f:
+                json.dump({'fitness_history': history, 'population_size': 10, 'parameter_ranges': PARAM_RANGES}, f)
+            report = replay_convergence(directory, default_replay_criteria(patience=20))
+        stagnation = next(entry for entry in report if entry['criterion'] == 'stagnation(20)')
+        self.assertEqual(stagnation['stop_generation'], 23)
+        self.assertEqual(stagnation['solves_saved'], 5 * 10)
+        self.assertEqual(stagnation['fitness_lost'], 0.0)
+        self.assertEqual(len(report), 4)
+        self.assertFalse(any(entry['has_populations'] for entry in report))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+# test_fitness_cache.py
+
+import os
+import sys
+import time
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.fitness_cache import FitnessCache, simulation_settings_key
+
+CHROMOSOME = {'s': 0.15e-6, 'w': 0.5e-6, 'l': 0.2e-6, 'height': 0.25e-6}
+
+
+def shifted(chromosome, delta):
+    return {name: value + delta for name, value in chromosome.items()}
+
+
+class FitnessCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directory.name, "cache.sqlite")
+        self.cache = FitnessCache(self.db_path, "chave", quantum=1e-10)
+
+    def tearDown(self):
+        self.cache.close()
+        self.directory.cleanup()
+
+    def write_csv(self, name, lines):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        return path
+
+    def test_hit_within_quantum_and_miss_outside(self):
+        self.cache.put(CHROMOSOME, 12.5)
+        # Diferenças abaixo da metade do quantum caem na mesma chave
+        self.assertEqual(self.cache.get(shifted(CHROMOSOME, 0.3e-10)), 12.5)
+        self.assertIsNone(self.cache.get(shifted(CHROMOSOME, 2e-10)))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_settings_key_separates_entries(self):
+        self.cache.put(CHROMOSOME, 12.5)
+        other = FitnessCache(self.db_path, "outra chave")
+        try:
+            self.assertIsNone(other.get(CHROMOSOME))
+        finally:
+            other.close()
+
+    def test_failures_are_not_stored(self):
+        stored = self.cache.put_many([CHROMOSOME, shifted(CHROMOSOME, 1e-9)], [float('-inf'), float('nan')])
+        self.assertEqual(stored, 0)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.cache.max_entries = 2
+        first, second, third = (shifted(CHROMOSOME, i * 1e-9) for i in range(3))
+        self.cache.put(first, 1.0)
+        time.sleep(0.01)
+        self.cache.put(second, 2.0)
+        time.sleep(0.01)
+        self.cache.get(first)
+        time.sleep(0.01)
+        self.cache.put(third, 3.0)
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache.get(first), 1.0)
+        self.assertIsNone(self.cache.get(second))
+        self.assertEqual(self.cache.get(third), 3.0)
+
+    def test_seed_from_csv_skips_screening_and_other_backends(self):
+        header = "s,w,l,height,delta_amp,generation,fidelity,backend"
+        path = self.write_csv("full_optimization_data_1.csv", [
+            header,
+            "1.5e-07,5e-07,2e-07,2.5e-07,10.0,1,high,lumerical",
+            "1.6e-07,5e-07,2e-07,2.5e-07,11.0,1,low,lumerical",
+            "1.7e-07,5e-07,2e-07,2.5e-07,12.0,1,high,synthetic",
+            "1.8e-07,5e-07,2e-07,2.5e-07,-inf,1,high,lumerical",
+        ])
+        self.assertEqual(self.cache.seed_from_csv([path]), 1)
+        self.assertEqual(self.cache.get(CHROMOSOME), 10.0)
+        for s in (1.6e-07, 1.7e-07, 1.8e-07):
+            self.assertIsNone(self.cache.get(dict(CHROMOSOME, s=s)))
+        # O arquivo não mudou: não é lido de novo
+        self.assertEqual(self.cache.seed_from_csv([path]), 0)
+
+    def test_seed_from_legacy_csv_without_backend(self):
+        path = self.write_csv("full_optimization_data_2.csv", [
+            "s,w,l,height,delta_amp,generation",
+            "1.5e-07,5e-07,2e-07,2.5e-07,10.0,1",
+        ])
+        self.assertEqual(self.cache.seed_from_csv([path]), 1)
+        synthetic = FitnessCache(os.path.join(self.directory.name, "synthetic.sqlite"), "sintético")
+        try:
+            self.assertEqual(synthetic.seed_from_csv([path], backend='synthetic'), 0)
+        finally:
+            synthetic.close()
+
+    def test_seeding_keeps_existing_evaluations(self):
+        self.cache.put(CHROMOSOME, 20.0)
+        path = self.write_csv("full_optimization_data_3.csv", [
+            "s,w,l,height,delta_amp", "1.5e-07,5e-07,2e-07,2.5e-07,10.0",
+        ])
+        self.cache.seed_from_csv([path])
+        self.assertEqual(self.cache.get(CHROMOSOME), 20.0)
+
+    def test_settings_key_follows_file_contents(self):
+        script_path = self.write_csv("script.lsf", ["addfdtd;"])
+        key = simulation_settings_key(script_path, backend='lumerical')
+        self.assertEqual(key, simulation_settings_key(script_path, backend='lumerical'))
+        self.assertNotEqual(key, simulation_settings_key(script_path, backend='synthetic'))
+        self.write_csv("script.lsf", ["addfdtd; set(\"x\", 0);"])
+        self.assertNotEqual(key, simulation_settings_key(script_path, backend='lumerical'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+# test_job_manager.py
+
+import io
+import os
+import sys
+import contextlib
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.job_manager import JobManager, job_id, new_job_counters
+
+A = {'s': 1e-7, 'w': 5e-7, 'l': 2e-7, 'height': 2.5e-7}
+B = dict(A, s=1.1e-7)
+C = dict(A, s=1.2e-7)
+
+
+class ScriptedAttempts:
+    """run_attempt de teste: falha os cromossomos listados em 'failures[tentativa]'."""
+
+    def __init__(self, failures=None, error_on=None):
+        self.failures = failures or {}
+        self.error_on = error_on
+        self.calls = []
+
+    def __call__(self, chromosomes, attempt):
+        self.calls.append([dict(chromosome) for chromosome in chromosomes])
+        for k, chromosome in enumerate(chromosomes):
+            if attempt == self.error_on:
+                raise RuntimeError("sessão perdida")
+            if chromosome in self.failures.get(attempt, []):
+                yield k, None, -float('inf')
+            else:
+                yield k, f"{job_id(chromosome)}.h5", chromosome['s'] * 1e8
+
+
+def run(manager, population, run_attempt, backend=None):
+    with mock.patch('utils.job_manager.time.sleep') as sleep, contextlib.redirect_stdout(io.StringIO()):
+        results = sorted(manager.run(population, run_attempt, backend=backend))
+    return results, [call.args[0] for call in sleep.call_args_list]
+
+
+class JobManagerTest(unittest.TestCase):
+
+    def test_job_id_depends_on_content_and_fidelity(self):
+        self.assertEqual(job_id(A), job_id(dict(A)))
+        self.assertNotEqual(job_id(A), job_id(dict(A, s=A['s'] + 1e-20)))
+        self.assertNotEqual(job_id(A, 'low'), job_id(A, 'high'))
+
+    def test_duplicates_are_simulated_once(self):
+        manager = JobManager(retry_backoff_s=0.0)
+        attempts = ScriptedAttempts()
+        results, _ = run(manager, [A, B, dict(A), A], attempts)
+        self.assertEqual(attempts.calls, [[A, B]])
+        self.assertEqual([i for i, _, _ in results], [0, 1, 2, 3])
+        self.assertEqual(results[0][2], results[2][2])
+        self.assertEqual(results[0][2], results[3][2])
+        counts = manager.generation_counts
+        self.assertEqual((counts['jobs'], counts['duplicates'], counts['failures']), (2, 2, 0))
+        self.assertEqual(manager.solver_jobs, 2)
+
+    def test_failed_jobs_are_retried_with_doubling_backoff(self):
+        manager = JobManager(max_retries=3, retry_backoff_s=2.0)
+        attempts = ScriptedAttempts(failures={0: [B, C], 1: [C], 2: [C]})
+        results, sleeps = run(manager, [A, B, C], attempts)
+        self.assertEqual(attempts.calls, [[A, B, C], [B, C], [C], [C]])
+        self.assertEqual(sleeps, [2.0, 4.0, 8.0])
+        self.assertTrue(all(delta_amp > 0 for _, _, delta_amp in results))
+        counts = manager.generation_counts
+        self.assertEqual((counts['failures'], counts['retries'], counts['recovered'], counts['lost']), (4, 4, 2, 0))
+        self.assertEqual(manager.solver_jobs, 7)
+
+    def test_job_is_lost_after_max_retries(self):
+        manager = JobManager(max_retries=1, retry_backoff_s=0.0)
+        attempts = ScriptedAttempts(failures={0: [B], 1: [B]})
+        results, _ = run(manager, [A, B, B], attempts)
+        self.assertEqual(results[1], (1, None, -float('inf')))
+        self.assertEqual(results[2], (2, None, -float('inf')))
+        counts = manager.generation_counts
+        self.assertEqual((counts['failures'], counts['retries'], counts['lost']), (2, 1, 1))
+
+    def test_attempt_error_fails_the_unfinished_jobs(self):
+        manager = JobManager(max_retries=1, retry_backoff_s=0.0)
+        attempts = ScriptedAttempts(error_on=0)
+        results, _ = run(manager, [A, B], attempts)
+        self.assertEqual(len(attempts.calls), 2)
+        self.assertTrue(all(delta_amp > 0 for _, _, delta_amp in results))
+        self.assertEqual(manager.generation_counts['recovered'], 2)
+
+    def test_backend_counters_enter_the_generation(self):
+        class Backend:
+            job_counters = new_job_counters()
+
+        backend = Backend()
+
+        def run_attempt(chromosomes, attempt):
+            backend.job_counters['speculative_launches'] += 1
+            backend.job_counters['speculative_wins'] += 1
+            yield from ScriptedAttempts()(chromosomes, attempt)
+
+        manager = JobManager(retry_backoff_s=0.0, straggler_factor=2.0)
+        run(manager, [A, B], run_attempt, backend=backend)
+        manager.start_generation()
+        run(manager, [C], run_attempt, backend=backend)
+        self.assertEqual(manager.generation_counts['speculative_launches'], 1)
+        self.assertEqual(manager.total_counts['speculative_launches'], 2)
+        self.assertEqual(manager.total_counts['jobs'], 3)
+        self.assertEqual(manager.solver_jobs, 5)
+        self.assertIn("1 cópias especulativas (1 venceram)", manager.generation_report())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+# test_post_processing.py
+
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.post_processing import delta_amp_from_spectra, calculate_delta_amp_batch, write_job_result
+
+
+def loop_delta_amp(spectrum):
+    # O laço original de calculate_delta_amp, usado como referência
+    peaks = []
+    valleys = []
+    for i in range(1, len(spectrum) - 1):
+        if spectrum[i] > spectrum[i-1] and spectrum[i] > spectrum[i+1]:
+            peaks.append((i, spectrum[i]))
+        elif spectrum[i] < spectrum[i-1] and spectrum[i] < spectrum[i+1]:
+            valleys.append((i, spectrum[i]))
+    total_delta_amp = 0.0
+    for peak_idx, peak_val in peaks:
+        next_valley_val = None
+        for valley_idx, valley_val in valleys:
+            if valley_idx > peak_idx:
+                next_valley_val = valley_val
+                break
+        if next_valley_val is not None:
+            total_delta_amp += abs(peak_val - next_valley_val)
+    return total_delta_amp
+
+
+class DeltaAmpTest(unittest.TestCase):
+
+    def assert_matches_loop(self, spectra):
+        expected = [loop_delta_amp(spectrum) for spectrum in spectra]
+        np.testing.assert_array_equal(delta_amp_from_spectra(np.array(spectra)), expected)
+        for spectrum, value in zip(spectra, expected):
+            self.assertEqual(delta_amp_from_spectra(np.array(spectrum)), value)
+
+    def test_random_spectra_match_loop_exactly(self):
+        rng = np.random.default_rng(0)
+        self.assert_matches_loop(rng.random((20, 300)))
+        # Espectros suaves: poucos extremos, vários picos sem vale seguinte
+        x = np.linspace(0, 6 * np.pi, 200)
+        self.assert_matches_loop([np.sin(x * k) * np.exp(-x / 10) for k in (0.5, 1.0, 1.7)])
+
+    def test_plateaus_and_monotonic_spectra(self):
+        self.assert_matches_loop([
+            [1.0, 2.0, 2.0, 1.0, 0.5, 0.5, 1.0],
+            [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0],
+            [3.0, 1.0, 3.0, 1.0, 3.0, 1.0, 3.0],
+            [0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0],
+        ])
+
+    def test_nan_points_match_loop(self):
+        rng = np.random.default_rng(1)
+        spectra = rng.random((5, 50))
+        spectra[0, 10] = np.nan
+        spectra[1, [0, 1, 49]] = np.nan
+        spectra[2, :] = np.nan
+        self.assert_matches_loop(spectra)
+
+    def test_short_spectra(self):
+        self.assertEqual(delta_amp_from_spectra(np.array([1.0, 2.0])), 0.0)
+        np.testing.assert_array_equal(delta_amp_from_spectra(np.zeros((3, 2))), [0.0, 0.0, 0.0])
+
+    def test_batch_keeps_order_and_marks_missing_files(self):
+        rng = np.random.default_rng(2)
+        spectra = [rng.random(100), rng.random(80).astype(np.float32), rng.random(100)]
+        with tempfile.TemporaryDirectory() as directory:
+            paths = []
+            for i, spectrum in enumerate(spectra):
+                path = os.path.join(directory, f"spectrum_{i}.h5")
+                write_job_result(path, np.arange(len(spectrum)), spectrum)
+                paths.append(path)
+            results = calculate_delta_amp_batch(
+                [paths[0], None, paths[1], os.path.join(directory, "missing.h5"), paths[2]]
+            )
+        self.assertEqual(results[0], loop_delta_amp(spectra[0]))
+        self.assertEqual(results[2], float(loop_delta_amp(spectra[1])))
+        self.assertEqual(results[4], loop_delta_amp(spectra[2]))
+        self.assertEqual(results[1], -float('inf'))
+        self.assertEqual(results[3], -float('inf'))
+
+
+if __name__ == '__main__':
+    unittest.main()
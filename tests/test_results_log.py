@@ -0,0 +1,86 @@
+# test_results_log.py
+
+import io
+import os
+import sys
+import contextlib
+import tempfile
+import unittest
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.results_log import ResultsLogWriter, ResultsLogReader, RESULT_COLUMNS
+
+
+def row(i, generation=1):
+    return {'s': 1e-7 + i * 1e-9, 'w': 5e-7, 'l': 2e-7, 'height': 2.5e-7, 'delta_amp': float(i), 'generation': generation}
+
+
+class ResultsLogTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.directory.name, "full_optimization_data_20250101_000000.csv")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_rows_are_appended_under_a_single_header(self):
+        with ResultsLogWriter(self.csv_path) as writer:
+            writer.append_rows([row(0), row(1)])
+        with ResultsLogWriter(self.csv_path) as writer:
+            writer.append_rows([row(2, generation=2)])
+        df = pd.read_csv(self.csv_path)
+        self.assertEqual(list(df.columns), list(RESULT_COLUMNS))
+        self.assertEqual(list(df['delta_amp']), [0.0, 1.0, 2.0])
+        self.assertEqual(list(df['generation']), [1, 1, 2])
+
+    def test_partial_line_is_truncated_on_resume(self):
+        with ResultsLogWriter(self.csv_path) as writer:
+            writer.append_rows([row(0), row(1)])
+        complete_size = os.path.getsize(self.csv_path)
+        # Processo interrompido no meio de uma escrita
+        with open(self.csv_path, 'ab') as f:
+            f.write(b'1.2e-07,5e-07,2e-')
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            writer = ResultsLogWriter(self.csv_path)
+        self.assertIn("Linha incompleta descartada", output.getvalue())
+        self.assertEqual(os.path.getsize(self.csv_path), complete_size)
+        with writer:
+            writer.append_rows([row(2)])
+        self.assertEqual(list(pd.read_csv(self.csv_path)['delta_amp']), [0.0, 1.0, 2.0])
+
+    def test_partial_header_is_rewritten(self):
+        with open(self.csv_path, 'wb') as f:
+            f.write(b's,w,l,hei')
+        with contextlib.redirect_stdout(io.StringIO()):
+            with ResultsLogWriter(self.csv_path) as writer:
+                writer.append_rows([row(0)])
+        df = pd.read_csv(self.csv_path)
+        self.assertEqual(list(df.columns), list(RESULT_COLUMNS))
+        self.assertEqual(len(df), 1)
+
+    def test_reader_only_returns_complete_new_rows(self):
+        writer = ResultsLogWriter(self.csv_path)
+        reader = ResultsLogReader(self.csv_path)
+        try:
+            writer.append_rows([row(0), row(1)])
+            self.assertEqual(len(reader.read_new()), 2)
+            self.assertTrue(reader.read_new().empty)
+            # Uma linha ainda sendo escrita fica para a próxima leitura
+            with open(self.csv_path, 'ab') as f:
+                f.write(b'1.2e-07,5e-07,2e-07,')
+            self.assertTrue(reader.read_new().empty)
+            with open(self.csv_path, 'ab') as f:
+                f.write(b'2.5e-07,7.0,2\n')
+            new_rows = reader.read_new()
+            self.assertEqual(list(new_rows['delta_amp']), [7.0])
+            self.assertEqual(list(reader.data['delta_amp']), [0.0, 1.0, 7.0])
+        finally:
+            writer.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
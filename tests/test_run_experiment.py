@@ -0,0 +1,76 @@
+# test_run_experiment.py
+#
+# Executa um experimento curto com o backend sintético em um diretório novo:
+#   python -m pytest tests
+
+import os
+import sys
+import glob
+import json
+import tempfile
+import unittest
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from utils.experiment_config import apply_config
+from utils.experiment_catalog import ExperimentCatalog
+
+SYNTHETIC_CONFIG = {
+    'simulation_backend': 'synthetic',
+    'population_size': 4,
+    'num_generations': 2,
+    'use_background_plotting': False,
+    'job_retry_backoff_s': 0.0,
+    'backend_options': {'synthetic': {'job_latency': [0.0, 0.01], 'failure_rate': 0.0}},
+}
+
+
+class RunExperimentTest(unittest.TestCase):
+
+    def test_headless_synthetic_run_in_new_directory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            project_directory = os.path.join(directory, "experimento")
+            summary = main.run_experiment(dict(SYNTHETIC_CONFIG, project_directory=project_directory))
+
+            self.assertIsNotNone(summary)
+            self.assertEqual(summary['generations_processed'], 2)
+            results_directory = os.path.join(project_directory, "simulation_results")
+            self.assertEqual(os.path.dirname(summary['full_data_csv_path']), results_directory)
+            df = pd.read_csv(summary['full_data_csv_path'])
+            self.assertEqual(len(df), 8)
+            self.assertEqual(set(df['backend']), {'synthetic'})
+            results_json = glob.glob(os.path.join(results_directory, "experiment_results_*.json"))
+            self.assertEqual(len(results_json), 1)
+            with open(results_json[0]) as f:
+                self.assertEqual(json.load(f)['backend'], 'synthetic')
+            # O catálogo deixa os experimentos sintéticos de fora, a menos que sejam pedidos
+            with ExperimentCatalog(os.path.join(directory, "catalog.sqlite")) as catalog:
+                catalog.ingest(results_directory)
+                self.assertTrue(catalog.experiments().empty)
+                self.assertTrue(catalog.top_designs().empty)
+                self.assertEqual(len(catalog.best_fitness_values(backend='synthetic')), 1)
+            # A execução concluída não deixa checkpoint nem projetos temporários
+            self.assertFalse(os.path.exists(os.path.join(results_directory, "checkpoint.pkl")))
+            self.assertEqual(os.listdir(os.path.join(project_directory, "temp")), [])
+
+    def test_unknown_setting_is_rejected(self):
+        with self.assertRaises(ValueError):
+            main.run_experiment({'populaton_size': 4})
+
+    def test_config_is_merged_with_defaults(self):
+        settings = apply_config(main._DEFAULT_SETTINGS, {
+            's_range': [0.12e-6, 0.2e-6],
+            'backend_options': {'synthetic': {'failure_rate': 0.0}},
+        })
+        self.assertEqual(settings['s_range'], (0.12e-6, 0.2e-6))
+        self.assertEqual(settings['backend_options']['synthetic']['failure_rate'], 0.0)
+        self.assertEqual(settings['backend_options']['synthetic']['max_concurrent_jobs'],
+                         main._DEFAULT_SETTINGS['backend_options']['synthetic']['max_concurrent_jobs'])
+        self.assertEqual(main._DEFAULT_SETTINGS['backend_options']['synthetic']['failure_rate'], 0.02)
+
+
+if __name__ == '__main__':
+    unittest.main()
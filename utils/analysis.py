@@ -1,66 +1,143 @@
 # analysis.py (Modificado para salvar figuras em vez de exibir)
 
 import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
+import numpy as np
 import os
 
-def run_full_analysis(csv_file_path):
+ANALYSIS_COLUMNS = ['s', 'w', 'l', 'height', 'delta_amp']
+
+
+class RunningStatistics:
+    """
+    Médias, variâncias e matriz de correlação atualizadas incrementalmente.
+
+    Cada chamada de update combina as estatísticas acumuladas com as do novo
+    lote (fórmula de Chan/Welford para os co-momentos), em vez de recalcular
+    tudo a partir do histórico completo. O resultado é o mesmo de
+    df.corr() sobre todas as linhas já vistas.
+
+    Args:
+        columns (list): Colunas acompanhadas (por padrão, parâmetros e delta_amp).
+    """
+
+    def __init__(self, columns=ANALYSIS_COLUMNS):
+        self.columns = list(columns)
+        self.count = 0
+        self.mean = np.zeros(len(self.columns))
+        self._comoment = np.zeros((len(self.columns), len(self.columns)))
+
+    def update(self, df):
+        """Acrescenta as linhas de 'df'; simulações que falharam (-inf) são ignoradas, como na análise."""
+        df = df[df['delta_amp'] > -1e30]
+        values = df[self.columns].to_numpy(dtype=float)
+        n_new = len(values)
+        if n_new == 0:
+            return self
+        mean_new = values.mean(axis=0)
+        centered = values - mean_new
+        comoment_new = centered.T @ centered
+
+        total = self.count + n_new
+        delta = mean_new - self.mean
+        self._comoment += comoment_new + np.outer(delta, delta) * self.count * n_new / total
+        self.mean = self.mean + delta * n_new / total
+        self.count = total
+        return self
+
+    @property
+    def variance(self):
+        """Variância amostral de cada coluna (NaN com menos de duas linhas)."""
+        if self.count < 2:
+            return np.full(len(self.columns), np.nan)
+        return np.diag(self._comoment) / (self.count - 1)
+
+    def correlation_matrix(self):
+        """Matriz de correlação de Pearson, como DataFrame (equivalente a df.corr())."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            scale = np.sqrt(np.diag(self._comoment))
+            correlation = self._comoment / np.outer(scale, scale)
+        return pd.DataFrame(np.clip(correlation, -1.0, 1.0), index=self.columns, columns=self.columns)
+
+
+def analysis_output_paths(csv_file_path):
+    """Caminhos do heatmap e do pairplot gerados a partir de um CSV de resultados."""
+    output_directory = os.path.dirname(csv_file_path)
+    base_filename = os.path.splitext(os.path.basename(csv_file_path))[0]
+    heatmap_output_path = os.path.join(output_directory, f"{base_filename}_heatmap.png")
+    pairplot_output_path = os.path.join(output_directory, f"{base_filename}_pairplot.png")
+    return heatmap_output_path, pairplot_output_path
+
+
+def plot_correlation_heatmap(correlation_matrix, heatmap_output_path):
+    """Desenha e salva o heatmap de uma matriz de correlação."""
+    # O matplotlib e o seaborn só são importados por quem desenha (ex.: o processo de PlotWorker)
+    import seaborn as sns
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(10, 8))
+    sns.heatmap(
+        correlation_matrix, 
+        annot=True,
+        cmap='coolwarm',
+        fmt=".2f",
+        linewidths=.5
+    )
+    plt.title('Matriz de Correlação entre Parâmetros e Fitness (delta_amp)')
+    
+    # MODIFICADO: Salva a figura e fecha para liberar memória
+    plt.savefig(heatmap_output_path)
+    plt.close()
+
+
+def plot_pairplot(df_analysis, pairplot_output_path):
+    """Desenha e salva o pairplot (com KDE na diagonal) dos parâmetros e do fitness."""
+    import seaborn as sns
+    import matplotlib.pyplot as plt
+
+    pair_plot = sns.pairplot(
+        df_analysis,
+        diag_kind='kde' # Mostra uma curva de densidade na diagonal
+    )
+    
+    pair_plot.fig.suptitle('Análise Visual de Pares entre Parâmetros e Fitness', y=1.02)
+    
+    # MODIFICADO: Salva a figura e fecha para liberar memória
+    pair_plot.savefig(pairplot_output_path)
+    plt.close()
+
+
+def run_full_analysis(csv_file_path, df=None):
     """
     Carrega dados de um CSV, gera um heatmap de correlação e um
     pairplot, e salva ambos como arquivos PNG no mesmo diretório do CSV.
+
+    Se 'df' for informado (ex.: ResultsLogReader.data), os dados já carregados
+    são usados e o CSV não é lido novamente; 'csv_file_path' continua
+    definindo os nomes das figuras.
     """
     try:
         # --- PREPARAÇÃO DOS DADOS E NOMES DE ARQUIVO ---
         
-        df = pd.read_csv(csv_file_path)
+        if df is None:
+            df = pd.read_csv(csv_file_path)
         print("Dados carregados com sucesso!")
         print(f"Total de indivíduos analisados: {len(df)}")
         
         df = df[df['delta_amp'] > -1e30]
         
-        params_and_fitness = ['s', 'w', 'l', 'height', 'delta_amp']
-        df_analysis = df[params_and_fitness]
+        df_analysis = df[ANALYSIS_COLUMNS]
 
         # Define os caminhos de saída baseados no nome do arquivo de entrada
-        output_directory = os.path.dirname(csv_file_path)
-        base_filename = os.path.splitext(os.path.basename(csv_file_path))[0]
-        
-        heatmap_output_path = os.path.join(output_directory, f"{base_filename}_heatmap.png")
-        pairplot_output_path = os.path.join(output_directory, f"{base_filename}_pairplot.png")
+        heatmap_output_path, pairplot_output_path = analysis_output_paths(csv_file_path)
 
         # --- 1. Heatmap de Correlação (O Resumo) ---
         print(f"\nGerando Heatmap de Correlação...")
-        correlation_matrix = df_analysis.corr()
-        
-        plt.figure(figsize=(10, 8))
-        sns.heatmap(
-            correlation_matrix, 
-            annot=True,
-            cmap='coolwarm',
-            fmt=".2f",
-            linewidths=.5
-        )
-        plt.title('Matriz de Correlação entre Parâmetros e Fitness (delta_amp)')
-        
-        # MODIFICADO: Salva a figura e fecha para liberar memória
-        plt.savefig(heatmap_output_path)
-        plt.close()
+        plot_correlation_heatmap(df_analysis.corr(), heatmap_output_path)
         print(f"-> Heatmap salvo em: {heatmap_output_path}")
         
         # --- 2. Pairplot (A Análise Completa) ---
         print("\nGerando Pairplot... Isso pode levar alguns segundos.")
-        
-        pair_plot = sns.pairplot(
-            df_analysis,
-            diag_kind='kde' # Mostra uma curva de densidade na diagonal
-        )
-        
-        pair_plot.fig.suptitle('Análise Visual de Pares entre Parâmetros e Fitness', y=1.02)
-        
-        # MODIFICADO: Salva a figura e fecha para liberar memória
-        pair_plot.savefig(pairplot_output_path)
-        plt.close()
+        plot_pairplot(df_analysis, pairplot_output_path)
         print(f"-> Pairplot salvo em: {pairplot_output_path}")
 
     except FileNotFoundError:
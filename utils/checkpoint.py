@@ -0,0 +1,101 @@
+# checkpoint.py
+
+import os
+import pickle
+import random
+
+import numpy as np
+
+
+def save_checkpoint(checkpoint_path, state):
+    """
+    Salva o estado da otimização de forma atômica.
+
+    O estado é gravado em um arquivo temporário no mesmo diretório, enviado
+    ao disco (fsync) e só então renomeado sobre o checkpoint anterior. Assim,
+    uma queda no meio da gravação nunca deixa um checkpoint corrompido: ou o
+    anterior continua intacto, ou o novo está completo.
+
+    Args:
+        checkpoint_path (str): Caminho do arquivo de checkpoint.
+        state (dict): Estado a salvar (precisa ser serializável com pickle).
+    """
+    temp_path = f"{checkpoint_path}.tmp"
+    with open(temp_path, 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, checkpoint_path)
+
+
+def load_checkpoint(checkpoint_path):
+    """
+    Carrega um checkpoint salvo por save_checkpoint.
+
+    Returns:
+        O dicionário de estado, ou None se o arquivo não existir ou estiver ilegível.
+    """
+    if not os.path.exists(checkpoint_path):
+        return None
+    try:
+        with open(checkpoint_path, 'rb') as f:
+            return pickle.load(f)
+    except Exception as e:
+        print(f"!!! Erro ao carregar o checkpoint {os.path.basename(checkpoint_path)}: {e}")
+        return None
+
+
+def remove_checkpoint(checkpoint_path):
+    for path in (checkpoint_path, f"{checkpoint_path}.tmp"):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def capture_rng_state():
+    """Estado dos geradores globais (random e numpy), para ser salvo no checkpoint."""
+    return {'random': random.getstate(), 'numpy': np.random.get_state()}
+
+
+def restore_rng_state(rng_state):
+    random.setstate(rng_state['random'])
+    np.random.set_state(rng_state['numpy'])
+
+
+class PartialGenerationLog:
+    """
+    Resultados já obtidos na geração em andamento.
+
+    Cada resultado é registrado (de forma atômica) assim que o seu job termina.
+    Ao retomar uma execução interrompida no meio de uma geração, os indivíduos
+    que já tinham resultado não são simulados novamente.
+
+    Args:
+        checkpoint_path (str): Caminho do arquivo dos resultados parciais.
+    """
+
+    def __init__(self, checkpoint_path):
+        self.checkpoint_path = checkpoint_path
+        self.generation = None
+        self.population = None
+        self.results = {}
+
+    def start(self, generation, population):
+        """Inicia o registro de uma geração (ou retoma o registro salvo, se for a mesma)."""
+        saved = load_checkpoint(self.checkpoint_path)
+        if saved is not None and saved['generation'] == generation and saved['population'] == population:
+            self.results = saved['results']
+        else:
+            self.results = {}
+        self.generation = generation
+        self.population = [dict(chromosome) for chromosome in population]
+        return dict(self.results)
+
+    def record(self, index, delta_amp):
+        self.results[index] = delta_amp
+        save_checkpoint(self.checkpoint_path, {
+            'generation': self.generation, 'population': self.population, 'results': self.results
+        })
+
+    def clear(self):
+        self.results = {}
+        remove_checkpoint(self.checkpoint_path)
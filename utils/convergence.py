@@ -0,0 +1,317 @@
+# convergence.py
+#
+# Critérios de parada da otimização, avaliados ao final de cada geração.
+#
+# Cada critério recebe o melhor fitness global da geração (e, se precisar, a
+# população) e indica se a otimização deve ser encerrada. Os mesmos critérios
+# podem ser reaplicados às execuções registradas em simulation_results/ para
+# estimar quantas simulações teriam sido economizadas:
+#   python -m utils.convergence
+
+import os
+import re
+import glob
+import json
+import math
+
+import numpy as np
+
+PARAM_NAMES = ('s', 'w', 'l', 'height')
+
+_EXPERIMENT_ID_PATTERN = re.compile(r'(\d{8}_\d{6})')
+
+
+class ConvergenceCriterion:
+    """
+    Interface de um critério de parada.
+
+    Os critérios guardam o histórico que recebem e podem ser salvos no
+    checkpoint junto com o restante do estado da execução.
+    """
+
+    name = "criterion"
+
+    def __init__(self):
+        self.history = []
+        self.reason = None
+
+    def update(self, best_fitness, population=None):
+        """
+        Registra o melhor fitness global de uma geração concluída.
+
+        Args:
+            best_fitness (float): O melhor fitness encontrado até esta geração.
+            population (list): Opcional. Os cromossomos da população atual.
+
+        Returns:
+            True se a otimização deve ser encerrada; 'reason' descreve o motivo.
+        """
+        self.history.append(float(best_fitness))
+        return self._converged(population)
+
+    def _converged(self, population):
+        raise NotImplementedError
+
+
+class StagnationCriterion(ConvergenceCriterion):
+    """O melhor fitness não melhorou por 'patience' gerações consecutivas (o critério original do main.py)."""
+
+    name = "stagnation"
+
+    def __init__(self, patience=20):
+        super().__init__()
+        self.patience = patience
+
+    def _converged(self, population):
+        history = np.array(self.history)
+        if len(history) <= self.patience:
+            return False
+        if history[-1] > history[-1 - self.patience]:
+            return False
+        self.reason = f"O melhor fitness não melhorou por {self.patience} gerações consecutivas."
+        return True
+
+
+class RelativeImprovementCriterion(ConvergenceCriterion):
+    """
+    A melhoria relativa do melhor fitness nas últimas 'window' gerações ficou
+    abaixo de 'min_relative_improvement'.
+
+    Diferente da estagnação, melhorias marginais (ex.: 0,01% em 12 gerações)
+    não reiniciam a contagem.
+    """
+
+    name = "relative_improvement"
+
+    def __init__(self, window=12, min_relative_improvement=1e-3):
+        super().__init__()
+        self.window = window
+        self.min_relative_improvement = min_relative_improvement
+
+    def _converged(self, population):
+        if len(self.history) <= self.window:
+            return False
+        previous, current = self.history[-1 - self.window], self.history[-1]
+        if not np.isfinite(previous):
+            return False
+        improvement = (current - previous) / max(abs(previous), 1e-12)
+        if improvement >= self.min_relative_improvement:
+            return False
+        self.reason = (f"O melhor fitness melhorou {improvement:.2%} nas últimas {self.window} gerações "
+                       f"(mínimo: {self.min_relative_improvement:.2%}).")
+        return True
+
+
+def population_diversity(population, param_ranges):
+    """
+    Diversidade de uma população no espaço normalizado dos parâmetros.
+
+    Cada parâmetro é levado a [0, 1] pelo seu range e a diversidade é a média
+    dos desvios padrão das colunas: cerca de 0,29 para uma população uniforme
+    e 0 quando todos os cromossomos são iguais.
+    """
+    names = [name for name in PARAM_NAMES if name in param_ranges]
+    genes = np.array([[chromosome[name] for name in names] for chromosome in population], dtype=float)
+    if len(genes) < 2:
+        return 0.0
+    lower = np.array([param_ranges[name][0] for name in names], dtype=float)
+    upper = np.array([param_ranges[name][1] for name in names], dtype=float)
+    normalized = (genes - lower) / (upper - lower)
+    return float(normalized.std(axis=0).mean())
+
+
+class DiversityCriterion(ConvergenceCriterion):
+    """
+    A população colapsou: a diversidade (ver population_diversity) ficou abaixo
+    de 'min_diversity' por 'patience' gerações consecutivas.
+
+    Com a população concentrada em um ponto, novas gerações só refinam o
+    mesmo ótimo local, e cromossomos repetidos passam a vir do cache.
+    """
+
+    name = "diversity"
+
+    def __init__(self, param_ranges, min_diversity=0.02, patience=2):
+        super().__init__()
+        self.param_ranges = param_ranges
+        self.min_diversity = min_diversity
+        self.patience = patience
+        self.diversity_history = []
+
+    def _converged(self, population):
+        if not population:
+            return False
+        self.diversity_history.append(population_diversity(population, self.param_ranges))
+        recent = self.diversity_history[-self.patience:]
+        if len(recent) < self.patience or max(recent) >= self.min_diversity:
+            return False
+        self.reason = (f"A diversidade da população ({recent[-1]:.4f}) ficou abaixo de "
+                       f"{self.min_diversity} por {self.patience} gerações.")
+        return True
+
+
+def mann_kendall_p_value(values):
+    """
+    Teste de Mann-Kendall para uma tendência crescente, com correção para empates.
+
+    Returns:
+        O p-valor unilateral (aproximação normal): valores pequenos indicam que
+        a série ainda cresce de forma consistente.
+    """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    if n < 3:
+        return 1.0
+    differences = values[None, :] - values[:, None]
+    s = float(np.sign(differences[np.triu_indices(n, k=1)]).sum())
+    _, tie_counts = np.unique(values, return_counts=True)
+    variance = (n * (n - 1) * (2 * n + 5) - np.sum(tie_counts * (tie_counts - 1) * (2 * tie_counts + 5))) / 18.0
+    if variance <= 0 or s <= 0:
+        # Série constante ou sem crescimento
+        return 1.0
+    z = (s - 1) / math.sqrt(variance)
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+class PlateauTestCriterion(ConvergenceCriterion):
+    """
+    O teste de Mann-Kendall não encontra tendência crescente significativa
+    (nível 'alpha') no melhor fitness das últimas 'window' gerações.
+
+    Uma única melhoria isolada na janela não basta para continuar: é preciso
+    que o fitness venha subindo de forma consistente.
+    """
+
+    name = "plateau_test"
+
+    def __init__(self, window=15, alpha=0.05):
+        super().__init__()
+        self.window = window
+        self.alpha = alpha
+
+    def _converged(self, population):
+        if len(self.history) < self.window:
+            return False
+        p_value = mann_kendall_p_value(self.history[-self.window:])
+        if p_value <= self.alpha:
+            return False
+        self.reason = (f"Sem tendência de melhoria nas últimas {self.window} gerações "
+                       f"(Mann-Kendall, p = {p_value:.3f} > {self.alpha}).")
+        return True
+
+
+class ConvergenceMonitor:
+    """
+    Combina vários critérios: a otimização termina quando qualquer um deles é satisfeito.
+
+    Args:
+        criteria (list): Instâncias de ConvergenceCriterion.
+        min_generations (int): Gerações mínimas antes de qualquer parada.
+    """
+
+    def __init__(self, criteria, min_generations=0):
+        self.criteria = list(criteria)
+        self.min_generations = min_generations
+        self.generations = 0
+        self.reason = None
+
+    def update(self, best_fitness, population=None):
+        """Registra uma geração em todos os critérios; retorna True se algum indicar convergência."""
+        self.generations += 1
+        # Todos os critérios recebem a geração, mesmo que um anterior já tenha sido satisfeito
+        triggered = [criterion for criterion in self.criteria if criterion.update(best_fitness, population)]
+        if not triggered or self.generations < self.min_generations:
+            return False
+        self.reason = f"[{triggered[0].name}] {triggered[0].reason}"
+        return True
+
+
+# --- Reconstituição das execuções registradas ---
+
+def _load_generation_populations(csv_path):
+    import pandas as pd
+
+    df = pd.read_csv(csv_path)
+    if 'fidelity' in df:
+        df = df[df['fidelity'].fillna('high') == 'high']
+    return {int(generation): group[list(PARAM_NAMES)].to_dict('records')
+            for generation, group in df.groupby('generation')}
+
+
+def replay_convergence(results_directory, criteria_factories):
+    """
+    Reaplica critérios de parada aos históricos registrados em experiment_results_*.json.
+
+    Para cada execução e critério, o histórico 'fitness_history' é apresentado
+    geração a geração; a parada na geração g economizaria as gerações
+    seguintes, cada uma com 'population_size' simulações. A população de cada
+    geração (para o critério de diversidade) vem do full_optimization_data_*.csv
+    da mesma execução, quando existe.
+
+    Args:
+        results_directory (str): Diretório com os JSONs (e CSVs) das execuções.
+        criteria_factories (dict): Nome -> função que recebe os ranges dos parâmetros
+            e cria um critério novo (os critérios guardam estado).
+
+    Returns:
+        Uma lista de dicionários, um por execução e critério, com a geração de
+        parada (None se o critério não parou), as simulações economizadas e o
+        fitness perdido em relação ao melhor da execução.
+    """
+    report = []
+    for json_path in sorted(glob.glob(os.path.join(results_directory, "experiment_results_*.json"))):
+        with open(json_path, 'r') as f:
+            data = json.load(f)
+        history = data.get('fitness_history') or []
+        if not history:
+            continue
+        population_size = data.get('population_size') or 0
+        param_ranges = data.get('parameter_ranges')
+        match = _EXPERIMENT_ID_PATTERN.search(os.path.basename(json_path))
+        csv_path = os.path.join(results_directory, f"full_optimization_data_{match.group(1)}.csv") if match else None
+        populations = _load_generation_populations(csv_path) if csv_path and os.path.exists(csv_path) else {}
+
+        for name, factory in criteria_factories.items():
+            criterion = factory(param_ranges)
+            stop_generation = None
+            for generation, best_fitness in enumerate(history, start=1):
+                if criterion.update(best_fitness, populations.get(generation)):
+                    stop_generation = generation
+                    break
+            generations_saved = len(history) - stop_generation if stop_generation is not None else 0
+            report.append({
+                'experiment': os.path.basename(json_path),
+                'criterion': name,
+                'generations_recorded': len(history),
+                'stop_generation': stop_generation,
+                'solves_saved': generations_saved * population_size,
+                'fitness_lost': float(history[-1] - history[stop_generation - 1]) if stop_generation else 0.0,
+                'has_populations': bool(populations),
+            })
+    return report
+
+
+def default_replay_criteria(patience=20):
+    """Os critérios comparados pela reconstituição, com os parâmetros padrão."""
+    return {
+        f'stagnation({patience})': lambda ranges: StagnationCriterion(patience),
+        'relative_improvement(12, 0.1%)': lambda ranges: RelativeImprovementCriterion(12, 1e-3),
+        'diversity(0.02)': lambda ranges: DiversityCriterion(ranges, 0.02),
+        'plateau_test(15, 0.05)': lambda ranges: PlateauTestCriterion(15, 0.05),
+    }
+
+
+if __name__ == '__main__':
+    results_directory = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "simulation_results")
+    print("Reconstituição dos critérios de parada nas execuções registradas:")
+    replay = replay_convergence(results_directory, default_replay_criteria())
+    for entry in replay:
+        stop = f"parada na geração {entry['stop_generation']}" if entry['stop_generation'] else "sem parada"
+        print(f"  - {entry['experiment']} [{entry['criterion']}]: {stop} de {entry['generations_recorded']}, "
+              f"{entry['solves_saved']} simulações economizadas, fitness perdido {entry['fitness_lost']:.3f}")
+    print("Totais por critério:")
+    for name in default_replay_criteria():
+        entries = [entry for entry in replay if entry['criterion'] == name]
+        print(f"  - {name}: {sum(entry['solves_saved'] for entry in entries)} simulações economizadas, "
+              f"{sum(1 for entry in entries if entry['fitness_lost'] > 0)} execuções com fitness perdido "
+              f"(total {sum(entry['fitness_lost'] for entry in entries):.3f})")
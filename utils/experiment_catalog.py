@@ -0,0 +1,365 @@
+# experiment_catalog.py
+
+import os
+import io
+import re
+import json
+import glob
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+_EXPERIMENT_ID_PATTERN = re.compile(r'(\d{8}_\d{6})')
+
+# Colunas opcionais dos CSVs (modos multi-fidelidade e de ilhas)
+_OPTIONAL_COLUMNS = ('fidelity', 'island')
+
+# Arquivos sem o backend são anteriores a ele e vêm do FDTD real
+_DEFAULT_BACKEND = 'lumerical'
+
+# Colunas acrescentadas depois da criação do catálogo: {tabela: [(coluna, tipo)]}
+_ADDED_COLUMNS = {'experiments': [('backend', 'TEXT')], 'individuals': [('backend', 'TEXT')]}
+
+
+def _experiment_id(path):
+    match = _EXPERIMENT_ID_PATTERN.search(os.path.basename(path))
+    return match.group(1) if match else os.path.splitext(os.path.basename(path))[0]
+
+
+def _parse_duration(text):
+    # Formato de str(timedelta): '[D day[s], ]H:MM:SS[.ffffff]'
+    match = re.match(r'(?:(\d+) days?, )?(\d+):(\d+):(\d+(?:\.\d+)?)$', str(text))
+    if not match:
+        return None
+    days, hours, minutes, seconds = match.groups()
+    return int(days or 0) * 86400 + int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def _parse_experiment_json(path):
+    with open(path, 'r') as f:
+        data = json.load(f)
+    mutation_rate = data.get('mutation_rate')
+    experiment = {
+        'experiment_id': _experiment_id(path),
+        'backend': data.get('backend', _DEFAULT_BACKEND),
+        'start_time': data.get('experiment_start_time'),
+        'last_update': data.get('last_update'),
+        'duration_s': _parse_duration(data.get('current_duration')),
+        'generations_processed': data.get('generations_processed'),
+        'population_size': data.get('population_size'),
+        # Modo de ilhas: uma taxa por ilha
+        'mutation_rate': json.dumps(mutation_rate) if isinstance(mutation_rate, list) else mutation_rate,
+        'max_generations': data.get('max_generations_set'),
+        'best_fitness': data.get('best_fitness_so_far'),
+        'best_individual': json.dumps(data.get('best_individual_so_far')),
+        'parameter_ranges': json.dumps(data.get('parameter_ranges')),
+    }
+    history = [(generation, value) for generation, value in enumerate(data.get('fitness_history') or [], start=1)]
+    return experiment, history
+
+
+def _parse_results_csv(path, offset, header):
+    """
+    Lê as linhas completas de um CSV a partir do byte 'offset'.
+
+    Returns:
+        Uma tupla (DataFrame das linhas novas, novo offset, cabeçalho).
+    """
+    with open(path, 'rb') as f:
+        if offset == 0:
+            header = f.readline().decode('utf-8').strip()
+            offset = f.tell()
+        f.seek(offset)
+        chunk = f.read()
+    # Uma última linha sem '\n' pode estar sendo escrita: fica para a próxima ingestão
+    end = chunk.rfind(b'\n') + 1
+    columns = header.split(',')
+    if end == 0:
+        return pd.DataFrame(columns=columns), offset, header
+    df = pd.read_csv(io.BytesIO(chunk[:end]), header=None, names=columns)
+    return df, offset + end, header
+
+
+def _parse_file(kind, path, offset=0, header=None):
+    # Executado nos processos do pool: só lê e interpreta o arquivo; a gravação fica no processo principal.
+    # Erros são devolvidos em vez de levantados, para que um arquivo ruim não interrompa a ingestão dos demais.
+    try:
+        if kind == 'json':
+            return _parse_experiment_json(path)
+        return _parse_results_csv(path, offset, header)
+    except (OSError, ValueError, KeyError, pd.errors.ParserError) as e:
+        return e
+
+
+class ExperimentCatalog:
+    """
+    Catálogo persistente (SQLite) dos experimentos de simulation_results/.
+
+    Guarda o resumo de cada experiment_results_*.json (configurações, melhor
+    fitness, curva de convergência) e todas as linhas dos
+    full_optimization_data_*.csv. As consultas consideram só os experimentos
+    do FDTD real, a menos que outro backend seja pedido ('synthetic' ou None
+    para todos). A ingestão é incremental: um arquivo só é
+    lido de novo se o seu tamanho ou data de modificação mudarem, e os CSVs
+    (gravados só por acréscimo) são lidos a partir do ponto onde a ingestão
+    anterior parou. Com muitos arquivos pendentes, a leitura é distribuída
+    entre processos.
+
+    Args:
+        db_path (str): Caminho do arquivo SQLite.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                experiment_id TEXT NOT NULL,
+                mtime REAL,
+                size INTEGER,
+                offset INTEGER DEFAULT 0,
+                header TEXT
+            );
+            CREATE TABLE IF NOT EXISTS experiments (
+                experiment_id TEXT PRIMARY KEY,
+                backend TEXT,
+                start_time TEXT,
+                last_update TEXT,
+                duration_s REAL,
+                generations_processed INTEGER,
+                population_size INTEGER,
+                mutation_rate TEXT,
+                max_generations INTEGER,
+                best_fitness REAL,
+                best_individual TEXT,
+                parameter_ranges TEXT
+            );
+            CREATE TABLE IF NOT EXISTS convergence (
+                experiment_id TEXT NOT NULL,
+                generation INTEGER NOT NULL,
+                best_fitness REAL,
+                PRIMARY KEY (experiment_id, generation)
+            );
+            CREATE TABLE IF NOT EXISTS individuals (
+                experiment_id TEXT NOT NULL,
+                s REAL, w REAL, l REAL, height REAL,
+                delta_amp REAL,
+                generation INTEGER,
+                fidelity TEXT,
+                island INTEGER,
+                backend TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_individuals_experiment ON individuals (experiment_id);
+            CREATE INDEX IF NOT EXISTS idx_individuals_delta_amp ON individuals (delta_amp);
+        """)
+        self._add_missing_columns()
+        self._conn.commit()
+
+    def _add_missing_columns(self):
+        # Catálogos criados antes de uma coluna existir: a coluna é acrescentada e
+        # todos os arquivos são lidos de novo na próxima ingestão para preenchê-la
+        added = False
+        for table, columns in _ADDED_COLUMNS.items():
+            existing = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+            for column, column_type in columns:
+                if column not in existing:
+                    self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+                    added = True
+        if added:
+            self._conn.execute("DELETE FROM files")
+
+    # --- Ingestão ---
+
+    def _pending_files(self, results_directory):
+        known = {row[0]: row[1:] for row in self._conn.execute(
+            "SELECT path, mtime, size, offset, header FROM files"
+        )}
+        pending = []
+        patterns = (('json', "experiment_results_*.json"), ('csv', "full_optimization_data_*.csv"))
+        for kind, pattern in patterns:
+            for path in sorted(glob.glob(os.path.join(results_directory, pattern))):
+                path = os.path.abspath(path)
+                stat = os.stat(path)
+                previous = known.get(path)
+                if previous is not None and previous[0] == stat.st_mtime and previous[1] == stat.st_size:
+                    continue
+                offset, header = 0, None
+                if kind == 'csv' and previous is not None and stat.st_size >= previous[1]:
+                    # CSV só cresceu: continua de onde parou
+                    offset, header = previous[2], previous[3]
+                pending.append((kind, path, offset, header, stat))
+        return pending
+
+    def ingest(self, results_directory, workers=None, parallel_threshold_bytes=32 * 1024 * 1024):
+        """
+        Importa os arquivos novos ou modificados de 'results_directory'.
+
+        Args:
+            results_directory (str): Diretório com os JSONs e CSVs dos experimentos.
+            workers (int): Número de processos de leitura. Se None, usa vários
+                processos só quando houver mais de 'parallel_threshold_bytes' a ler.
+
+        Returns:
+            Um dicionário com o número de arquivos pendentes e de linhas de indivíduos importadas.
+        """
+        pending = self._pending_files(results_directory)
+        if not pending:
+            return {'files': 0, 'individuals': 0}
+
+        pending_bytes = sum(stat.st_size - offset for _, _, offset, _, stat in pending)
+        if workers is None:
+            workers = min(os.cpu_count() or 1, len(pending)) if pending_bytes > parallel_threshold_bytes else 1
+
+        arguments = [(kind, path, offset, header) for kind, path, offset, header, _ in pending]
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                parsed = list(executor.map(_parse_file, *zip(*arguments)))
+        else:
+            parsed = [_parse_file(*args) for args in arguments]
+
+        imported_rows = 0
+        with self._conn:
+            for (kind, path, offset, header, stat), result in zip(pending, parsed):
+                if isinstance(result, Exception):
+                    # Não é registrado em 'files': será lido de novo na próxima ingestão
+                    print(f"  - ERRO: O arquivo '{os.path.basename(path)}' não pôde ser lido: {result}")
+                    continue
+                experiment_id = _experiment_id(path)
+                if kind == 'json':
+                    experiment, history = result
+                    self._store_experiment(experiment, history)
+                    new_offset, new_header = 0, None
+                else:
+                    df, new_offset, new_header = result
+                    if offset == 0:
+                        # Arquivo novo ou reescrito: as linhas anteriores dele são descartadas
+                        self._conn.execute("DELETE FROM individuals WHERE experiment_id = ?", (experiment_id,))
+                    imported_rows += self._store_individuals(experiment_id, df)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO files (path, kind, experiment_id, mtime, size, offset, header) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (path, kind, experiment_id, stat.st_mtime, stat.st_size, new_offset, new_header)
+                )
+        return {'files': len(pending), 'individuals': imported_rows}
+
+    def _store_experiment(self, experiment, history):
+        columns = list(experiment)
+        self._conn.execute(
+            f"INSERT OR REPLACE INTO experiments ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            [experiment[c] for c in columns]
+        )
+        self._conn.execute("DELETE FROM convergence WHERE experiment_id = ?", (experiment['experiment_id'],))
+        self._conn.executemany(
+            "INSERT INTO convergence (experiment_id, generation, best_fitness) VALUES (?, ?, ?)",
+            [(experiment['experiment_id'], generation, value) for generation, value in history]
+        )
+
+    def _store_individuals(self, experiment_id, df):
+        if df.empty:
+            return 0
+        df = df.copy()
+        for column in _OPTIONAL_COLUMNS:
+            if column not in df:
+                df[column] = None
+        if 'backend' not in df:
+            df['backend'] = _DEFAULT_BACKEND
+        # O SQLite não tem infinito: simulações que falharam ficam com delta_amp NULL
+        df['delta_amp'] = pd.to_numeric(df['delta_amp'], errors='coerce').where(lambda v: v.abs() != float('inf'))
+        df = df.astype(object).where(df.notna(), None)
+        rows = df[['s', 'w', 'l', 'height', 'delta_amp', 'generation', 'fidelity', 'island', 'backend']].itertuples(index=False)
+        self._conn.executemany(
+            "INSERT INTO individuals (experiment_id, s, w, l, height, delta_amp, generation, fidelity, island, backend) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(experiment_id,) + tuple(row) for row in rows]
+        )
+        return len(df)
+
+    # --- Consultas ---
+
+    def query(self, sql, params=()):
+        """Executa uma consulta SQL qualquer e retorna um DataFrame."""
+        return pd.read_sql_query(sql, self._conn, params=params)
+
+    @staticmethod
+    def _backend_filter(where, params, backend):
+        if backend is None:
+            return where, params
+        return f"{where} AND backend = ?", params + [backend]
+
+    def experiments(self, backend=_DEFAULT_BACKEND):
+        """Uma linha por experimento do 'backend' (None para todos), ordenada pelo início."""
+        where, params = self._backend_filter("1 = 1", [], backend)
+        return self.query(f"SELECT * FROM experiments WHERE {where} ORDER BY start_time", params)
+
+    def best_fitness_values(self, backend=_DEFAULT_BACKEND):
+        """O melhor fitness de cada experimento do 'backend' (experimentos sem valor ficam de fora)."""
+        where, params = self._backend_filter("best_fitness IS NOT NULL", [], backend)
+        return self.query(
+            f"SELECT experiment_id, best_fitness FROM experiments WHERE {where} ORDER BY experiment_id", params
+        )
+
+    def top_designs(self, k=10, experiment_id=None, distinct=True, backend=_DEFAULT_BACKEND):
+        """
+        Os 'k' melhores indivíduos entre todos os experimentos (ou de um só).
+
+        Só avaliações completas do 'backend' entram: linhas de triagem em baixa
+        fidelidade são ignoradas. Com 'distinct', cada cromossomo aparece uma única vez.
+        """
+        where, params = self._backend_filter(
+            "delta_amp IS NOT NULL AND (fidelity IS NULL OR fidelity = 'high')", [], backend
+        )
+        if experiment_id is not None:
+            where += " AND experiment_id = ?"
+            params.append(experiment_id)
+        if distinct:
+            sql = (f"SELECT s, w, l, height, MAX(delta_amp) AS delta_amp, MIN(experiment_id) AS experiment_id, "
+                   f"MIN(generation) AS generation FROM individuals WHERE {where} "
+                   f"GROUP BY s, w, l, height ORDER BY delta_amp DESC LIMIT ?")
+        else:
+            sql = f"SELECT * FROM individuals WHERE {where} ORDER BY delta_amp DESC LIMIT ?"
+        return self.query(sql, params + [k])
+
+    def fitness_distribution(self, setting='population_size', backend=_DEFAULT_BACKEND):
+        """
+        Estatísticas do melhor fitness dos experimentos agrupados por uma configuração.
+
+        Args:
+            setting (str): Coluna da tabela de experimentos (ex.: 'population_size',
+                'mutation_rate', 'max_generations').
+            backend (str): Backend dos experimentos considerados (None para todos).
+        """
+        valid_settings = {'population_size', 'mutation_rate', 'max_generations', 'generations_processed'}
+        if setting not in valid_settings:
+            raise ValueError(f"Configuração desconhecida: '{setting}'. Use uma de {sorted(valid_settings)}.")
+        where, params = self._backend_filter("best_fitness IS NOT NULL", [], backend)
+        df = self.query(f"SELECT {setting}, best_fitness FROM experiments WHERE {where}", params)
+        return df.groupby(setting)['best_fitness'].describe()
+
+    def convergence_curves(self, experiment_ids=None):
+        """
+        Curvas de convergência (melhor fitness por geração).
+
+        Returns:
+            Um DataFrame com uma coluna por experimento, indexado pela geração.
+        """
+        df = self.query("SELECT experiment_id, generation, best_fitness FROM convergence")
+        if experiment_ids is not None:
+            df = df[df['experiment_id'].isin(list(experiment_ids))]
+        return df.pivot(index='generation', columns='experiment_id', values='best_fitness')
+
+    def individuals(self, experiment_id):
+        return self.query("SELECT * FROM individuals WHERE experiment_id = ? ORDER BY rowid", (experiment_id,))
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
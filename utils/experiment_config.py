@@ -0,0 +1,79 @@
+# experiment_config.py
+#
+# Configurações de um experimento lidas de um arquivo TOML ou JSON.
+#
+# Os nomes são os das configurações globais do main.py (population_size,
+# s_range, simulation_backend, ...). Dicionários são combinados com os valores
+# padrão, de modo que basta informar o que muda:
+#
+#   population_size = 30
+#   num_generations = 100
+#   simulation_backend = "synthetic"
+#
+#   [backend_options.lumerical]
+#   lumapi_path = "/opt/lumerical/v241/api/python"
+#
+# O TOML não tem valor nulo: para desligar uma opção (ex.: job_timeout_s = None), use JSON.
+
+import os
+import json
+import copy
+
+
+def load_experiment_config(path):
+    """
+    Lê as configurações de um experimento.
+
+    Args:
+        path (str): Arquivo .toml ou .json.
+
+    Returns:
+        Um dicionário {nome da configuração: valor}.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.toml':
+        try:
+            import tomllib
+        except ImportError:
+            raise ValueError("A leitura de arquivos TOML requer Python 3.11 ou mais recente; use um arquivo JSON.")
+        with open(path, 'rb') as f:
+            return tomllib.load(f)
+    if extension == '.json':
+        with open(path, 'r') as f:
+            return json.load(f)
+    raise ValueError(f"Formato de configuração não suportado: '{extension}' (use .toml ou .json).")
+
+
+def _merge(default, value):
+    if isinstance(default, dict) and isinstance(value, dict):
+        merged = dict(default)
+        for key, item in value.items():
+            merged[key] = _merge(default.get(key), item)
+        return merged
+    if isinstance(default, tuple) and isinstance(value, list):
+        # TOML e JSON só têm listas: os ranges e intervalos continuam tuplas
+        return tuple(value)
+    return value
+
+
+def apply_config(defaults, config):
+    """
+    Combina as configurações de um experimento com os valores padrão.
+
+    Args:
+        defaults (dict): Os valores padrão de todas as configurações aceitas.
+        config (dict): As configurações informadas (ex.: de load_experiment_config).
+
+    Returns:
+        Um novo dicionário com todas as configurações; 'defaults' não é alterado.
+
+    Raises:
+        ValueError: Se 'config' tiver nomes que não estão em 'defaults'.
+    """
+    unknown = sorted(set(config) - set(defaults))
+    if unknown:
+        raise ValueError(f"Configurações desconhecidas: {', '.join(unknown)}.")
+    settings = copy.deepcopy(defaults)
+    for name, value in config.items():
+        settings[name] = _merge(settings[name], value)
+    return settings
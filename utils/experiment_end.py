@@ -3,20 +3,48 @@
 import os
 import datetime
 import json
-import matplotlib.pyplot as plt
 import numpy as np
 
+def plot_fitness_history(fitness_history, plot_path, current_time):
+    """Desenha e salva o gráfico do histórico de fitness."""
+    # Importado só aqui: com o PlotWorker, o processo principal não carrega o matplotlib
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(10, 6))
+    generations = range(1, len(fitness_history) + 1)
+    plt.plot(generations, fitness_history, marker='o', linestyle='-')
+    plt.title(f'Histórico de Fitness (Atualizado em: {current_time.strftime("%H:%M:%S")})')
+    plt.xlabel('Geração')
+    plt.ylabel('Melhor Delta Amplitude')
+    plt.grid(True)
+    try:
+        plt.savefig(plot_path)
+    except Exception as e:
+        print(f"!!! Erro ao salvar/atualizar gráfico de fitness: {e}")
+    finally:
+        plt.close() # Libera memória
+
+
 def record_experiment_results(
     output_directory, 
     optimizer_instance, 
     experiment_start_time,
     s_range, w_range, l_range, height_range,
-    generations_processed
+    generations_processed,
+    plot_worker=None,
+    telemetry=None,
+    backend='lumerical'
 ):
     """
     Registra os resultados atuais do experimento em arquivos JSON e PNG.
     Os nomes dos arquivos são baseados no timestamp de início do experimento,
     permitindo que sejam sobrescritos durante a execução para salvar o progresso.
+
+    Se 'plot_worker' (PlotWorker) for informado, o gráfico de fitness é
+    desenhado em segundo plano e esta função retorna logo após salvar o JSON.
+    Se 'telemetry' (RunTelemetry) for informado, o resumo dos tempos por fase
+    e por job das gerações concluídas é incluído no JSON. 'backend' identifica
+    de onde vieram as avaliações ('lumerical' ou 'synthetic').
     """
     # --- Gera o nome do arquivo baseado no INÍCIO do experimento ---
     # Isso garante que o nome seja o mesmo durante toda a execução.
@@ -33,6 +61,8 @@ def record_experiment_results(
         "last_update": current_time.isoformat(), # Mostra quando foi a última atualização
         "current_duration": str(duration),
         "generations_processed": generations_processed,
+        "backend": backend,
+        "optimizer": type(optimizer_instance).__name__,
         "population_size": optimizer_instance.population_size,
         "mutation_rate": optimizer_instance.mutation_rate,
         "max_generations_set": optimizer_instance.generations,
@@ -46,6 +76,8 @@ def record_experiment_results(
         },
         "fitness_history": optimizer_instance.fitness_history
     }
+    if telemetry is not None:
+        results_data["telemetry"] = telemetry.summary()
 
     # --- Salva o arquivo JSON (sobrescrevendo o anterior) ---
     try:
@@ -56,18 +88,9 @@ def record_experiment_results(
 
     # --- Plota e salva o gráfico de fitness (sobrescrevendo o anterior) ---
     if optimizer_instance.fitness_history:
-        plt.figure(figsize=(10, 6))
-        generations = range(1, len(optimizer_instance.fitness_history) + 1)
-        plt.plot(generations, optimizer_instance.fitness_history, marker='o', linestyle='-')
-        plt.title(f'Histórico de Fitness (Atualizado em: {current_time.strftime("%H:%M:%S")})')
-        plt.xlabel('Geração')
-        plt.ylabel('Melhor Delta Amplitude')
-        plt.grid(True)
-        try:
-            plt.savefig(plot_path)
-        except Exception as e:
-            print(f"!!! Erro ao salvar/atualizar gráfico de fitness: {e}")
-        finally:
-            plt.close() # Libera memória
+        if plot_worker is not None:
+            plot_worker.submit_fitness_history(list(optimizer_instance.fitness_history), plot_path, current_time)
+        else:
+            plot_fitness_history(optimizer_instance.fitness_history, plot_path, current_time)
     else:
         print("Nenhum histórico de fitness para plotar.")
\ No newline at end of file
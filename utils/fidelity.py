@@ -0,0 +1,289 @@
+# fidelity.py
+
+import os
+import math
+
+import numpy as np
+
+# Valores de run_simu_guide_fdtd.lsf: a avaliação de referência (alta fidelidade)
+HIGH_FIDELITY = {'sim_time': 1000e-15, 'points': 500, 'mesh_accuracy': 2}
+
+# Triagem barata: malha mais grossa, tempo de simulação menor e menos pontos de frequência
+LOW_FIDELITY = {'sim_time': 600e-15, 'points': 200, 'mesh_accuracy': 1}
+
+
+def apply_fidelity(fdtd, fidelity):
+    """
+    Aplica os parâmetros de fidelidade ao projeto aberto na sessão.
+
+    Deve ser chamado depois dos scripts de simulação (ou de atualização do
+    template) e antes do save, pois sobrescreve os valores definidos por eles.
+
+    Args:
+        fdtd: A sessão de simulação.
+        fidelity (dict): 'sim_time' (s), 'points' (pontos de frequência) e
+            'mesh_accuracy' (1 a 8). Chaves ausentes mantêm o valor do projeto.
+    """
+    if 'sim_time' in fidelity:
+        fdtd.setnamed("FDTD", "simulation time", fidelity['sim_time'])
+    if 'mesh_accuracy' in fidelity:
+        fdtd.setnamed("FDTD", "mesh accuracy", fidelity['mesh_accuracy'])
+    if 'points' in fidelity:
+        fdtd.setnamed("FDTD::ports", "monitor frequency points", fidelity['points'])
+        fdtd.setglobalmonitor("frequency points", fidelity['points'])
+
+
+def points_per_wavelength(mesh_accuracy):
+    # Malha automática do Lumerical: 6 pontos por comprimento de onda no nível 1, +4 por nível
+    return 4 * mesh_accuracy + 2
+
+
+def relative_cost(fidelity):
+    """
+    Custo estimado de uma simulação, relativo a uma simulação de alta fidelidade.
+
+    Na simulação 2D, o número de células cresce com o quadrado dos pontos por
+    comprimento de onda e o número de passos de tempo cresce linearmente com
+    eles (condição de Courant) e com o tempo de simulação.
+    """
+    fidelity = dict(HIGH_FIDELITY, **fidelity)
+    mesh_ratio = points_per_wavelength(fidelity['mesh_accuracy']) / points_per_wavelength(HIGH_FIDELITY['mesh_accuracy'])
+    return mesh_ratio ** 3 * fidelity['sim_time'] / HIGH_FIDELITY['sim_time']
+
+
+def fidelity_cache_settings(fidelity):
+    """
+    Configurações extras da chave do cache de avaliações para uma fidelidade.
+
+    A alta fidelidade não acrescenta nada, de modo que as avaliações já
+    guardadas no cache (feitas com os valores do script) continuam válidas.
+    """
+    if fidelity is None or dict(HIGH_FIDELITY, **fidelity) == HIGH_FIDELITY:
+        return {}
+    return {'fidelity': sorted(dict(HIGH_FIDELITY, **fidelity).items())}
+
+
+def selection_delta_amps(delta_amps, fidelities, best_fitness=None):
+    """
+    Valores usados pelo otimizador em uma geração avaliada em duas fidelidades.
+
+    Os delta_amp de triagem não são comparáveis aos de alta fidelidade: um
+    valor de triagem alto não pode virar o melhor fitness, a elite ou um ponto
+    do histórico. Os valores de baixa fidelidade são deslocados para baixo do
+    menor valor de alta fidelidade da geração (e do melhor fitness anterior,
+    se informado), mantendo a ordem entre eles; os de alta fidelidade e as
+    falhas (-inf) não mudam.
+
+    Args:
+        delta_amps (list): Os valores de MultiFidelityScheduler.evaluate_generation.
+        fidelities (list): A fidelidade de cada valor ('low' ou 'high').
+        best_fitness (float): Opcional. O melhor fitness do otimizador antes desta geração.
+
+    Returns:
+        Uma nova lista de delta_amp, na ordem da população.
+    """
+    values = np.asarray(delta_amps, dtype=float)
+    is_high = np.array([fidelity == 'high' for fidelity in fidelities]) & np.isfinite(values)
+    is_low = ~is_high & np.isfinite(values)
+    ceilings = values[is_high].tolist()
+    if best_fitness is not None and np.isfinite(best_fitness):
+        ceilings.append(best_fitness)
+    if not ceilings or not is_low.any():
+        return values.tolist()
+    ceiling = min(ceilings)
+    highest_low = values[is_low].max()
+    if highest_low < ceiling:
+        return values.tolist()
+    margin = 1e-6 * max(abs(ceiling), 1.0)
+    values[is_low] -= highest_low - ceiling + margin
+    return values.tolist()
+
+
+class MultiFidelityScheduler:
+    """
+    Avaliação de uma geração em duas fidelidades.
+
+    Todos os cromossomos distintos são simulados primeiro em baixa fidelidade;
+    apenas a fração 'promote_fraction' com os maiores delta_amp é simulada de
+    novo em alta fidelidade. Os promovidos ficam com o delta_amp de alta fidelidade e
+    os demais com o da triagem; a fidelidade de origem de cada valor é
+    devolvida junto, para ser registrada com o resultado. O otimizador deve
+    receber os valores de selection_delta_amps, não os registrados.
+
+    'evaluations' conta as simulações que de fato chegaram ao solver em cada
+    fidelidade (sem acertos do cache nem cópias), como informado por 'evaluate'.
+
+    Args:
+        low_fidelity (dict): Parâmetros da triagem (ver apply_fidelity).
+        high_fidelity (dict): Parâmetros da avaliação completa.
+        promote_fraction (float): Fração da geração promovida para alta fidelidade.
+        min_promoted (int): Número mínimo de promovidos por geração.
+    """
+
+    def __init__(self, low_fidelity=LOW_FIDELITY, high_fidelity=HIGH_FIDELITY,
+                 promote_fraction=0.25, min_promoted=1):
+        self.levels = {'low': dict(low_fidelity), 'high': dict(high_fidelity)}
+        self.promote_fraction = promote_fraction
+        self.min_promoted = min_promoted
+        self.evaluations = {'low': 0, 'high': 0}
+        self.history = []
+
+    def n_promoted(self, population_size):
+        n = max(self.min_promoted, math.ceil(self.promote_fraction * population_size))
+        return min(n, population_size)
+
+    def evaluate_generation(self, population, evaluate):
+        """
+        Avalia uma população em baixa fidelidade e promove os melhores.
+
+        Cromossomos repetidos na população (elite, cópias, migrantes) são
+        triados e promovidos uma única vez: cada cromossomo distinto ocupa uma
+        só vaga de promoção, e todas as cópias recebem o mesmo valor.
+
+        Args:
+            population (list): Os cromossomos da geração.
+            evaluate (callable): evaluate(cromossomos, nome_da_fidelidade, parâmetros)
+                retorna (lista de delta_amp dos cromossomos, -inf para falhas; número
+                de simulações executadas, sem contar os resultados vindos do cache).
+
+        Returns:
+            Uma tupla (delta_amps, fidelidades), na ordem da população, com
+            'low' ou 'high' indicando de qual simulação veio cada delta_amp.
+        """
+        from utils.job_manager import job_id
+
+        indices_by_job_id = {}
+        for i, chromosome in enumerate(population):
+            indices_by_job_id.setdefault(job_id(chromosome), []).append(i)
+        groups = list(indices_by_job_id.values())
+        distinct = [population[indices[0]] for indices in groups]
+
+        low_results, low_solves = evaluate(distinct, 'low', self.levels['low'])
+        low_results = np.asarray(low_results, dtype=float)
+        self.evaluations['low'] += low_solves
+
+        # Falhas da triagem não são promovidas; -inf fica no fim da ordenação
+        order = np.argsort(-np.nan_to_num(low_results, nan=-np.inf), kind='stable')
+        promoted = [int(k) for k in order[:self.n_promoted(len(distinct))] if np.isfinite(low_results[k])]
+
+        distinct_delta_amps = [float(d) for d in low_results]
+        distinct_fidelities = ['low'] * len(distinct)
+        if promoted:
+            high_results, high_solves = evaluate([distinct[k] for k in promoted], 'high', self.levels['high'])
+            self.evaluations['high'] += high_solves
+            for k, delta_amp in zip(promoted, high_results):
+                distinct_delta_amps[k] = delta_amp
+                distinct_fidelities[k] = 'high'
+
+        delta_amps = [None] * len(population)
+        fidelities = [None] * len(population)
+        for k, indices in enumerate(groups):
+            for i in indices:
+                delta_amps[i] = distinct_delta_amps[k]
+                fidelities[i] = distinct_fidelities[k]
+
+        self.history.append({
+            'screened': len(distinct),
+            'promoted': len(promoted),
+            'low_best': float(low_results[promoted[0]]) if promoted else -float('inf'),
+            'high_best': max((distinct_delta_amps[k] for k in promoted), default=-float('inf')),
+        })
+        return delta_amps, fidelities
+
+    @property
+    def estimated_cost(self):
+        """Custo das avaliações feitas, em simulações de alta fidelidade equivalentes."""
+        return sum(self.evaluations[name] * relative_cost(self.levels[name]) for name in self.levels)
+
+    def savings(self):
+        """
+        Fração do custo economizada em relação a avaliar todos em alta fidelidade.
+
+        A referência é fazer em alta fidelidade cada simulação de triagem executada.
+        """
+        full_cost = self.evaluations['low'] * relative_cost(self.levels['high'])
+        if full_cost == 0:
+            return 0.0
+        return 1.0 - self.estimated_cost / full_cost
+
+
+def compare_fidelity_strategies(population_size=30, num_generations=15, promote_fraction=0.25,
+                                low_fidelity=LOW_FIDELITY, seed=0, work_directory='fidelity_benchmark'):
+    """
+    Compara, com o backend sintético, a otimização com todos os indivíduos em
+    alta fidelidade e a otimização multi-fidelidade, com a mesma semente.
+
+    O custo é o acumulado pelo backend (em simulações de alta fidelidade
+    equivalentes) e o melhor fitness é sempre o de uma simulação de alta
+    fidelidade, de modo que as duas estratégias são comparáveis.
+
+    Returns:
+        Um dicionário {estratégia: {'cost', 'best_fitness', 'trajectory'}}, com
+        'trajectory' a lista de (custo acumulado, melhor fitness) por geração.
+    """
+    import io
+    import shutil
+    import contextlib
+
+    from utils.genetic import GeneticOptimizer
+    from utils.simulation_backend import SyntheticBackend
+    from utils.lumerical_workflow import iter_generation_results
+
+    resources_directory = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "resources")
+    geometry_lsf_path = os.path.join(resources_directory, "create_guide_fdtd.lsf")
+    simulation_lsf_path = os.path.join(resources_directory, "run_simu_guide_fdtd.lsf")
+    work_directory = os.path.abspath(work_directory)
+    temp_directory = os.path.join(work_directory, "temp")
+    os.makedirs(temp_directory, exist_ok=True)
+    fsp_base_path = os.path.join(work_directory, "base.fsp")
+
+    results = {}
+    for strategy in ('high', 'multi'):
+        backend = SyntheticBackend(max_concurrent_jobs=8, seed=seed)
+        backend.save(fsp_base_path)
+        optimizer = GeneticOptimizer(population_size, 0.2, num_generations, (0.1e-6, 0.25e-6),
+                                     (0.3e-6, 0.7e-6), (0.1e-6, 0.25e-6), (0.15e-6, 0.3e-6), seed=seed)
+        optimizer.initialize_population()
+        population = optimizer.population
+        scheduler = MultiFidelityScheduler(low_fidelity, promote_fraction=promote_fraction)
+
+        def evaluate(chromosomes, fidelity_name='high', fidelity=HIGH_FIDELITY):
+            delta_amps = [None] * len(chromosomes)
+            for index, _, delta_amp in iter_generation_results(
+                backend, chromosomes, fsp_base_path, geometry_lsf_path, simulation_lsf_path,
+                work_directory, temp_directory, fidelity=fidelity
+            ):
+                delta_amps[index] = delta_amp
+            if fidelity_name == 'high':
+                evaluate.best = max([evaluate.best] + delta_amps)
+            return delta_amps, len(chromosomes)
+
+        evaluate.best = -float('inf')
+        trajectory = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(num_generations):
+                if strategy == 'high':
+                    delta_amps, _ = evaluate(population)
+                else:
+                    delta_amps, fidelities = scheduler.evaluate_generation(population, evaluate)
+                    delta_amps = selection_delta_amps(delta_amps, fidelities, optimizer.best_fitness)
+                trajectory.append((backend.solver_cost, evaluate.best))
+                population = optimizer.evolve(delta_amps)
+        results[strategy] = {'cost': backend.solver_cost, 'best_fitness': evaluate.best, 'trajectory': trajectory}
+
+    shutil.rmtree(work_directory, ignore_errors=True)
+
+    # Melhor fitness da estratégia de alta fidelidade com o mesmo custo gasto pela multi-fidelidade
+    multi_cost = results['multi']['cost']
+    best_at_multi_cost = max((best for cost, best in results['high']['trajectory'] if cost <= multi_cost),
+                             default=-float('inf'))
+    for strategy, label in (('high', "só alta fidelidade"), ('multi', "multi-fidelidade")):
+        print(f"  [Fidelidade] {label:>18}: custo {results[strategy]['cost']:7.1f} simulações completas, "
+              f"melhor fitness {results[strategy]['best_fitness']:.4e}")
+    print(f"  [Fidelidade] Só alta fidelidade com o custo da multi-fidelidade: melhor fitness {best_at_multi_cost:.4e}")
+    return results
+
+
+if __name__ == '__main__':
+    print("Comparando avaliação em alta fidelidade e multi-fidelidade com o backend sintético...")
+    compare_fidelity_strategies()
@@ -0,0 +1,221 @@
+# fitness_cache.py
+
+import os
+import csv
+import glob
+import math
+import time
+import json
+import sqlite3
+import hashlib
+
+PARAM_NAMES = ('s', 'w', 'l', 'height')
+
+
+def simulation_settings_key(*script_paths, **settings):
+    """
+    Gera uma chave que identifica as configurações de simulação.
+
+    A chave combina o conteúdo dos scripts LSF e do projeto base com quaisquer
+    configurações adicionais (backend, monitor, ...). Alterar um desses
+    arquivos invalida o cache.
+
+    Args:
+        *script_paths: Caminhos dos scripts LSF e do projeto base usados na preparação dos jobs.
+        **settings: Configurações adicionais que afetam o resultado da simulação.
+
+    Returns:
+        Uma string hexadecimal curta.
+    """
+    digest = hashlib.sha1()
+    for path in script_paths:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    digest.update(json.dumps(settings, sort_keys=True, default=str).encode())
+    return digest.hexdigest()[:16]
+
+
+class FitnessCache:
+    """
+    Cache persistente (SQLite) de avaliações de cromossomos.
+
+    As entradas são indexadas pelo cromossomo quantizado e pela chave das
+    configurações de simulação, de modo que o mesmo arquivo pode ser
+    compartilhado entre execuções. Quando o número de entradas passa de
+    'max_entries', as menos usadas recentemente são removidas.
+
+    Args:
+        db_path (str): Caminho do arquivo SQLite.
+        settings_key (str): Chave das configurações de simulação (ver simulation_settings_key).
+        quantum (float): Resolução, em metros, usada para quantizar os parâmetros.
+        max_entries (int): Número máximo de avaliações mantidas no cache.
+    """
+
+    def __init__(self, db_path, settings_key, quantum=1e-10, max_entries=200000):
+        self.db_path = db_path
+        self.settings_key = settings_key
+        self.quantum = quantum
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS evaluations (
+                settings_key TEXT NOT NULL,
+                chromosome_key TEXT NOT NULL,
+                s REAL, w REAL, l REAL, height REAL,
+                delta_amp REAL NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (settings_key, chromosome_key)
+            );
+            CREATE INDEX IF NOT EXISTS idx_evaluations_access ON evaluations (last_access);
+            CREATE TABLE IF NOT EXISTS seeded_files (
+                path TEXT PRIMARY KEY,
+                mtime REAL,
+                size INTEGER
+            );
+        """)
+        self._conn.commit()
+
+    def chromosome_key(self, chromosome):
+        return '_'.join(str(int(round(chromosome[p] / self.quantum))) for p in PARAM_NAMES)
+
+    def get(self, chromosome):
+        """Retorna o delta_amp armazenado para o cromossomo ou None."""
+        return self.get_many([chromosome])[0]
+
+    def get_many(self, chromosomes):
+        """
+        Consulta o cache para uma lista de cromossomos.
+
+        Returns:
+            Uma lista, na mesma ordem, com o delta_amp de cada cromossomo ou None.
+        """
+        results = []
+        now = time.time()
+        found_keys = []
+        for chromosome in chromosomes:
+            key = self.chromosome_key(chromosome)
+            row = self._conn.execute(
+                "SELECT delta_amp FROM evaluations WHERE settings_key = ? AND chromosome_key = ?",
+                (self.settings_key, key)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                results.append(None)
+            else:
+                self.hits += 1
+                found_keys.append((now, self.settings_key, key))
+                results.append(row[0])
+        if found_keys:
+            self._conn.executemany(
+                "UPDATE evaluations SET last_access = ? WHERE settings_key = ? AND chromosome_key = ?",
+                found_keys
+            )
+            self._conn.commit()
+        return results
+
+    def put(self, chromosome, delta_amp):
+        self.put_many([chromosome], [delta_amp])
+
+    def put_many(self, chromosomes, delta_amps, replace=True):
+        """
+        Armazena avaliações no cache. Resultados -inf/NaN (falhas) não são guardados.
+        Retorna o número de avaliações efetivamente gravadas.
+
+        Args:
+            chromosomes (list): Lista de dicionários com os parâmetros.
+            delta_amps (list): Lista de delta_amp correspondentes.
+            replace (bool): Se False, mantém a avaliação já existente para o mesmo cromossomo.
+        """
+        now = time.time()
+        rows = []
+        for chromosome, delta_amp in zip(chromosomes, delta_amps):
+            if delta_amp is None or math.isinf(delta_amp) or math.isnan(delta_amp):
+                continue
+            rows.append((self.settings_key, self.chromosome_key(chromosome),
+                         chromosome['s'], chromosome['w'], chromosome['l'], chromosome['height'],
+                         float(delta_amp), now))
+        if not rows:
+            return 0
+        verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+        changes_before = self._conn.total_changes
+        self._conn.executemany(
+            f"{verb} INTO evaluations (settings_key, chromosome_key, s, w, l, height, delta_amp, last_access) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            rows
+        )
+        self._conn.commit()
+        stored = self._conn.total_changes - changes_before
+        self.evict()
+        return stored
+
+    def evict(self):
+        """Remove as entradas menos usadas recentemente que excedem 'max_entries'."""
+        excess = len(self) - self.max_entries
+        if excess <= 0:
+            return 0
+        self._conn.execute(
+            "DELETE FROM evaluations WHERE rowid IN "
+            "(SELECT rowid FROM evaluations ORDER BY last_access ASC LIMIT ?)",
+            (excess,)
+        )
+        self._conn.commit()
+        return excess
+
+    def seed_from_csv(self, csv_paths, backend='lumerical'):
+        """
+        Importa avaliações de arquivos full_optimization_data_*.csv.
+
+        Cada arquivo só é lido novamente se seu tamanho ou data de modificação
+        mudarem. Avaliações já presentes no cache não são sobrescritas. Linhas
+        de triagem em baixa fidelidade (coluna 'fidelity' = 'low') e linhas de
+        outro backend (coluna 'backend', ex.: 'synthetic') são ignoradas; CSVs
+        sem a coluna 'backend' são anteriores a ela e vêm do FDTD real.
+
+        Args:
+            csv_paths: Lista de caminhos ou um padrão glob.
+            backend (str): O backend cujas avaliações são importadas.
+
+        Returns:
+            O número de linhas importadas.
+        """
+        if isinstance(csv_paths, str):
+            csv_paths = sorted(glob.glob(csv_paths))
+
+        imported = 0
+        for csv_path in csv_paths:
+            stat = os.stat(csv_path)
+            row = self._conn.execute(
+                "SELECT mtime, size FROM seeded_files WHERE path = ?", (os.path.abspath(csv_path),)
+            ).fetchone()
+            if row is not None and row[0] == stat.st_mtime and row[1] == stat.st_size:
+                continue
+
+            chromosomes = []
+            delta_amps = []
+            with open(csv_path, 'r', newline='') as f:
+                for record in csv.DictReader(f):
+                    if record.get('fidelity') not in (None, '', 'high'):
+                        continue
+                    if (record.get('backend') or 'lumerical') != backend:
+                        continue
+                    try:
+                        chromosomes.append({p: float(record[p]) for p in PARAM_NAMES})
+                        delta_amps.append(float(record['delta_amp']))
+                    except (KeyError, ValueError):
+                        continue
+            imported += self.put_many(chromosomes, delta_amps, replace=False)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO seeded_files (path, mtime, size) VALUES (?, ?, ?)",
+                (os.path.abspath(csv_path), stat.st_mtime, stat.st_size)
+            )
+            self._conn.commit()
+        return imported
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM evaluations").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
@@ -1,9 +1,21 @@
-import random
 import numpy as np
 
 class GeneticOptimizer:
+    """
+    Algoritmo genético sobre os parâmetros do guia (s, w, l, height).
+
+    A população é armazenada em arrays: 'genes' (N x n_parâmetros, na ordem de
+    'param_names') e 'fitness' (N, NaN para indivíduos ainda não avaliados).
+    Seleção por torneio, cruzamento de um ponto, mutação e limitação aos
+    ranges são feitos em lote sobre esses arrays. 'population' continua
+    disponível como lista de dicionários para o main.py e os relatórios.
+
+    Args:
+        seed (int): Opcional. Semente do gerador de números aleatórios (numpy).
+    """
+
     def __init__(self, population_size, mutation_rate, generations, # 'generations' já está ok
-                 s_range, w_range, l_range, height_range):
+                 s_range, w_range, l_range, height_range, seed=None):
         self.population_size = population_size
         self.mutation_rate = mutation_rate
         self.generations = generations # Nome da variável para o número máximo de gerações
@@ -13,11 +25,22 @@ class GeneticOptimizer:
             'l': l_range,
             'height': height_range
         }
-        self.population = []
+        self.param_names = list(self.param_ranges.keys())
+        self._lower = np.array([self.param_ranges[p][0] for p in self.param_names], dtype=float)
+        self._upper = np.array([self.param_ranges[p][1] for p in self.param_names], dtype=float)
+        self.rng = np.random.default_rng(seed)
+
+        self.genes = np.empty((0, len(self.param_names)))
+        self.fitness = np.empty(0)
         self.best_individual = None
         self.best_fitness = -float('inf')
         self.fitness_history = [] # <--- NOVO: Inicializa o histórico de fitness
 
+        # Estado do modo steady-state (ask/tell)
+        self.evaluations = 0
+        self._steady_state = False
+        self._unevaluated = np.empty((0, len(self.param_names)))
+
         self.reference_params = {
             's': 0.15e-6,
             'w': 0.5e-6,
@@ -35,6 +58,54 @@ class GeneticOptimizer:
             param: (self.param_ranges[param][1] - self.param_ranges[param][0]) * 0.05
             for param in self.param_ranges
         }
+        self._reference = np.array([self.reference_params[p] for p in self.param_names])
+        self._reference_amplitude = np.array([self.initial_mutation_amplitude[p] for p in self.param_names])
+        self._local_step = np.array([self.local_mutation_step[p] for p in self.param_names])
+
+
+    # --- Conversão entre arrays e dicionários ---
+
+    def _to_dicts(self, genes, fitness=None):
+        rows = genes.tolist()
+        if fitness is None:
+            return [dict(zip(self.param_names, row)) for row in rows]
+        population = []
+        for row, value in zip(rows, fitness.tolist()):
+            individual = dict(zip(self.param_names, row))
+            if not np.isnan(value):
+                individual['fitness'] = value
+            population.append(individual)
+        return population
+
+
+    def _to_array(self, chromosomes):
+        if isinstance(chromosomes, np.ndarray):
+            return chromosomes.reshape(-1, len(self.param_names)).astype(float)
+        return np.array([[c[p] for p in self.param_names] for c in chromosomes],
+                        dtype=float).reshape(-1, len(self.param_names))
+
+
+    def _fitness_of(self, chromosomes):
+        return np.array([c.get('fitness', np.nan) for c in chromosomes], dtype=float)
+
+
+    @property
+    def population(self):
+        """A população atual como lista de dicionários (cópia; 'fitness' só nos avaliados)."""
+        return self._to_dicts(self.genes, self.fitness)
+
+
+    @population.setter
+    def population(self, chromosomes):
+        self.genes = self._to_array(chromosomes)
+        self.fitness = self._fitness_of(chromosomes) if len(chromosomes) else np.empty(0)
+
+
+    # --- Operadores em lote ---
+
+    def constrain(self, genes):
+        """Limita cada coluna de 'genes' ao range do parâmetro correspondente."""
+        return np.clip(genes, self._lower, self._upper)
 
 
     def _constrain_param(self, param_name, value):
@@ -42,31 +113,29 @@ class GeneticOptimizer:
         return max(min_val, min(max_val, value))
 
 
-    def create_chromosome(self, reference_based=False):
-        chromosome = {}
+    def create_chromosomes(self, n, reference_based=False):
         if reference_based:
-            for param, ref_val in self.reference_params.items():
-                variation_amplitude = self.initial_mutation_amplitude[param]
-                val = random.uniform(ref_val - variation_amplitude, ref_val + variation_amplitude)
-                chromosome[param] = self._constrain_param(param, val)
-        else:
-            for param in self.param_ranges:
-                chromosome[param] = random.uniform(*self.param_ranges[param])
-        return chromosome
+            genes = self.rng.uniform(self._reference - self._reference_amplitude,
+                                     self._reference + self._reference_amplitude,
+                                     size=(n, len(self.param_names)))
+            return self.constrain(genes)
+        return self.rng.uniform(self._lower, self._upper, size=(n, len(self.param_names)))
+
+
+    def create_chromosome(self, reference_based=False):
+        return self._to_dicts(self.create_chromosomes(1, reference_based))[0]
 
 
     def initialize_population(self):
-        self.population = []
         num_ref_based = self.population_size // 2  # Metade da população baseada em referência
         num_random = self.population_size - num_ref_based # A outra metade aleatória
 
-        for _ in range(num_ref_based):
-            self.population.append(self.create_chromosome(reference_based=True))
-
-        for _ in range(num_random):
-            self.population.append(self.create_chromosome(reference_based=False))
-
-        random.shuffle(self.population)
+        genes = np.vstack([
+            self.create_chromosomes(num_ref_based, reference_based=True),
+            self.create_chromosomes(num_random, reference_based=False)
+        ])
+        self.genes = genes[self.rng.permutation(len(genes))]
+        self.fitness = np.full(len(self.genes), np.nan)
 
 
     def calculate_fitness(self, delta_amp):
@@ -75,99 +144,224 @@ class GeneticOptimizer:
         return delta_amp
 
 
-    def select_parents(self):
-        pool = random.sample(self.population, min(5, len(self.population)))
-        parent1 = max(pool, key=lambda x: x.get('fitness', -float('inf')))
+    def calculate_fitness_batch(self, delta_amps):
+        fitness = np.asarray(delta_amps, dtype=float).copy()
+        fitness[~np.isfinite(fitness)] = -np.inf
+        return fitness
+
+
+    def select_parent_indices(self, n, fitness, tournament_size=5):
+        """
+        Seleção por torneio em lote: 'n' torneios, cada um com até
+        'tournament_size' indivíduos distintos sorteados.
 
-        pool = random.sample(self.population, min(5, len(self.population)))
-        parent2 = max(pool, key=lambda x: x.get('fitness', -float('inf')))
+        Returns:
+            Os índices dos vencedores (indivíduos não avaliados contam como -inf).
+        """
+        size = len(fitness)
+        k = min(tournament_size, size)
+        # Amostragem sem reposição por linha (algoritmo de Floyd), em O(n * k²) para qualquer N
+        contestants = np.empty((n, k), dtype=np.int64)
+        for column, j in enumerate(range(size - k, size)):
+            draw = self.rng.integers(0, j + 1, size=n)
+            repeated = (contestants[:, :column] == draw[:, None]).any(axis=1)
+            contestants[:, column] = np.where(repeated, j, draw)
+        scores = np.nan_to_num(fitness, nan=-np.inf)[contestants]
+        return contestants[np.arange(n), np.argmax(scores, axis=1)]
 
+
+    def select_parents(self, candidates=None):
+        if candidates is None:
+            genes, fitness = self.genes, self.fitness
+        else:
+            genes, fitness = self._to_array(candidates), self._fitness_of(candidates)
+        winners = self.select_parent_indices(2, fitness)
+        parent1, parent2 = self._to_dicts(genes[winners], fitness[winners])
         return parent1, parent2
 
 
-    def crossover(self, parent1, parent2):
-        child1 = {}
-        child2 = {}
-        keys = list(self.param_ranges.keys())
-        crossover_point = random.randint(1, len(keys) - 1)
-
-        for i, key in enumerate(keys):
-            if i < crossover_point:
-                child1[key] = parent1[key]
-                child2[key] = parent2[key]
-            else:
-                child1[key] = parent2[key]
-                child2[key] = parent1[key]
-        
+    def crossover_batch(self, parents1, parents2):
+        """Cruzamento de um ponto, com um ponto sorteado por par de pais."""
+        n, n_params = parents1.shape
+        crossover_points = self.rng.integers(1, n_params, size=(n, 1))
+        from_first = np.arange(n_params) < crossover_points
+        child1 = np.where(from_first, parents1, parents2)
+        child2 = np.where(from_first, parents2, parents1)
         return child1, child2
 
 
-    def mutate(self, chromosome, mutation_type='local'):
-        if random.random() < self.mutation_rate:
-            param_to_mutate = random.choice(list(self.param_ranges.keys()))
-            param_range = self.param_ranges[param_to_mutate]
-            current_val = chromosome[param_to_mutate]
-
-            if mutation_type == 'local':
-                mutation_step = self.local_mutation_step[param_to_mutate]
-                new_val = current_val + random.uniform(-mutation_step, mutation_step)
-            elif mutation_type == 'global':
-                new_val = random.uniform(*param_range)
-            else: # Fallback to local if unknown type
-                mutation_step = self.local_mutation_step[param_to_mutate]
-                new_val = current_val + random.uniform(-mutation_step, mutation_step)
-            
-            chromosome[param_to_mutate] = self._constrain_param(param_to_mutate, new_val)
-        return chromosome
-
-
-    def evolve(self, current_generation_delta_amps):
-            if len(current_generation_delta_amps) != len(self.population):
-                raise ValueError("O número de resultados de delta_amp não corresponde ao tamanho da população.")
+    def crossover(self, parent1, parent2):
+        child1, child2 = self.crossover_batch(self._to_array([parent1]), self._to_array([parent2]))
+        return self._to_dicts(child1)[0], self._to_dicts(child2)[0]
+
+
+    def mutate_batch(self, genes, mutation_type=None):
+        """
+        Mutação em lote: cada cromossomo sofre, com probabilidade 'mutation_rate',
+        a mutação de um parâmetro sorteado. A mutação local soma um passo
+        uniforme de até 5% do range; a global sorteia um valor no range. Se
+        'mutation_type' não for informado, cada cromossomo sorteia o tipo (50%/50%).
+        """
+        genes = genes.copy()
+        n, n_params = genes.shape
+        if mutation_type is None:
+            is_local = self.rng.random(n) < 0.5 # 50% de chance para cada tipo de mutação
+        else:
+            is_local = np.full(n, mutation_type != 'global')
+        mutated = np.flatnonzero(self.rng.random(n) < self.mutation_rate)
+        params = self.rng.integers(0, n_params, size=len(mutated))
 
-            current_generation_best_individual = None
-            current_generation_best_fitness = -float('inf')
+        local = is_local[mutated]
+        steps = self._local_step[params]
+        local_values = genes[mutated, params] + self.rng.uniform(-steps, steps)
+        global_values = self.rng.uniform(self._lower[params], self._upper[params])
+        genes[mutated, params] = np.where(local, local_values, global_values)
+        return self.constrain(genes)
 
-            for i, individual in enumerate(self.population):
-                individual_fitness = self.calculate_fitness(current_generation_delta_amps[i])
-                individual['fitness'] = individual_fitness
 
-                # 1. Encontra o melhor indivíduo da GERAÇÃO ATUAL
-                if individual_fitness > current_generation_best_fitness:
-                    current_generation_best_fitness = individual_fitness
-                    current_generation_best_individual = individual
+    def mutate(self, chromosome, mutation_type='local'):
+        return self._to_dicts(self.mutate_batch(self._to_array([chromosome]), mutation_type))[0]
+
+
+    def breed_children(self, n, genes=None, fitness=None):
+        """
+        Gera 'n' filhos em lote: torneio, cruzamento de um ponto (um dos dois
+        filhos de cada par, sorteado) e mutação local ou global.
+
+        Returns:
+            Um array (n x n_parâmetros) com os filhos.
+        """
+        if genes is None:
+            genes, fitness = self.genes, self.fitness
+        parents = self.select_parent_indices(2 * n, fitness)
+        child1, child2 = self.crossover_batch(genes[parents[:n]], genes[parents[n:]])
+        children = np.where(self.rng.random((n, 1)) < 0.5, child1, child2)
+        return self.mutate_batch(children)
+
+
+    def breed_child(self, candidates=None):
+        if candidates is None:
+            return self._to_dicts(self.breed_children(1))[0]
+        children = self.breed_children(1, self._to_array(candidates), self._fitness_of(candidates))
+        return self._to_dicts(children)[0]
+
+
+    def _update_best(self, genes, fitness):
+        if len(fitness) == 0:
+            return
+        best = int(np.argmax(fitness))
+        if fitness[best] > self.best_fitness:
+            self.best_fitness = float(fitness[best])
+            self.best_individual = dict(zip(self.param_names, genes[best].tolist()))
+            self.best_individual['fitness'] = self.best_fitness
+
+
+    def ask(self, n=1):
+        """
+        Modo steady-state: retorna 'n' novos cromossomos para avaliar.
+
+        Enquanto houver cromossomos da população inicial ainda não entregues,
+        eles são retornados primeiro. Depois, cada filho é gerado por seleção
+        por torneio entre os indivíduos já avaliados, sem esperar por uma
+        geração completa.
+
+        Returns:
+            Uma lista de dicionários com os parâmetros de cada cromossomo.
+        """
+        if not self._steady_state:
+            # A população inicial passa a ser a fila de cromossomos a entregar
+            self._steady_state = True
+            self._unevaluated = self.genes
+            self.genes = np.empty((0, len(self.param_names)))
+            self.fitness = np.empty(0)
+
+        queued = self._unevaluated[:n]
+        self._unevaluated = self._unevaluated[n:]
+        missing = n - len(queued)
+        if missing == 0:
+            new_genes = queued
+        elif len(self.genes):
+            new_genes = np.vstack([queued, self.breed_children(missing)])
+        else:
+            # Mais trabalhadores do que a população inicial: completa com cromossomos aleatórios
+            new_genes = np.vstack([queued, self.create_chromosomes(missing)])
+        return self._to_dicts(new_genes)
+
+
+    def tell(self, chromosomes, delta_amps):
+        """
+        Modo steady-state: incorpora os resultados de cromossomos avaliados.
+
+        Cada indivíduo entra na população enquanto ela não estiver cheia; depois
+        substitui o pior indivíduo, se for melhor que ele. Como o pior nunca é
+        o melhor global, o elitismo é mantido. O histórico de fitness recebe
+        um ponto a cada 'population_size' avaliações, equivalente a uma geração.
+        """
+        if len(chromosomes) != len(delta_amps):
+            raise ValueError("O número de resultados de delta_amp não corresponde ao número de cromossomos.")
+        if len(chromosomes) == 0:
+            return
+
+        genes = self._to_array(chromosomes)
+        fitness = self.calculate_fitness_batch(delta_amps)
+
+        # Histórico: o melhor fitness global no instante de cada múltiplo de 'population_size'
+        running_best = np.maximum.accumulate(np.concatenate([[self.best_fitness], fitness]))[1:]
+        counts = self.evaluations + np.arange(1, len(fitness) + 1)
+        self.fitness_history.extend(running_best[counts % self.population_size == 0].tolist())
+        self.evaluations += len(fitness)
+        self._update_best(genes, fitness)
+
+        # Substituir o pior sucessivamente (só se o novo for estritamente melhor) equivale a
+        # manter os 'population_size' melhores da união, com empates favorecendo os mais antigos
+        all_genes = np.vstack([self.genes, genes])
+        all_fitness = np.concatenate([self.fitness, fitness])
+        if len(all_fitness) > self.population_size:
+            keep = np.sort(np.argsort(-all_fitness, kind='stable')[:self.population_size])
+            all_genes, all_fitness = all_genes[keep], all_fitness[keep]
+        self.genes, self.fitness = all_genes, all_fitness
+
+
+    def evolve(self, current_generation_delta_amps, offspring_selector=None):
+            """
+            Avalia a geração atual e gera a próxima população.
+
+            Args:
+                current_generation_delta_amps (list): delta_amp de cada indivíduo, na ordem da população.
+                offspring_selector (callable): Opcional. Se informado, são gerados
+                    'offspring_selector.oversample_factor' vezes mais filhos do que o
+                    necessário e offspring_selector(candidatos, n) escolhe os n que
+                    serão simulados (ex.: SurrogateScreener).
+            """
+            if len(current_generation_delta_amps) != len(self.genes):
+                raise ValueError("O número de resultados de delta_amp não corresponde ao tamanho da população.")
 
-                # Atualiza o melhor indivíduo GLOBAL, se o atual for melhor
-                if individual_fitness > self.best_fitness:
-                    self.best_fitness = individual_fitness
-                    self.best_individual = {k: individual[k] for k in self.param_ranges.keys()}
-                    self.best_individual['fitness'] = self.best_fitness
+            self.fitness = self.calculate_fitness_batch(current_generation_delta_amps)
+
+            # Atualiza o melhor indivíduo GLOBAL, se o melhor da geração atual for melhor
+            self._update_best(self.genes, self.fitness)
 
             self.fitness_history.append(self.best_fitness) # Usa o melhor fitness GLOBAL
+            self.evaluations += len(current_generation_delta_amps)
 
-            # 2. IMPLEMENTAÇÃO DO ELITISMO - Garante que o melhor indivíduo global sempre sobreviva.
-            new_population = []
+            # IMPLEMENTAÇÃO DO ELITISMO - Garante que o melhor indivíduo global sempre sobreviva.
+            new_genes = []
             if self.best_individual:
-                elite_chromosome = {k: self.best_individual[k] for k in self.param_ranges.keys()}
-                new_population.append(elite_chromosome)
+                new_genes.append(self._to_array([self.best_individual]))
 
             # Preenche o restante da nova população
-            num_to_generate = self.population_size - len(new_population)
-            
-            # A lógica de geração de filhos e mutação (local/global) permanece a mesma
-            for _ in range(num_to_generate):
-                parent1, parent2 = self.select_parents()
-                child = random.choice(self.crossover(parent1, parent2))
-                
-                # Decide se a mutação será local ou global
-                if random.random() < 0.5: # 50% de chance para cada tipo de mutação
-                    child = self.mutate(child, mutation_type='local')
-                else:
-                    child = self.mutate(child, mutation_type='global')
-
-                new_population.append(child)
-
-            random.shuffle(new_population)
-            self.population = new_population
-
-            return [{k: chrom[k] for k in self.param_ranges.keys()} for chrom in self.population]
\ No newline at end of file
+            num_to_generate = self.population_size - sum(len(g) for g in new_genes)
+
+            if offspring_selector is None:
+                new_genes.append(self.breed_children(num_to_generate))
+            else:
+                candidates = self._to_dicts(
+                    self.breed_children(num_to_generate * offspring_selector.oversample_factor)
+                )
+                new_genes.append(self._to_array(offspring_selector(candidates, num_to_generate)))
+
+            new_genes = np.vstack(new_genes)
+            self.genes = new_genes[self.rng.permutation(len(new_genes))]
+            self.fitness = np.full(len(self.genes), np.nan)
+
+            return self._to_dicts(self.genes)
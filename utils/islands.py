@@ -0,0 +1,237 @@
+# islands.py
+
+import os
+import time
+
+import numpy as np
+
+from utils.genetic import GeneticOptimizer
+
+
+class IslandModel:
+    """
+    Várias populações (ilhas) do GeneticOptimizer evoluindo em conjunto.
+
+    Cada ilha tem a sua semente e as suas configurações (ex.: taxa de
+    mutação). A população do modelo é a concatenação das populações das
+    ilhas, de modo que uma geração inteira de todas as ilhas é avaliada em
+    uma única fila de jobs. A cada 'migration_interval' gerações, os
+    'migration_size' melhores indivíduos de cada ilha migram para a ilha
+    seguinte (topologia em anel), substituindo filhos que não são a elite.
+
+    O modelo expõe a mesma interface usada pelo main.py no modo geracional
+    (population, evolve, best_individual, best_fitness, fitness_history, ...).
+
+    Args:
+        islands (list): As ilhas (instâncias de GeneticOptimizer).
+        migration_interval (int): Número de gerações entre migrações.
+        migration_size (int): Número de indivíduos que cada ilha envia por migração.
+    """
+
+    def __init__(self, islands, migration_interval=5, migration_size=2):
+        if not islands:
+            raise ValueError("O modelo de ilhas precisa de pelo menos uma ilha.")
+        self.islands = list(islands)
+        self.migration_interval = migration_interval
+        self.migration_size = migration_size
+        self.fitness_history = []
+        self.generations_evolved = 0
+        self.migrations = 0
+
+    # --- Interface do otimizador ---
+
+    @property
+    def population_size(self):
+        return sum(island.population_size for island in self.islands)
+
+    @property
+    def mutation_rate(self):
+        return [island.mutation_rate for island in self.islands]
+
+    @property
+    def generations(self):
+        return self.islands[0].generations
+
+    @generations.setter
+    def generations(self, value):
+        for island in self.islands:
+            island.generations = value
+
+    @property
+    def param_ranges(self):
+        return self.islands[0].param_ranges
+
+    @property
+    def evaluations(self):
+        return sum(island.evaluations for island in self.islands)
+
+    @property
+    def best_fitness(self):
+        return max(island.best_fitness for island in self.islands)
+
+    @property
+    def best_individual(self):
+        best_island = max(self.islands, key=lambda island: island.best_fitness)
+        return best_island.best_individual
+
+    @property
+    def population(self):
+        """A população de todas as ilhas, concatenada na ordem das ilhas."""
+        return [chromosome for island in self.islands for chromosome in island.population]
+
+    @property
+    def island_indices(self):
+        """A ilha de cada indivíduo de 'population'."""
+        return [i for i, island in enumerate(self.islands) for _ in range(len(island.genes))]
+
+    def initialize_population(self):
+        for island in self.islands:
+            island.initialize_population()
+
+    def evolve(self, current_generation_delta_amps, offspring_selector=None):
+        """
+        Evolui cada ilha com os seus resultados e aplica a migração, quando for a vez.
+
+        Args:
+            current_generation_delta_amps (list): delta_amp de cada indivíduo, na ordem de 'population'.
+            offspring_selector (callable): Opcional. Repassado ao evolve de cada ilha.
+
+        Returns:
+            A nova população de todas as ilhas (lista de dicionários).
+        """
+        if len(current_generation_delta_amps) != sum(len(island.genes) for island in self.islands):
+            raise ValueError("O número de resultados de delta_amp não corresponde ao tamanho da população.")
+
+        delta_amps = np.asarray(current_generation_delta_amps, dtype=float)
+        boundaries = np.cumsum([0] + [len(island.genes) for island in self.islands])
+        # Os emigrantes saem da população avaliada, antes de ela ser substituída pelos filhos
+        emigrants = []
+        for island, start, stop in zip(self.islands, boundaries[:-1], boundaries[1:]):
+            fitness = island.calculate_fitness_batch(delta_amps[start:stop])
+            best = np.argsort(-fitness, kind='stable')[:self.migration_size]
+            emigrants.append(island.genes[best[np.isfinite(fitness[best])]].copy())
+
+        for island, start, stop in zip(self.islands, boundaries[:-1], boundaries[1:]):
+            island.evolve(delta_amps[start:stop].tolist(), offspring_selector=offspring_selector)
+
+        self.generations_evolved += 1
+        if len(self.islands) > 1 and self.generations_evolved % self.migration_interval == 0:
+            self._migrate(emigrants)
+        self.fitness_history.append(self.best_fitness)
+        return self.population
+
+    def _migrate(self, emigrants):
+        # Topologia em anel: a ilha i recebe os emigrantes da ilha i - 1
+        for i, island in enumerate(self.islands):
+            immigrants = emigrants[i - 1]
+            if not len(immigrants):
+                continue
+            # A elite (cópia do melhor da ilha) nunca é substituída
+            elite = island._to_array([island.best_individual])[0] if island.best_individual else None
+            replaceable = [j for j in range(len(island.genes))
+                           if elite is None or not np.array_equal(island.genes[j], elite)]
+            targets = replaceable[:len(immigrants)]
+            island.genes[targets] = immigrants[:len(targets)]
+        self.migrations += 1
+        print(f"  [Ilhas] Migração {self.migrations}: {self.migration_size} indivíduo(s) por ilha (anel).")
+
+
+def create_island_model(n_islands, population_size, mutation_rates, generations,
+                        s_range, w_range, l_range, height_range,
+                        migration_interval=5, migration_size=2, seed=None):
+    """
+    Cria um IslandModel com 'n_islands' ilhas de 'population_size' indivíduos.
+
+    Args:
+        mutation_rates (float or list): Taxa de mutação de cada ilha; uma lista
+            mais curta que o número de ilhas é repetida.
+        seed (int): Opcional. A ilha i usa a semente seed + i (sementes aleatórias se None).
+    """
+    mutation_rates = np.atleast_1d(mutation_rates).tolist()
+    islands = [
+        GeneticOptimizer(population_size, mutation_rates[i % len(mutation_rates)], generations,
+                         s_range, w_range, l_range, height_range,
+                         seed=None if seed is None else seed + i)
+        for i in range(n_islands)
+    ]
+    return IslandModel(islands, migration_interval, migration_size)
+
+
+def compare_island_model(n_islands=4, population_size=10, num_generations=15, mutation_rates=(0.1, 0.2, 0.3, 0.4),
+                         max_concurrent_jobs=8, job_latency=(0.02, 0.06), seed=0,
+                         work_directory='island_benchmark'):
+    """
+    Compara, com o backend sintético, 'n_islands' execuções independentes
+    feitas uma após a outra (como hoje) com o modelo de ilhas, que submete
+    todas as populações na mesma fila de jobs.
+
+    Returns:
+        Um dicionário {estratégia: {'wall_s', 'utilization', 'best_fitness', 'trajectory'}},
+        com 'trajectory' a lista de (tempo decorrido, melhor fitness) por geração avaliada.
+    """
+    import io
+    import shutil
+    import contextlib
+
+    from utils.simulation_backend import SyntheticBackend
+    from utils.lumerical_workflow import iter_generation_results
+
+    ranges = ((0.1e-6, 0.25e-6), (0.3e-6, 0.7e-6), (0.1e-6, 0.25e-6), (0.15e-6, 0.3e-6))
+    resources_directory = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "resources")
+    geometry_lsf_path = os.path.join(resources_directory, "create_guide_fdtd.lsf")
+    simulation_lsf_path = os.path.join(resources_directory, "run_simu_guide_fdtd.lsf")
+    work_directory = os.path.abspath(work_directory)
+    temp_directory = os.path.join(work_directory, "temp")
+    os.makedirs(temp_directory, exist_ok=True)
+    fsp_base_path = os.path.join(work_directory, "base.fsp")
+
+    def run(optimizers, backend, start_time, trajectory):
+        for optimizer in optimizers:
+            optimizer.initialize_population()
+            population = optimizer.population
+            for _ in range(num_generations):
+                delta_amps = [None] * len(population)
+                for index, _, delta_amp in iter_generation_results(
+                    backend, population, fsp_base_path, geometry_lsf_path, simulation_lsf_path,
+                    work_directory, temp_directory
+                ):
+                    delta_amps[index] = delta_amp
+                population = optimizer.evolve(delta_amps)
+                best = max([optimizer.best_fitness] + [best for _, best in trajectory[-1:]])
+                trajectory.append((time.perf_counter() - start_time, best))
+
+    results = {}
+    for strategy in ('sequential', 'islands'):
+        backend = SyntheticBackend(job_latency=job_latency, max_concurrent_jobs=max_concurrent_jobs, seed=seed)
+        backend.save(fsp_base_path)
+        model = create_island_model(n_islands, population_size, mutation_rates, num_generations, *ranges, seed=seed)
+        # Execuções independentes: as mesmas ilhas, cada uma com a sua fila, uma após a outra
+        optimizers = model.islands if strategy == 'sequential' else [model]
+        trajectory = []
+        start_time = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            run(optimizers, backend, start_time, trajectory)
+        wall = time.perf_counter() - start_time
+        results[strategy] = {
+            'wall_s': wall,
+            'utilization': backend.solver_time / (max_concurrent_jobs * wall),
+            'best_fitness': trajectory[-1][1],
+            'trajectory': trajectory,
+        }
+
+    shutil.rmtree(work_directory, ignore_errors=True)
+
+    # Tempo até o melhor fitness atingido pelas duas estratégias
+    target = min(result['best_fitness'] for result in results.values())
+    for strategy, label in (('sequential', "execuções independentes"), ('islands', "modelo de ilhas")):
+        result = results[strategy]
+        time_to_target = next(elapsed for elapsed, best in result['trajectory'] if best >= target)
+        result['time_to_target_s'] = time_to_target
+        print(f"  [Ilhas] {label:>22}: {result['wall_s']:6.1f} s, utilização {result['utilization']:4.0%}, "
+              f"melhor fitness {result['best_fitness']:.4e}, {time_to_target:6.1f} s até {target:.4e}")
+    return results
+
+
+if __name__ == '__main__':
+    print("Comparando execuções independentes e o modelo de ilhas com o backend sintético...")
+    compare_island_model()
@@ -0,0 +1,650 @@
+# job_broker.py
+#
+# Avaliação distribuída entre várias máquinas por meio de um diretório compartilhado.
+#
+# O processo principal publica cada cromossomo como um arquivo em 'pending'. Os
+# workers (um por licença do solver, em qualquer máquina que enxergue o diretório)
+# tomam os jobs renomeando-os para 'leased', simulam na sua própria sessão e
+# devolvem o delta_amp e o espectro reduzido em 'done'. Cada worker grava um
+# heartbeat periódico; se ele para de avançar, os jobs do worker voltam para a fila.
+#
+# Uso do worker (a partir da raiz do projeto, em cada máquina):
+#   python -m utils.job_broker --broker-dir \\servidor\otimizacao\broker
+#   python -m utils.job_broker --broker-dir /tmp/broker --backend synthetic --jobs-per-batch 4
+
+import os
+import sys
+import json
+import time
+import uuid
+import socket
+import shutil
+import signal
+import argparse
+import threading
+import subprocess
+from collections import deque
+from concurrent.futures import Future, as_completed
+
+import numpy as np
+
+from utils.simulation_backend import create_backend
+from utils.lumerical_workflow import (
+    prepare_lumerical_job, LumericalJobTemplate, read_monitor_spectrum, exports_job_results,
+    _iter_completed_jobs, _spectrum_file_name
+)
+from utils.post_processing import delta_amp_from_spectra, write_job_result, read_job_result
+from utils.workspace import SimulationWorkspace
+from utils.telemetry import timed
+from utils.job_manager import new_job_counters
+
+PENDING_DIRECTORY_NAME = "pending"
+LEASED_DIRECTORY_NAME = "leased"
+DONE_DIRECTORY_NAME = "done"
+HEARTBEAT_DIRECTORY_NAME = "heartbeats"
+
+_PROJECT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _broker_directories(broker_directory):
+    directories = {
+        name: os.path.join(broker_directory, name)
+        for name in (PENDING_DIRECTORY_NAME, LEASED_DIRECTORY_NAME, DONE_DIRECTORY_NAME, HEARTBEAT_DIRECTORY_NAME)
+    }
+    for directory in directories.values():
+        os.makedirs(directory, exist_ok=True)
+    return directories
+
+
+def _write_json(path, data):
+    # Gravação atômica: quem lista o diretório nunca vê um arquivo pela metade
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(temp_path, path)
+
+
+def _read_json(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _lease_file_name(job_id, worker_id):
+    return f"{job_id}@{worker_id}.json"
+
+
+def _parse_lease_file_name(file_name):
+    job_id, worker_id = os.path.splitext(file_name)[0].split('@', 1)
+    return job_id, worker_id
+
+
+class JobBroker:
+    """
+    Lado do processo principal: publica jobs e recolhe os resultados dos workers.
+
+    Uma thread em segundo plano lê os resultados em 'done', acompanha os
+    heartbeats e devolve à fila os jobs de workers cujo heartbeat não avança há
+    mais de 'lease_timeout_s' segundos. O tempo é medido no relógio desta
+    máquina, de modo que diferenças entre os relógios das máquinas não importam.
+
+    Oferece a mesma interface de avaliação do SessionPool (n_workers e
+    submit_evaluation), podendo substituí-lo no modo steady-state.
+
+    O tempo limite de cada job é aplicado pelo worker, na sua sessão. Com
+    'straggler_factor', um job tomado há mais de 'straggler_factor' vezes a
+    mediana das durações recentes volta a ser publicado uma vez, para que
+    outro worker o execute em paralelo; vale o primeiro resultado.
+
+    Args:
+        broker_directory: O diretório compartilhado com os workers.
+        lease_timeout_s (float): Tempo sem heartbeat após o qual um worker é dado como perdido.
+        poll_interval_s (float): Intervalo entre as leituras do diretório.
+        job_timeout_s (float): Opcional. Tempo máximo de execução de um job no worker.
+        straggler_factor (float): Opcional. Fator sobre a mediana das durações para
+            publicar uma cópia especulativa de um job lento.
+    """
+
+    def __init__(self, broker_directory, lease_timeout_s=120.0, poll_interval_s=0.5,
+                 job_timeout_s=None, straggler_factor=None):
+        self.broker_directory = broker_directory
+        self.lease_timeout_s = lease_timeout_s
+        self.poll_interval_s = poll_interval_s
+        self.job_timeout_s = job_timeout_s
+        self.straggler_factor = straggler_factor
+        self._directories = _broker_directories(broker_directory)
+        self._session = uuid.uuid4().hex[:8]
+        self._sequence = 0
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._heartbeats = {}
+        self._leases_seen = {}
+        self.requeued_jobs = 0
+        self.results_by_worker = {}
+        self.job_counters = new_job_counters()
+        # Início de cada job (no relógio desta máquina) e o worker que o tomou primeiro
+        self._job_started = {}
+        self._speculated = set()
+        # Duração dos jobs concluídos na leva atual: uma leva começa quando um job é
+        # publicado com o broker sem jobs em aberto (ex.: a cada geração)
+        self._wave_durations = deque(maxlen=100)
+
+        # Jobs e resultados deixados por uma execução anterior não têm mais quem os espere
+        stale = 0
+        for name in (PENDING_DIRECTORY_NAME, LEASED_DIRECTORY_NAME, DONE_DIRECTORY_NAME):
+            for file_name in os.listdir(self._directories[name]):
+                _remove(os.path.join(self._directories[name], file_name))
+                stale += 1
+        if stale:
+            print(f"[Broker] {stale} arquivos de uma execução anterior removidos de {broker_directory}")
+
+        self._stop = threading.Event()
+        self._collector = threading.Thread(target=self._collect_loop, daemon=True)
+        self._collector.start()
+
+    @property
+    def n_workers(self):
+        """Número de workers ativos (pelo menos 1, para que sempre haja jobs publicados)."""
+        return max(1, len(self.live_workers()))
+
+    def live_workers(self):
+        """Retorna os identificadores dos workers cujo heartbeat avançou recentemente."""
+        now = time.monotonic()
+        with self._lock:
+            return sorted(worker_id for worker_id, (_, seen_at) in self._heartbeats.items()
+                          if now - seen_at <= self.lease_timeout_s)
+
+    def submit(self, chromosome, simulation_spectra_directory=None, fidelity=None, return_spectrum=False):
+        """
+        Publica a avaliação de um cromossomo.
+
+        Args:
+            simulation_spectra_directory: Opcional. Onde o .h5 do espectro é salvo.
+            fidelity (dict): Opcional. Parâmetros de fidelidade do job (ver utils/fidelity.py).
+            return_spectrum (bool): Se True, o espectro é devolvido em vez de salvo em um .h5.
+
+        Returns:
+            Um Future com a tupla (caminho do .h5 ou None, delta_amp, (frequências, |E|) ou None).
+        """
+        future = Future()
+        with self._lock:
+            self._sequence += 1
+            # A ordem dos nomes é a ordem de publicação: os workers tomam os jobs mais antigos primeiro
+            job_id = f"{self._session}-{self._sequence:07d}"
+            if not self._jobs:
+                self._wave_durations.clear()
+            self._jobs[job_id] = (future, simulation_spectra_directory, return_spectrum)
+        _write_json(os.path.join(self._directories[PENDING_DIRECTORY_NAME], f"{job_id}.json"), {
+            'job_id': job_id,
+            'chromosome': {name: float(value) for name, value in chromosome.items()},
+            'fidelity': fidelity,
+            'timeout_s': self.job_timeout_s,
+        })
+        return future
+
+    def submit_evaluation(self, chromosome, fsp_base_path, geometry_lsf_path, simulation_lsf_path,
+                          simulation_spectra_directory, temp_directory, return_spectrum=False):
+        """Mesma interface do SessionPool: os caminhos de projeto são os de cada worker e são ignorados."""
+        return self.submit(chromosome, simulation_spectra_directory, return_spectrum=return_spectrum)
+
+    def _collect_loop(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"!!! Erro ao ler o diretório do broker: {e}")
+            self._stop.wait(self.poll_interval_s)
+
+    def poll(self):
+        """Lê heartbeats e resultados e devolve à fila os jobs de workers perdidos."""
+        now = time.monotonic()
+        heartbeat_directory = self._directories[HEARTBEAT_DIRECTORY_NAME]
+        for file_name in os.listdir(heartbeat_directory):
+            if not file_name.endswith('.json'):
+                continue
+            try:
+                beat = _read_json(os.path.join(heartbeat_directory, file_name))['beat']
+            except (OSError, ValueError, KeyError):
+                continue
+            worker_id = os.path.splitext(file_name)[0]
+            with self._lock:
+                if self._heartbeats.get(worker_id, (None, None))[0] != beat:
+                    self._heartbeats[worker_id] = (beat, now)
+                lost = now - self._heartbeats[worker_id][1] > self.lease_timeout_s
+                if lost:
+                    del self._heartbeats[worker_id]
+            if lost:
+                # Se o worker estiver só atrasado, o próximo heartbeat recria o arquivo
+                _remove(os.path.join(heartbeat_directory, file_name))
+                print(f"[Broker] Worker {worker_id} sem heartbeat há mais de {self.lease_timeout_s:.0f} s.")
+
+        done_directory = self._directories[DONE_DIRECTORY_NAME]
+        for file_name in os.listdir(done_directory):
+            if file_name.endswith('.json'):
+                self._collect_result(os.path.splitext(file_name)[0])
+
+        leased_directory = self._directories[LEASED_DIRECTORY_NAME]
+        lease_file_names = [file_name for file_name in os.listdir(leased_directory) if file_name.endswith('.json')]
+        self._leases_seen = {name: seen_at for name, seen_at in self._leases_seen.items() if name in lease_file_names}
+        for file_name in lease_file_names:
+            job_id, worker_id = _parse_lease_file_name(file_name)
+            first_seen = self._leases_seen.setdefault(file_name, now)
+            with self._lock:
+                last_beat = self._heartbeats.get(worker_id, (None, first_seen))[1]
+                pending = job_id in self._jobs
+                self._job_started.setdefault(job_id, (first_seen, worker_id))
+            if now - max(last_beat, first_seen) <= self.lease_timeout_s:
+                if pending:
+                    self._speculate(job_id, os.path.join(leased_directory, file_name), now)
+                continue
+            lease_path = os.path.join(leased_directory, file_name)
+            del self._leases_seen[file_name]
+            if not pending:
+                _remove(lease_path)
+                continue
+            try:
+                os.replace(lease_path, os.path.join(self._directories[PENDING_DIRECTORY_NAME], f"{job_id}.json"))
+            except FileNotFoundError:
+                continue
+            self.requeued_jobs += 1
+            print(f"[Broker] Worker {worker_id} sem heartbeat: job {job_id} devolvido à fila.")
+
+    def _speculate(self, job_id, lease_path, now):
+        # Publica de novo um job lento de um worker vivo; o resultado repetido é descartado
+        if self.straggler_factor is None or job_id in self._speculated:
+            return
+        # Só há uma mediana confiável depois que os jobs já concluídos na leva atual
+        # somam pelo menos metade dos jobs ainda em aberto
+        with self._lock:
+            durations = list(self._wave_durations)
+            open_jobs = len(self._jobs)
+        if not durations or 2 * len(durations) < open_jobs:
+            return
+        started_at, _ = self._job_started[job_id]
+        if now - started_at <= self.straggler_factor * float(np.median(durations)):
+            return
+        try:
+            job = _read_json(lease_path)
+        except (OSError, ValueError):
+            return
+        self._speculated.add(job_id)
+        _write_json(os.path.join(self._directories[PENDING_DIRECTORY_NAME], f"{job_id}.json"), job)
+        self.job_counters['speculative_launches'] += 1
+        print(f"[Broker] Job {job_id} lento: cópia especulativa publicada.")
+
+    def _collect_result(self, job_id):
+        done_directory = self._directories[DONE_DIRECTORY_NAME]
+        result_json_path = os.path.join(done_directory, f"{job_id}.json")
+        result_h5_path = os.path.join(done_directory, f"{job_id}.h5")
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+            started_at, first_worker_id = self._job_started.pop(job_id, (None, None)) if job else (None, None)
+            # Registrada junto com a saída do job, antes que uma nova leva possa começar
+            if started_at is not None:
+                self._wave_durations.append(time.monotonic() - started_at)
+        # Um job devolvido à fila pode ter sido concluído pelo worker dado como perdido
+        _remove(os.path.join(self._directories[PENDING_DIRECTORY_NAME], f"{job_id}.json"))
+        if job is None:
+            # Resultado repetido de um job concluído por dois workers
+            _remove(result_json_path)
+            _remove(result_h5_path)
+            return
+        future, simulation_spectra_directory, return_spectrum = job
+        h5_path, spectrum = None, None
+        try:
+            result = _read_json(result_json_path)
+            worker_id = result.get('worker')
+            self.results_by_worker[worker_id] = self.results_by_worker.get(worker_id, 0) + 1
+            if job_id in self._speculated:
+                self._speculated.discard(job_id)
+                if worker_id != first_worker_id:
+                    self.job_counters['speculative_wins'] += 1
+            if result.get('timed_out'):
+                self.job_counters['timeouts'] += 1
+            if result.get('error'):
+                print(f"!!! Erro no job {job_id} (worker {worker_id}): {result['error']}")
+            delta_amp = result['delta_amp'] if result.get('delta_amp') is not None else -float('inf')
+            if os.path.exists(result_h5_path):
+                frequencies_hz, E, parameters = read_job_result(result_h5_path)
+                if return_spectrum:
+                    spectrum = (frequencies_hz, E)
+                elif simulation_spectra_directory is not None:
+                    h5_path = os.path.join(simulation_spectra_directory, _spectrum_file_name(parameters))
+                    os.replace(result_h5_path, h5_path)
+        except Exception as e:
+            print(f"!!! Erro ao ler o resultado do job {job_id}: {e}")
+            delta_amp = -float('inf')
+        _remove(result_json_path)
+        _remove(result_h5_path)
+        future.set_result((h5_path, delta_amp, spectrum))
+
+    def close(self):
+        """Para a thread de coleta e retira da fila os jobs que ainda não foram tomados."""
+        self._stop.set()
+        self._collector.join()
+        pending_directory = self._directories[PENDING_DIRECTORY_NAME]
+        with self._lock:
+            jobs, self._jobs = self._jobs, {}
+        for job_id, (future, _, _) in jobs.items():
+            _remove(os.path.join(pending_directory, f"{job_id}.json"))
+            future.cancel()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def iter_broker_results(broker, current_population, simulation_spectra_directory, spectrum_archive=None,
+                        generation=0, fidelity=None, telemetry=None):
+    """
+    Publica uma leva de cromossomos no broker e produz cada indivíduo assim que um worker o conclui.
+
+    Args:
+        broker (JobBroker): O broker ligado ao diretório compartilhado.
+        Os demais argumentos são os mesmos de iter_generation_results.
+
+    Yields:
+        Tuplas (índice na população, caminho do .h5 ou None, delta_amp), na
+        ordem de conclusão. Jobs que falharam produzem (índice, None, -inf).
+    """
+    print(f"  [Broker] Publicando {len(current_population)} jobs em {broker.broker_directory}...")
+    submitted_at = time.perf_counter()
+    futures = {
+        broker.submit(chromosome, simulation_spectra_directory, fidelity, return_spectrum=spectrum_archive is not None): i
+        for i, chromosome in enumerate(current_population)
+    }
+    wait_start = time.perf_counter()
+    for future in as_completed(futures):
+        completed_at = time.perf_counter()
+        index = futures[future]
+        if telemetry is not None:
+            telemetry.add_phase('waiting_for_jobs', completed_at - wait_start)
+        h5_path, delta_amp, spectrum = future.result()
+        if spectrum_archive is not None and spectrum is not None:
+            with timed(telemetry, 'spectrum_archive'):
+                spectrum_archive.append(current_population[index], spectrum[0], spectrum[1], generation, delta_amp)
+            h5_path = spectrum_archive.path
+        if telemetry is not None:
+            telemetry.record_job(index=index, turnaround_s=completed_at - submitted_at,
+                                 failed=not np.isfinite(delta_amp))
+        yield index, h5_path, delta_amp
+        wait_start = time.perf_counter()
+
+
+class BrokerWorker:
+    """
+    Worker de uma máquina: toma jobs do broker, simula na sua sessão e devolve os resultados.
+
+    O worker usa os scripts e o projeto base da sua própria cópia do projeto
+    ('project_directory') e um diretório temporário só seu. Cada leva de até
+    'jobs_per_batch' jobs vai para a fila da sessão de uma vez, de modo que o
+    solver pode executá-los em paralelo conforme a configuração de recursos.
+
+    Args:
+        broker_directory: O diretório compartilhado com o processo principal.
+        backend_name (str): Backend da sessão (ver create_backend).
+        backend_options (dict): Opções do backend.
+        project_directory: Raiz da cópia do projeto nesta máquina (com resources/ e guide.fsp).
+        worker_id (str): Opcional. Identificador do worker; por padrão, máquina e PID.
+        jobs_per_batch (int): Número máximo de jobs tomados de uma vez.
+        heartbeat_interval_s (float): Intervalo entre os heartbeats.
+        poll_interval_s (float): Intervalo entre as consultas à fila quando não há jobs.
+        use_job_template (bool): Prepara os jobs a partir de um template (ver LumericalJobTemplate).
+            Desligado por padrão, como use_job_template no main.py.
+    """
+
+    def __init__(self, broker_directory, backend_name='lumerical', backend_options=None, project_directory=None,
+                 worker_id=None, jobs_per_batch=1, heartbeat_interval_s=5.0, poll_interval_s=1.0,
+                 use_job_template=False):
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        if '@' in self.worker_id:
+            raise ValueError("O identificador do worker não pode conter '@'.")
+        self.backend_name = backend_name
+        self.backend_options = backend_options or {}
+        self.project_directory = project_directory or _PROJECT_DIRECTORY
+        self.jobs_per_batch = jobs_per_batch
+        self.heartbeat_interval_s = heartbeat_interval_s
+        self.poll_interval_s = poll_interval_s
+        self.use_job_template = use_job_template
+        self.jobs_done = 0
+        self._directories = _broker_directories(broker_directory)
+        self._heartbeat_path = os.path.join(self._directories[HEARTBEAT_DIRECTORY_NAME], f"{self.worker_id}.json")
+        self._current_jobs = []
+        self._beat = 0
+        self._stop = threading.Event()
+
+        resources_directory = os.path.join(self.project_directory, "resources")
+        self.geometry_lsf_path = os.path.join(resources_directory, "create_guide_fdtd.lsf")
+        self.simulation_lsf_path = os.path.join(resources_directory, "run_simu_guide_fdtd.lsf")
+        self.update_lsf_path = os.path.join(resources_directory, "update_simu_guide_fdtd.lsf")
+        self.temp_directory = os.path.join(self.project_directory, "temp", f"worker_{self.worker_id}")
+        self.fsp_base_path = os.path.join(self.temp_directory, "guide_temp_base.fsp")
+
+    def _write_heartbeat(self):
+        self._beat += 1
+        _write_json(self._heartbeat_path, {
+            'worker': self.worker_id, 'host': socket.gethostname(), 'pid': os.getpid(), 'beat': self._beat,
+            'time': time.time(), 'jobs_done': self.jobs_done, 'current_jobs': list(self._current_jobs),
+        })
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(self.heartbeat_interval_s):
+            try:
+                self._write_heartbeat()
+            except OSError as e:
+                print(f"!!! Erro ao gravar o heartbeat do worker {self.worker_id}: {e}")
+
+    def _claim_jobs(self):
+        # Renomear é atômico: se outro worker levou o job primeiro, o arquivo já não existe
+        pending_directory = self._directories[PENDING_DIRECTORY_NAME]
+        jobs = []
+        for file_name in sorted(os.listdir(pending_directory)):
+            if len(jobs) >= self.jobs_per_batch:
+                break
+            if not file_name.endswith('.json'):
+                continue
+            job_id = os.path.splitext(file_name)[0]
+            lease_path = os.path.join(self._directories[LEASED_DIRECTORY_NAME],
+                                      _lease_file_name(job_id, self.worker_id))
+            try:
+                os.rename(os.path.join(pending_directory, file_name), lease_path)
+                job = _read_json(lease_path)
+            except (FileNotFoundError, PermissionError):
+                continue
+            job['lease_path'] = lease_path
+            jobs.append(job)
+        return jobs
+
+    def _finish_job(self, job, delta_amp=None, spectrum=None, error=None, elapsed_s=None, timed_out=False):
+        done_directory = self._directories[DONE_DIRECTORY_NAME]
+        if spectrum is not None:
+            write_job_result(os.path.join(done_directory, f"{job['job_id']}.h5"), spectrum[0], spectrum[1],
+                             job['chromosome'])
+        # O .json é gravado por último: a sua presença indica que o resultado está completo
+        _write_json(os.path.join(done_directory, f"{job['job_id']}.json"), {
+            'job_id': job['job_id'], 'worker': self.worker_id, 'delta_amp': delta_amp,
+            'error': error, 'elapsed_s': elapsed_s, 'timed_out': timed_out,
+        })
+        _remove(job['lease_path'])
+        self._current_jobs.remove(job['job_id'])
+        self.jobs_done += 1
+
+    def _run_batch(self, session, job_template, workspace, jobs):
+        start_time = time.perf_counter()
+        jobs_by_fsp_path = {}
+        for job in jobs:
+            self._current_jobs.append(job['job_id'])
+            try:
+                if job_template is not None:
+                    fsp_path = job_template.prepare_job(session, job['chromosome'], self.temp_directory,
+                                                        job.get('fidelity'))
+                else:
+                    fsp_path = prepare_lumerical_job(
+                        session, job['chromosome'], self.fsp_base_path, self.geometry_lsf_path,
+                        self.simulation_lsf_path, self.temp_directory, job.get('fidelity')
+                    )
+            except Exception as e:
+                self._finish_job(job, error=f"Falha ao preparar o job: {e}")
+                continue
+            # Jobs com o mesmo conteúdo compartilham o projeto e uma única simulação
+            if fsp_path not in jobs_by_fsp_path:
+                session.addjob(fsp_path)
+            jobs_by_fsp_path.setdefault(fsp_path, []).append(job)
+        if not jobs_by_fsp_path:
+            return
+        timeout_s = jobs[0].get('timeout_s')
+
+        workspace.register(list(jobs_by_fsp_path))
+        extraction_session = session.extraction_session() if hasattr(session, 'extraction_session') else session
+        if job_template is not None and not exports_job_results(extraction_session):
+            job_template.deactivate(extraction_session)
+        for fsp_path in _iter_completed_jobs(session, list(jobs_by_fsp_path), timeout_s):
+            elapsed_s = time.perf_counter() - start_time
+            delta_amp, spectrum, error = None, None, None
+            timed_out = fsp_path in getattr(session, 'timed_out_jobs', ())
+            if timed_out:
+                error = f"Tempo limite de {timeout_s:g} s esgotado."
+            else:
+                try:
+                    spectrum = read_monitor_spectrum(extraction_session, fsp_path)
+                    delta_amp = float(delta_amp_from_spectra(spectrum[1]))
+                except Exception as e:
+                    spectrum, error = None, str(e)
+            for job in jobs_by_fsp_path.pop(fsp_path):
+                self._finish_job(job, delta_amp, spectrum, error=error, elapsed_s=elapsed_s, timed_out=timed_out)
+                print(f"  [Worker {self.worker_id}] Job {job['job_id']} concluído: delta_amp = {delta_amp}")
+            workspace.release(fsp_path, failed=delta_amp is None)
+
+    def _prepare_base_project(self, session):
+        original_fsp_path = os.path.join(self.project_directory, "guide.fsp")
+        if os.path.exists(original_fsp_path):
+            shutil.copy(original_fsp_path, self.fsp_base_path)
+        elif self.backend_name == 'synthetic':
+            session.save(self.fsp_base_path)
+        else:
+            raise FileNotFoundError(f"Erro: O arquivo base '{original_fsp_path}' não foi encontrado.")
+
+    def run(self, max_jobs=None, idle_timeout_s=None):
+        """
+        Processa jobs até 'max_jobs' concluídos ou 'idle_timeout_s' segundos sem jobs
+        (ambos opcionais; sem eles, o worker roda até ser interrompido).
+
+        Returns:
+            O número de jobs concluídos.
+        """
+        workspace = SimulationWorkspace(self.temp_directory)
+        workspace.collect_garbage()
+        self._write_heartbeat()
+        heartbeat_thread = threading.Thread(target=self._heartbeat_loop, daemon=True)
+        heartbeat_thread.start()
+        jobs = []
+        print(f"[Worker {self.worker_id}] Aguardando jobs em {os.path.dirname(self._directories[PENDING_DIRECTORY_NAME])}")
+        try:
+            with create_backend(self.backend_name, **self.backend_options) as session:
+                self._prepare_base_project(session)
+                job_template = None
+                if self.use_job_template:
+                    job_template = LumericalJobTemplate(
+                        self.fsp_base_path, self.geometry_lsf_path, self.simulation_lsf_path,
+                        self.update_lsf_path, os.path.join(self.temp_directory, "guide_temp_template.fsp")
+                    )
+                idle_since = time.monotonic()
+                while max_jobs is None or self.jobs_done < max_jobs:
+                    jobs = self._claim_jobs()
+                    if not jobs:
+                        if idle_timeout_s is not None and time.monotonic() - idle_since > idle_timeout_s:
+                            break
+                        time.sleep(self.poll_interval_s)
+                        continue
+                    self._run_batch(session, job_template, workspace, jobs)
+                    jobs = []
+                    idle_since = time.monotonic()
+        finally:
+            self._stop.set()
+            heartbeat_thread.join()
+            # Jobs tomados e não concluídos (ex.: interrupção) voltam para a fila imediatamente;
+            # os concluídos já não têm o arquivo de concessão
+            for job in jobs:
+                try:
+                    os.replace(job['lease_path'],
+                               os.path.join(self._directories[PENDING_DIRECTORY_NAME], f"{job['job_id']}.json"))
+                except FileNotFoundError:
+                    pass
+            _remove(self._heartbeat_path)
+            shutil.rmtree(self.temp_directory, ignore_errors=True)
+        print(f"[Worker {self.worker_id}] Encerrado após {self.jobs_done} jobs.")
+        return self.jobs_done
+
+
+def start_local_workers(broker_directory, n_workers, backend_name='synthetic', backend_options=None,
+                        jobs_per_batch=1, log_directory=None):
+    """
+    Inicia workers nesta máquina, cada um em um processo (ex.: para testar o broker com o backend sintético).
+
+    Returns:
+        A lista de subprocess.Popen dos workers; encerre-os com stop_local_workers.
+    """
+    workers = []
+    for i in range(n_workers):
+        command = [
+            sys.executable, '-m', 'utils.job_broker', '--broker-dir', broker_directory,
+            '--backend', backend_name, '--backend-options', json.dumps(backend_options or {}),
+            '--jobs-per-batch', str(jobs_per_batch), '--worker-id', f"{socket.gethostname()}-local{i}",
+        ]
+        log = subprocess.DEVNULL
+        if log_directory is not None:
+            log = open(os.path.join(log_directory, f"worker_local{i}.log"), 'w')
+        workers.append(subprocess.Popen(command, cwd=_PROJECT_DIRECTORY, stdout=log, stderr=subprocess.STDOUT))
+    return workers
+
+
+def stop_local_workers(workers, timeout=30.0):
+    """Interrompe os workers iniciados por start_local_workers e espera que terminem."""
+    for worker in workers:
+        if worker.poll() is None:
+            worker.terminate()
+    for worker in workers:
+        try:
+            worker.wait(timeout)
+        except subprocess.TimeoutExpired:
+            worker.kill()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Worker de avaliação distribuída do otimizador do guia de onda.")
+    parser.add_argument('--broker-dir', required=True, help="Diretório compartilhado com o processo principal.")
+    parser.add_argument('--backend', default='lumerical', choices=('lumerical', 'synthetic'))
+    parser.add_argument('--backend-options', default='{}', help="Opções do backend, em JSON.")
+    parser.add_argument('--project-dir', default=None, help="Raiz da cópia do projeto nesta máquina.")
+    parser.add_argument('--worker-id', default=None)
+    parser.add_argument('--jobs-per-batch', type=int, default=1)
+    parser.add_argument('--heartbeat-interval', type=float, default=5.0)
+    parser.add_argument('--max-jobs', type=int, default=None)
+    parser.add_argument('--idle-timeout', type=float, default=None)
+    parser.add_argument('--template', action='store_true',
+                        help="Prepara os jobs a partir de um template em vez de reconstruir o projeto.")
+    args = parser.parse_args(argv)
+
+    # O SIGTERM de stop_local_workers encerra o worker pelo mesmo caminho de um Ctrl+C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    worker = BrokerWorker(
+        args.broker_dir, args.backend, json.loads(args.backend_options), args.project_dir, args.worker_id,
+        args.jobs_per_batch, args.heartbeat_interval, use_job_template=args.template
+    )
+    try:
+        worker.run(args.max_jobs, args.idle_timeout)
+    except KeyboardInterrupt:
+        print(f"[Worker {worker.worker_id}] Interrompido.")
+
+
+if __name__ == "__main__":
+    main()
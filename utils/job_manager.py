@@ -0,0 +1,158 @@
+# job_manager.py
+
+import json
+import time
+import hashlib
+
+import numpy as np
+
+# Contadores de cada geração, na ordem em que aparecem no relatório
+JOB_COUNTS = ('jobs', 'duplicates', 'failures', 'retries', 'recovered', 'lost',
+              'timeouts', 'speculative_launches', 'speculative_wins')
+
+# Contadores mantidos pelos backends (e pelo broker) que executam os jobs
+BACKEND_JOB_COUNTS = ('timeouts', 'speculative_launches', 'speculative_wins')
+
+
+def new_job_counters():
+    """Contadores de jobs de um backend: tempos esgotados e cópias especulativas."""
+    return {name: 0 for name in BACKEND_JOB_COUNTS}
+
+
+def job_id(chromosome, fidelity=None):
+    """
+    Identificador de um job derivado do seu conteúdo.
+
+    O mesmo cromossomo com a mesma fidelidade gera sempre o mesmo id, e
+    cromossomos diferentes (mesmo que difiram além da precisão impressa nos
+    nomes de arquivo) geram ids diferentes.
+
+    Returns:
+        Uma string hexadecimal de 16 caracteres.
+    """
+    # O repr de um float é exato: dois cromossomos só compartilham o id se forem iguais
+    content = json.dumps([{name: float(chromosome[name]) for name in sorted(chromosome)}, fidelity],
+                         sort_keys=True)
+    return hashlib.sha1(content.encode()).hexdigest()[:16]
+
+
+class JobManager:
+    """
+    Execução confiável dos jobs de uma leva de cromossomos.
+
+    Cromossomos repetidos na leva são simulados uma única vez. Um job que
+    falha (extração com erro, projeto sem dados ou tempo limite esgotado) é
+    executado novamente até 'max_retries' vezes, em rodadas separadas por uma
+    espera que dobra a cada rodada. O tempo limite e o relançamento
+    especulativo dos jobs lentos são aplicados pelo backend que executa a fila
+    (ver SimulationBackend.iter_completed_jobs).
+
+    Args:
+        max_retries (int): Novas tentativas de um job que falhou (0 = nenhuma).
+        retry_backoff_s (float): Espera antes da primeira nova tentativa; dobra a cada rodada.
+        job_timeout_s (float): Opcional. Tempo máximo de execução de um job.
+        straggler_factor (float): Opcional. Um job em execução há mais de 'straggler_factor'
+            vezes a mediana dos jobs já concluídos ganha uma cópia especulativa; vale o
+            resultado da que terminar primeiro.
+    """
+
+    def __init__(self, max_retries=2, retry_backoff_s=5.0, job_timeout_s=None, straggler_factor=None):
+        self.max_retries = max_retries
+        self.retry_backoff_s = retry_backoff_s
+        self.job_timeout_s = job_timeout_s
+        self.straggler_factor = straggler_factor
+        self.generation_counts = {name: 0 for name in JOB_COUNTS}
+        self.total_counts = {name: 0 for name in JOB_COUNTS}
+
+    def start_generation(self):
+        """Zera os contadores da geração."""
+        self.generation_counts = {name: 0 for name in JOB_COUNTS}
+
+    def _count(self, name, n=1):
+        self.generation_counts[name] += n
+        self.total_counts[name] += n
+
+    def run(self, population, run_attempt, backend=None):
+        """
+        Executa os jobs únicos da leva e produz o resultado final de cada cromossomo.
+
+        Args:
+            population (list): Os cromossomos da leva.
+            run_attempt (callable): run_attempt(cromossomos, tentativa) executa uma rodada e
+                produz (índice em 'cromossomos', h5_path, delta_amp) na ordem de conclusão,
+                como iter_generation_results.
+            backend: Opcional. O backend (ou broker) da fila; os seus 'job_counters'
+                (tempos esgotados e cópias especulativas) entram nos contadores da geração.
+
+        Yields:
+            Tuplas (índice em 'population', h5_path, delta_amp) assim que o resultado
+            de um cromossomo é definitivo. Jobs que falharam em todas as tentativas
+            produzem (índice, None, -inf).
+        """
+        backend_counts_before = dict(getattr(backend, 'job_counters', {}))
+        indices_by_job_id = {}
+        for i, chromosome in enumerate(population):
+            indices_by_job_id.setdefault(job_id(chromosome), []).append(i)
+        self._count('jobs', len(indices_by_job_id))
+        self._count('duplicates', len(population) - len(indices_by_job_id))
+
+        pending = list(indices_by_job_id)
+        attempt = 0
+        while pending:
+            if attempt > 0:
+                backoff = self.retry_backoff_s * 2 ** (attempt - 1)
+                print(f"  [Job Manager] Tentativa {attempt + 1} de {len(pending)} jobs que falharam "
+                      f"(aguardando {backoff:.0f} s)...")
+                time.sleep(backoff)
+                self._count('retries', len(pending))
+            chromosomes = [population[indices_by_job_id[identifier][0]] for identifier in pending]
+            finished = set()
+            failed = []
+
+            def settle(k, h5_path, delta_amp):
+                identifier = pending[k]
+                finished.add(k)
+                if np.isfinite(delta_amp):
+                    if attempt > 0:
+                        self._count('recovered')
+                    return [(i, h5_path, delta_amp) for i in indices_by_job_id[identifier]]
+                self._count('failures')
+                if attempt < self.max_retries:
+                    failed.append(identifier)
+                    return []
+                self._count('lost')
+                return [(i, None, -float('inf')) for i in indices_by_job_id[identifier]]
+
+            try:
+                for k, h5_path, delta_amp in run_attempt(chromosomes, attempt):
+                    yield from settle(k, h5_path, delta_amp)
+            except Exception as e:
+                # Os jobs sem resultado nesta rodada contam como falhas e vão para a próxima
+                print(f"!!! Erro na execução dos jobs (tentativa {attempt + 1}): {e}")
+            for k in range(len(pending)):
+                if k not in finished:
+                    yield from settle(k, None, -float('inf'))
+            pending = failed
+            attempt += 1
+
+        for name, value in getattr(backend, 'job_counters', {}).items():
+            if name in self.generation_counts:
+                self._count(name, value - backend_counts_before.get(name, 0))
+
+    @property
+    def solver_jobs(self):
+        """Jobs enviados ao solver até agora: os únicos, as novas tentativas e as cópias especulativas."""
+        counts = self.total_counts
+        return counts['jobs'] + counts['retries'] + counts['speculative_launches']
+
+    def generation_report(self):
+        """Resumo dos contadores da geração, em uma linha."""
+        counts = self.generation_counts
+        report = (f"{counts['jobs']} jobs ({counts['duplicates']} repetidos), {counts['failures']} falhas, "
+                  f"{counts['retries']} novas tentativas ({counts['recovered']} recuperados), "
+                  f"{counts['lost']} perdidos")
+        if self.job_timeout_s is not None:
+            report += f", {counts['timeouts']} tempos esgotados"
+        if self.straggler_factor is not None:
+            report += f", {counts['speculative_launches']} cópias especulativas ({counts['speculative_wins']} venceram)"
+        return report
@@ -1,12 +1,52 @@
 # lumerical_workflow.py
 
-import lumapi
 import os
+import time
 import h5py
 import numpy as np
-import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from utils.post_processing import delta_amp_from_spectra, job_result_path, read_job_result
+from utils.fidelity import apply_fidelity
+from utils.telemetry import timed
+from utils.job_manager import job_id
+
+_lsf_script_cache = {}
+
+
+def read_lsf_script(lsf_path):
+    """
+    Lê o conteúdo de um script LSF, reaproveitando a leitura anterior enquanto o
+    arquivo não for modificado.
+    """
+    mtime = os.path.getmtime(lsf_path)
+    cached = _lsf_script_cache.get(lsf_path)
+    if cached is None or cached[0] != mtime:
+        with open(lsf_path, 'r') as f:
+            cached = (mtime, f.read())
+        _lsf_script_cache[lsf_path] = cached
+    return cached[1]
 
-def prepare_lumerical_job(fdtd, chromosome, fsp_base_path, geometry_lsf_path, simulation_lsf_path,temp_directory):
+
+def job_fsp_path(chromosome, temp_directory, fidelity=None):
+    """
+    Retorna o caminho do FSP temporário do job de um cromossomo.
+
+    O nome vem do id do job (ver job_id): cromossomos diferentes nunca
+    compartilham o mesmo projeto.
+    """
+    return os.path.join(temp_directory, f"guide_temp_{job_id(chromosome, fidelity)}.fsp")
+
+
+def _set_guide_parameters(fdtd, chromosome):
+    fdtd.setnamed("Guia Metamaterial", "s", chromosome['s'])
+    fdtd.setnamed("Guia Metamaterial", "w", chromosome['w'])
+    fdtd.setnamed("Guia Metamaterial", "l", chromosome['l'])
+    fdtd.setnamed("Guia Metamaterial", "height", chromosome['height'])
+
+
+def prepare_lumerical_job(fdtd, chromosome, fsp_base_path, geometry_lsf_path, simulation_lsf_path,temp_directory,
+                          fidelity=None):
     """
     Prepara um único arquivo FSP com os parâmetros de um cromossomo e o salva com um nome único.
     
@@ -16,15 +56,15 @@ def prepare_lumerical_job(fdtd, chromosome, fsp_base_path, geometry_lsf_path, si
         fsp_base_path: O caminho base para o arquivo FSP temporário.
         geometry_lsf_path: O caminho para o script LSF que cria a geometria.
         simulation_lsf_path: O caminho para o script LSF que adiciona os elementos de simulação.
+        fidelity (dict): Opcional. Parâmetros de fidelidade do job (ver utils/fidelity.py);
+            se None, valem os valores do script de simulação.
         
     Returns:
         O caminho completo para o arquivo FSP salvo.
     """
-    # Cria um nome de arquivo FSP único para o cromossomo
-    fsp_file_name = f"guide_temp_s{chromosome['s']:.2e}_w{chromosome['w']:.2e}.fsp"
     # O arquivo temporário é salvo no mesmo diretório do arquivo base, ou em um diretório temporário.
     print(f"temp_directory = " + temp_directory)
-    fsp_path = os.path.join(temp_directory, fsp_file_name)
+    fsp_path = job_fsp_path(chromosome, temp_directory, fidelity)
     print(f"fsp_path = " + fsp_path)
     # Adicionando uma verificação defensiva para garantir que o arquivo base existe
     if not os.path.exists(fsp_base_path):
@@ -35,102 +75,495 @@ def prepare_lumerical_job(fdtd, chromosome, fsp_base_path, geometry_lsf_path, si
     fdtd.switchtolayout()
 
     # 2. Executa o script LSF para criar a geometria
-    with open(geometry_lsf_path, 'r') as f:
-        create_lsf_content = f.read()
-    fdtd.eval(create_lsf_content)
+    fdtd.eval(read_lsf_script(geometry_lsf_path))
 
     # 3. Define os parâmetros do cromossomo na geometria
-    fdtd.setnamed("Guia Metamaterial", "s", chromosome['s'])
-    fdtd.setnamed("Guia Metamaterial", "w", chromosome['w'])
-    fdtd.setnamed("Guia Metamaterial", "l", chromosome['l'])
-    fdtd.setnamed("Guia Metamaterial", "height", chromosome['height'])
+    _set_guide_parameters(fdtd, chromosome)
 
     # 4. Executa o script LSF para adicionar os elementos de simulação
-    with open(simulation_lsf_path, 'r') as f:
-        simulate_lsf_content = f.read()
-    fdtd.eval(simulate_lsf_content)
+    fdtd.eval(read_lsf_script(simulation_lsf_path))
+    if fidelity is not None:
+        apply_fidelity(fdtd, fidelity)
     
     # 5. Salva o arquivo FSP modificado com um nome único
     fdtd.save(fsp_path)
     
     return fsp_path
 
-def simulate_generation_lumerical(fdtd, current_population, fsp_base_path, geometry_lsf_path,
-                                  simulation_lsf_path, simulation_spectra_directory,temp_directory):
+
+def _session_key(fdtd):
+    # Um backend reiniciado (ver LumericalBackend) é uma sessão nova, sem o template aberto
+    return id(fdtd), getattr(fdtd, 'session_restarts', 0)
+
+
+class LumericalJobTemplate:
     """
-    Prepara e executa as simulações para uma geração inteira de cromossomos usando a fila de jobs.
-    Após a execução, lê os resultados de cada arquivo FSP e os salva em arquivos .h5.
-    
+    Projeto de simulação montado uma única vez por execução.
+
+    O template é construído com os scripts de geometria e de simulação e salvo
+    em disco. Para cada indivíduo, apenas as quatro propriedades do grupo
+    "Guia Metamaterial" são alteradas e o script de atualização reposiciona a
+    região FDTD, as portas e o monitor, sem recarregar o projeto base nem
+    recriar objetos.
+
     Args:
-        fdtd: A instância da sessão Lumerical FDTD.
-        current_population (list): Uma lista de dicionários, onde cada um representa um cromossomo.
-        fsp_base_path: O caminho base para o arquivo FSP temporário.
+        fsp_base_path: O caminho do arquivo FSP base.
         geometry_lsf_path: O caminho para o script LSF que cria a geometria.
         simulation_lsf_path: O caminho para o script LSF que adiciona os elementos de simulação.
-        simulation_spectra_directory: O diretório onde os arquivos de saída .h5 serão salvos.
-        
+        update_lsf_path: O caminho para o script LSF que atualiza as posições dependentes dos parâmetros.
+        template_fsp_path: Onde o projeto template é salvo.
+    """
+
+    def __init__(self, fsp_base_path, geometry_lsf_path, simulation_lsf_path,
+                 update_lsf_path, template_fsp_path):
+        self.fsp_base_path = fsp_base_path
+        self.geometry_lsf_path = geometry_lsf_path
+        self.simulation_lsf_path = simulation_lsf_path
+        self.update_lsf_path = update_lsf_path
+        self.template_fsp_path = template_fsp_path
+        self._active_sessions = set()
+        self._built = False
+
+    def build(self, fdtd):
+        """Monta o projeto completo a partir do arquivo base e o salva como template."""
+        if not os.path.exists(self.fsp_base_path):
+            raise FileNotFoundError(f"Erro: O arquivo base '{self.fsp_base_path}' não foi encontrado.")
+        fdtd.load(self.fsp_base_path)
+        fdtd.switchtolayout()
+        fdtd.eval(read_lsf_script(self.geometry_lsf_path))
+        fdtd.eval(read_lsf_script(self.simulation_lsf_path))
+        fdtd.save(self.template_fsp_path)
+        self._active_sessions = {_session_key(fdtd)}
+        self._built = True
+        print(f"  [Template] Projeto template salvo em: {self.template_fsp_path}")
+
+    def activate(self, fdtd):
+        """
+        Garante que a sessão está com o template aberto. Deve ser chamado
+        antes de preparar uma leva de jobs, pois a extração carrega outros FSPs.
+        """
+        # Um template deixado por uma execução anterior pode estar desatualizado: sempre reconstrói
+        if not self._built or not os.path.exists(self.template_fsp_path):
+            self.build(fdtd)
+        elif _session_key(fdtd) not in self._active_sessions:
+            fdtd.load(self.template_fsp_path)
+            fdtd.switchtolayout()
+            self._active_sessions.add(_session_key(fdtd))
+
+    def deactivate(self, fdtd):
+        """Marca que a sessão carregou outro projeto (ex.: para extrair resultados)."""
+        self._active_sessions.discard(_session_key(fdtd))
+
+    def prepare_job(self, fdtd, chromosome, temp_directory, fidelity=None):
+        """
+        Salva o FSP de um cromossomo a partir do template já aberto na sessão.
+
+        A fidelidade aplicada permanece no template aberto: se None, vale a do
+        job anterior (ou a do script de simulação, se nenhuma foi aplicada).
+
+        Returns:
+            O caminho completo para o arquivo FSP salvo.
+        """
+        self.activate(fdtd)
+        fsp_path = job_fsp_path(chromosome, temp_directory, fidelity)
+        _set_guide_parameters(fdtd, chromosome)
+        fdtd.eval(read_lsf_script(self.update_lsf_path))
+        if fidelity is not None:
+            apply_fidelity(fdtd, fidelity)
+        fdtd.save(fsp_path)
+        return fsp_path
+
+
+def exports_job_results(fdtd):
+    """Indica se os jobs da sessão gravam o resultado reduzido (ver SimulationBackend)."""
+    return getattr(fdtd, 'exports_job_results', False)
+
+
+def read_monitor_spectrum(fdtd, fsp_path, monitor_name='in'):
+    """
+    Lê o espectro do monitor de um arquivo FSP já simulado.
+
+    Se o job gravou o resultado reduzido, só esse arquivo pequeno é lido e o
+    FSP não é carregado na sessão.
+
     Returns:
-        Uma lista completa dos caminhos para os arquivos de saída .h5.
+        Uma tupla (frequências em Hz, magnitude |E| do espectro), ambos vetores 1-D.
     """
+    if exports_job_results(fdtd):
+        frequencies_hz, E, _ = read_job_result(job_result_path(fsp_path), monitor_name)
+        return frequencies_hz, E
+
+    # 1. Carrega o arquivo FSP já simulado para extrair os dados
+    fdtd.load(fsp_path)
+
+    # 2. Extrai os dados do monitor e calcula a magnitude do vetor campo elétrico
+    Ex_complex = fdtd.getdata(f"{monitor_name}","Ex")
+    Ey_complex = fdtd.getdata(f"{monitor_name}","Ey")
+    Ez_complex = fdtd.getdata(f"{monitor_name}","Ez")
+    E = np.sqrt(np.abs(Ex_complex[0,0,0,:])**2 
+                                   + np.abs(Ey_complex[0,0,0,:])**2 
+                                   + np.abs(Ez_complex[0,0,0,:])**2)
+    f = fdtd.getdata(monitor_name,"f")
+    return np.asarray(f).ravel(), E
+
+
+def _spectrum_file_name(params):
+    return f"spectrum_s{params['s']:.2e}_w{params['w']:.2e}_l{params['l']:.2e}_h{params['height']:.2e}.h5"
+
+
+def extract_monitor_spectrum(fdtd, fsp_path, simulation_spectra_directory, monitor_name='in'):
+    """
+    Lê o espectro do monitor de um arquivo FSP já simulado e o salva em um arquivo .h5.
+
+    Args:
+        fdtd: A sessão usada para carregar o FSP.
+        fsp_path: O caminho do arquivo FSP simulado.
+        simulation_spectra_directory: O diretório onde o arquivo .h5 será salvo.
+        monitor_name: O nome do monitor de campo.
+
+    Returns:
+        Uma tupla (caminho do .h5, magnitude |E| do espectro).
+    """
+    if exports_job_results(fdtd):
+        # O resultado reduzido já tem o formato do .h5 de espectro: só é movido para o diretório
+        result_path = job_result_path(fsp_path)
+        _, E, params = read_job_result(result_path, monitor_name)
+        h5_path = os.path.join(simulation_spectra_directory, _spectrum_file_name(params))
+        os.replace(result_path, h5_path)
+        return h5_path, E
+
+    # 1-3. Carrega o FSP simulado e calcula a magnitude do campo elétrico no monitor
+    f, E = read_monitor_spectrum(fdtd, fsp_path, monitor_name)
+    
+    # 4. Define o nome do arquivo H5 com base nos parâmetros do cromossomo
+    params = {name: fdtd.getnamed("Guia Metamaterial", name) for name in ('s', 'w', 'l', 'height')}
+    h5_path = os.path.join(simulation_spectra_directory, _spectrum_file_name(params))
+    
+    # 5. Salva os dados no arquivo H5 usando a biblioteca h5py
+    with h5py.File(h5_path, 'w') as hf:
+        hf.create_dataset(f'{monitor_name}_spectrum_E_magnitude', data=E)
+        hf.create_dataset(f'frequencies_hz', data=f)
+
+    return h5_path, E
+
+
+def _iter_completed_jobs(fdtd, fsp_paths, job_timeout_s=None, straggler_factor=None):
+    # Sessões lumapi.FDTD puras não observam jobs individuais: cai na barreira do runjobs
+    # (sem tempo limite nem cópias especulativas)
+    if hasattr(fdtd, 'iter_completed_jobs'):
+        yield from fdtd.iter_completed_jobs(timeout_s=job_timeout_s, straggler_factor=straggler_factor)
+    else:
+        fdtd.runjobs()
+        yield from fsp_paths
+
+
+def _archive_result(spectrum_archive, chromosome, generation, spectrum, delta_amp):
+    # Com o arquivo consolidado, o espectro não gera um .h5 próprio: o "caminho" é o do arquivo
+    frequencies_hz, E = spectrum
+    spectrum_archive.append(chromosome, frequencies_hz, E, generation, delta_amp)
+    return spectrum_archive.path
+
+
+def iter_generation_results(fdtd, current_population, fsp_base_path, geometry_lsf_path,
+                            simulation_lsf_path, simulation_spectra_directory, temp_directory,
+                            job_template=None, session_pool=None, spectrum_archive=None, generation=0,
+                            fidelity=None, telemetry=None, result_reader_threads=4, workspace=None,
+                            job_timeout_s=None, straggler_factor=None):
+    """
+    Prepara e enfileira uma geração e produz cada indivíduo assim que o seu job termina.
+
+    A extração do espectro e o cálculo do delta_amp de um job acontecem
+    enquanto os demais ainda executam, de modo que o tempo da geração é
+    determinado pelo job mais lento e não pela soma de simulação e extração.
+
+    Args:
+        Os mesmos de simulate_generation_lumerical. Com 'job_template' (um
+        LumericalJobTemplate), os FSPs são gerados a partir do template em vez
+        de reconstruir o projeto para cada cromossomo. Com 'session_pool' (um
+        SessionPool de utils/session_pool.py), a preparação e a extração são
+        distribuídas entre as sessões do pool e a sessão principal só executa a fila.
+        Com 'spectrum_archive' (um SpectrumArchive), os espectros são acrescentados
+        ao arquivo consolidado, com a geração 'generation', em vez de gerar um .h5
+        por indivíduo. 'fidelity' define os parâmetros de fidelidade de todos os
+        jobs da leva (ver utils/fidelity.py). Com 'telemetry' (um RunTelemetry),
+        os tempos de cada fase e de cada job são registrados na geração em andamento.
+        Se o backend exporta o resultado reduzido de cada job, esses arquivos são
+        lidos por 'result_reader_threads' threads, sem carregar os FSPs simulados.
+        Com 'workspace' (um SimulationWorkspace de utils/workspace.py), o projeto
+        de cada job é removido assim que o seu resultado é extraído e, se houver
+        um orçamento de disco, a leva é dividida em ondas de jobs que cabem nele.
+        'job_timeout_s' e 'straggler_factor' são repassados ao backend (ver
+        SimulationBackend.iter_completed_jobs): um job que esgota o tempo limite
+        é produzido como falha. Cromossomos repetidos na leva são simulados uma vez.
+
+    Yields:
+        Tuplas (índice na população, caminho do .h5 ou None, delta_amp), na
+        ordem de conclusão. Jobs que falharam produzem (índice, None, -inf).
+    """
+    settings = dict(
+        job_template=job_template, session_pool=session_pool, spectrum_archive=spectrum_archive,
+        generation=generation, fidelity=fidelity, telemetry=telemetry,
+        result_reader_threads=result_reader_threads, workspace=workspace,
+        job_timeout_s=job_timeout_s, straggler_factor=straggler_factor
+    )
+
+    # Cromossomos repetidos compartilham o mesmo projeto: cada um é simulado uma vez
+    indices_by_job_id = {}
+    for i, chromosome in enumerate(current_population):
+        indices_by_job_id.setdefault(job_id(chromosome, fidelity), []).append(i)
+    if len(indices_by_job_id) < len(current_population):
+        groups = list(indices_by_job_id.values())
+        unique_population = [current_population[indices[0]] for indices in groups]
+        for k, h5_path, delta_amp in iter_generation_results(
+            fdtd, unique_population, fsp_base_path, geometry_lsf_path, simulation_lsf_path,
+            simulation_spectra_directory, temp_directory, **settings
+        ):
+            for index in groups[k]:
+                yield index, h5_path, delta_amp
+        return
+
+    if workspace is not None and len(current_population) > 1:
+        wave_size = max(1, workspace.jobs_within_budget(len(current_population)))
+        if wave_size < len(current_population):
+            # Cada onda só começa depois que os projetos da anterior foram liberados
+            start = 0
+            while start < len(current_population):
+                wave = current_population[start:start + wave_size]
+                print(f"  [Workspace] Onda de {len(wave)} jobs (orçamento de disco).")
+                for index, h5_path, delta_amp in iter_generation_results(
+                    fdtd, wave, fsp_base_path, geometry_lsf_path, simulation_lsf_path,
+                    simulation_spectra_directory, temp_directory, **settings
+                ):
+                    yield start + index, h5_path, delta_amp
+                start += len(wave)
+                wave_size = max(1, workspace.jobs_within_budget(len(current_population) - start))
+            return
+
     fsp_paths_for_gen = []
     print(f"Preparando e adicionando {len(current_population)} jobs na fila...")
-    
-    for chromosome in current_population:
-        fsp_path = prepare_lumerical_job(
-            fdtd, chromosome, fsp_base_path, geometry_lsf_path, simulation_lsf_path,temp_directory
+
+    # Com resultados exportados pelos jobs não há o que distribuir na extração: o pool só prepara os FSPs
+    if session_pool is not None and not exports_job_results(fdtd):
+        yield from _iter_generation_results_pooled(
+            fdtd, session_pool, current_population, fsp_base_path, geometry_lsf_path,
+            simulation_lsf_path, simulation_spectra_directory, temp_directory,
+            spectrum_archive, generation, fidelity, telemetry, workspace, job_timeout_s, straggler_factor
         )
-        fsp_paths_for_gen.append(fsp_path)
-        
-        # Adiciona o arquivo FSP com nome único à fila de jobs
-        fdtd.addjob(fsp_path)
-    
-    print("\n  [Job Manager] Executando todos os jobs na fila. Isso pode levar um tempo...")
-    fdtd.runjobs()
+        return
 
-    # Adicionando uma pequena pausa para garantir que os arquivos sejam liberados
-    time.sleep(2) 
-    
-    print("  [Job Manager] Todos os jobs da geração foram concluídos. Lendo e salvando os resultados...")
+    if session_pool is not None:
+        with timed(telemetry, 'prepare'):
+            fsp_paths_for_gen = session_pool.prepare_jobs(
+                current_population, fsp_base_path, geometry_lsf_path, simulation_lsf_path, temp_directory, fidelity
+            )
+        for fsp_path in fsp_paths_for_gen:
+            fdtd.addjob(fsp_path)
+        prepare_times = [None] * len(fsp_paths_for_gen)
+    else:
+        prepare_times = []
+        for chromosome in current_population:
+            prepare_start = time.perf_counter()
+            if job_template is not None:
+                fsp_path = job_template.prepare_job(fdtd, chromosome, temp_directory, fidelity)
+            else:
+                fsp_path = prepare_lumerical_job(
+                    fdtd, chromosome, fsp_base_path, geometry_lsf_path, simulation_lsf_path,temp_directory,
+                    fidelity
+                )
+            fsp_paths_for_gen.append(fsp_path)
 
-    # --- Pós-processamento e salvamento em disco no Python ---
-    output_h5_paths = []
-    monitor_name = 'in'
-    for fsp_path in fsp_paths_for_gen:
+            # Adiciona o arquivo FSP com nome único à fila de jobs
+            fdtd.addjob(fsp_path)
+            prepare_times.append(time.perf_counter() - prepare_start)
+        if telemetry is not None:
+            telemetry.add_phase('prepare', sum(prepare_times))
+
+    if workspace is not None:
+        workspace.register(fsp_paths_for_gen)
+    print("\n  [Job Manager] Executando os jobs da fila; os resultados são processados conforme terminam...")
+    extraction_fdtd = fdtd.extraction_session() if hasattr(fdtd, 'extraction_session') else fdtd
+    exported = exports_job_results(extraction_fdtd)
+    if job_template is not None and not exported:
+        job_template.deactivate(extraction_fdtd)
+    # Os cromossomos da leva são únicos: cada FSP pertence a um único índice
+    index_by_fsp_path = {fsp_path: i for i, fsp_path in enumerate(fsp_paths_for_gen)}
+
+    def extract(fsp_path):
+        # Lê o espectro e calcula o delta_amp; com resultados exportados, roda nas threads de leitura
+        timings = {'extraction_s': None, 'delta_amp_s': None}
+        extraction_start = time.perf_counter()
+        if spectrum_archive is not None:
+            spectrum = read_monitor_spectrum(extraction_fdtd, fsp_path)
+            h5_path, E = None, spectrum[1]
+            if exported:
+                # O espectro vai para o arquivo consolidado: o resultado reduzido não é mais necessário
+                os.remove(job_result_path(fsp_path))
+        else:
+            spectrum = None
+            h5_path, E = extract_monitor_spectrum(extraction_fdtd, fsp_path, simulation_spectra_directory)
+        timings['extraction_s'] = time.perf_counter() - extraction_start
+        delta_amp_start = time.perf_counter()
+        delta_amp = delta_amp_from_spectra(E)
+        timings['delta_amp_s'] = time.perf_counter() - delta_amp_start
+        return h5_path, spectrum, delta_amp, timings
+
+    def finish(fsp_path, index, completed_at, queue_wait, extraction):
+        timings = {'extraction_s': None, 'delta_amp_s': None}
         try:
-            # 1. Carrega o arquivo FSP já simulado para extrair os dados
-            fdtd.load(fsp_path)
-            
-            # 2. Extrai os dados do monitor 'in'
-            Ex_complex = fdtd.getdata(f"{monitor_name}","Ex")
-            Ey_complex = fdtd.getdata(f"{monitor_name}","Ey")
-            Ez_complex = fdtd.getdata(f"{monitor_name}","Ez")
-
-            # 3. Calcula a magnitude do vetor campo elétrico
-            E = np.sqrt(np.abs(Ex_complex[0,0,0,:])**2 
-                                           + np.abs(Ey_complex[0,0,0,:])**2 
-                                           + np.abs(Ez_complex[0,0,0,:])**2)
-
-            f = fdtd.getdata("in","f")
-            
-            # 4. Define o nome do arquivo H5 com base nos parâmetros do cromossomo
-            s_val = fdtd.getnamed("Guia Metamaterial", "s")
-            w_val = fdtd.getnamed("Guia Metamaterial", "w")
-            l_val = fdtd.getnamed("Guia Metamaterial", "l")
-            height_val = fdtd.getnamed("Guia Metamaterial", "height")
-            
-            h5_file_name = f"spectrum_s{s_val:.2e}_w{w_val:.2e}_l{l_val:.2e}_h{height_val:.2e}.h5"
-            h5_path = os.path.join(simulation_spectra_directory, h5_file_name)
-            
-            # 5. Salva os dados no arquivo H5 usando a biblioteca h5py
-            with h5py.File(h5_path, 'w') as hf:
-                hf.create_dataset(f'{monitor_name}_spectrum_E_magnitude', data=E)
-                hf.create_dataset(f'frequencies_hz', data=f)
-            
-            output_h5_paths.append(h5_path)
-            
+            h5_path, spectrum, delta_amp, timings = extraction()
+            if telemetry is not None:
+                telemetry.add_phase('extraction', timings['extraction_s'])
+                telemetry.add_phase('delta_amp', timings['delta_amp_s'])
+            if spectrum_archive is not None:
+                with timed(telemetry, 'spectrum_archive'):
+                    h5_path = _archive_result(spectrum_archive, current_population[index], generation,
+                                              spectrum, delta_amp)
             print(f"  Resultados do cromossomo salvo em: {os.path.basename(h5_path)}")
-
         except Exception as e:
             print(f"!!! Erro no pós-processamento do arquivo {os.path.basename(fsp_path)}: {e}")
-            
-    return output_h5_paths
\ No newline at end of file
+            h5_path, delta_amp = None, -float('inf')
+        if workspace is not None:
+            with timed(telemetry, 'cleanup'):
+                workspace.release(fsp_path, failed=not np.isfinite(delta_amp))
+        if telemetry is not None:
+            telemetry.record_job(
+                index=index, prepare_s=prepare_times[index], turnaround_s=completed_at - queue_start,
+                queue_wait_s=queue_wait, failed=not np.isfinite(delta_amp), **timings
+            )
+        return index, h5_path, delta_amp
+
+    # O tempo em que o processo principal fica parado esperando cada job é a espera na fila
+    queue_start = wait_start = time.perf_counter()
+    if not exported:
+        for fsp_path in _iter_completed_jobs(fdtd, fsp_paths_for_gen, job_timeout_s, straggler_factor):
+            completed_at = time.perf_counter()
+            index = index_by_fsp_path[fsp_path]
+            if telemetry is not None:
+                telemetry.add_phase('waiting_for_jobs', completed_at - wait_start)
+            yield finish(fsp_path, index, completed_at, completed_at - wait_start, lambda: extract(fsp_path))
+            wait_start = time.perf_counter()
+        return
+
+    # Resultados exportados pelos jobs: são arquivos pequenos, lidos em paralelo enquanto a fila executa
+    with ThreadPoolExecutor(max_workers=result_reader_threads) as readers:
+        pending_reads = {}
+        for fsp_path in _iter_completed_jobs(fdtd, fsp_paths_for_gen, job_timeout_s, straggler_factor):
+            completed_at = time.perf_counter()
+            index = index_by_fsp_path[fsp_path]
+            if telemetry is not None:
+                telemetry.add_phase('waiting_for_jobs', completed_at - wait_start)
+            future = readers.submit(extract, fsp_path)
+            pending_reads[future] = (fsp_path, index, completed_at, completed_at - wait_start)
+            for future in [f for f in pending_reads if f.done()]:
+                yield finish(*pending_reads.pop(future), future.result)
+            wait_start = time.perf_counter()
+
+        for future in as_completed(list(pending_reads)):
+            yield finish(*pending_reads.pop(future), future.result)
+
+
+def _iter_generation_results_pooled(fdtd, session_pool, current_population, fsp_base_path, geometry_lsf_path,
+                                    simulation_lsf_path, simulation_spectra_directory, temp_directory,
+                                    spectrum_archive=None, generation=0, fidelity=None, telemetry=None,
+                                    workspace=None, job_timeout_s=None, straggler_factor=None):
+    with timed(telemetry, 'prepare'):
+        fsp_paths_for_gen = session_pool.prepare_jobs(
+            current_population, fsp_base_path, geometry_lsf_path, simulation_lsf_path, temp_directory, fidelity
+        )
+    for fsp_path in fsp_paths_for_gen:
+        fdtd.addjob(fsp_path)
+    if workspace is not None:
+        workspace.register(fsp_paths_for_gen)
+
+    print(f"\n  [Job Manager] Executando os jobs da fila; extração distribuída em {session_pool.n_workers} sessões...")
+    index_by_fsp_path = {fsp_path: i for i, fsp_path in enumerate(fsp_paths_for_gen)}
+
+    def finish(future):
+        fsp_path, index, completed_at, submitted_at = pending_extractions.pop(future)
+        h5_path, delta_amp, spectrum = future.result()
+        if workspace is not None:
+            with timed(telemetry, 'cleanup'):
+                workspace.release(fsp_path, failed=not np.isfinite(delta_amp))
+        if spectrum_archive is not None and spectrum is not None:
+            with timed(telemetry, 'spectrum_archive'):
+                h5_path = _archive_result(spectrum_archive, current_population[index], generation,
+                                          spectrum, delta_amp)
+        if telemetry is not None:
+            # A extração acontece em outro processo: o tempo inclui a espera por um processo livre
+            telemetry.record_job(
+                index=index, turnaround_s=completed_at - queue_start,
+                queue_wait_s=queue_waits.pop(index, 0.0),
+                extraction_s=time.perf_counter() - submitted_at, failed=not np.isfinite(delta_amp)
+            )
+        return index, h5_path, delta_amp
+
+    # Cada job concluído vai para o pool; os resultados são produzidos conforme as extrações terminam
+    pending_extractions = {}
+    queue_waits = {}
+    queue_start = wait_start = time.perf_counter()
+    for fsp_path in _iter_completed_jobs(fdtd, fsp_paths_for_gen, job_timeout_s, straggler_factor):
+        completed_at = time.perf_counter()
+        index = index_by_fsp_path[fsp_path]
+        queue_waits[index] = completed_at - wait_start
+        if telemetry is not None:
+            telemetry.add_phase('waiting_for_jobs', completed_at - wait_start)
+        future = session_pool.submit_extraction(
+            fsp_path, simulation_spectra_directory, return_spectrum=spectrum_archive is not None
+        )
+        pending_extractions[future] = (fsp_path, index, completed_at, time.perf_counter())
+        for future in [f for f in pending_extractions if f.done()]:
+            yield finish(future)
+        wait_start = time.perf_counter()
+
+    wait_start = time.perf_counter()
+    for future in as_completed(list(pending_extractions)):
+        if telemetry is not None:
+            telemetry.add_phase('waiting_for_extraction', time.perf_counter() - wait_start)
+        yield finish(future)
+        wait_start = time.perf_counter()
+
+
+def simulate_generation_lumerical(fdtd, current_population, fsp_base_path, geometry_lsf_path,
+                                  simulation_lsf_path, simulation_spectra_directory,temp_directory,
+                                  on_result=None, job_template=None, session_pool=None,
+                                  spectrum_archive=None, generation=0, fidelity=None, telemetry=None,
+                                  workspace=None):
+    """
+    Prepara e executa as simulações para uma geração inteira de cromossomos usando a fila de jobs.
+    Cada resultado é lido e salvo em um arquivo .h5 assim que o seu job termina.
+    
+    Args:
+        fdtd: A sessão de simulação (lumapi.FDTD ou um backend de utils/simulation_backend.py).
+        current_population (list): Uma lista de dicionários, onde cada um representa um cromossomo.
+        fsp_base_path: O caminho base para o arquivo FSP temporário.
+        geometry_lsf_path: O caminho para o script LSF que cria a geometria.
+        simulation_lsf_path: O caminho para o script LSF que adiciona os elementos de simulação.
+        simulation_spectra_directory: O diretório onde os arquivos de saída .h5 serão salvos.
+        on_result (callable): Opcional. Chamado como on_result(índice, h5_path, delta_amp)
+            para cada indivíduo, na ordem de conclusão.
+        job_template (LumericalJobTemplate): Opcional. Gera os FSPs a partir de um template.
+        session_pool (SessionPool): Opcional. Distribui preparação e extração entre várias sessões.
+        spectrum_archive (SpectrumArchive): Opcional. Guarda os espectros no arquivo consolidado.
+        generation (int): Geração registrada no arquivo consolidado.
+        fidelity (dict): Opcional. Parâmetros de fidelidade dos jobs (ver utils/fidelity.py).
+        telemetry (RunTelemetry): Opcional. Registra os tempos das fases e dos jobs.
+        workspace (SimulationWorkspace): Opcional. Remove cada projeto após a extração.
+        
+    Returns:
+        Uma lista com o caminho do arquivo .h5 de cada cromossomo, na ordem da população.
+        Cromossomos cuja extração falhou recebem None.
+    """
+    output_h5_paths = [None] * len(current_population)
+    for index, h5_path, delta_amp in iter_generation_results(
+        fdtd, current_population, fsp_base_path, geometry_lsf_path,
+        simulation_lsf_path, simulation_spectra_directory, temp_directory,
+        job_template=job_template, session_pool=session_pool,
+        spectrum_archive=spectrum_archive, generation=generation, fidelity=fidelity, telemetry=telemetry,
+        workspace=workspace
+    ):
+        output_h5_paths[index] = h5_path
+        if on_result is not None:
+            on_result(index, h5_path, delta_amp)
+
+    print("  [Job Manager] Todos os jobs da geração foram concluídos.")
+    return output_h5_paths
@@ -0,0 +1,431 @@
+# optimizers.py
+
+import os
+import sys
+import math
+
+import numpy as np
+
+from utils.genetic import GeneticOptimizer
+
+OPTIMIZER_ALGORITHMS = ('genetic', 'cmaes', 'differential_evolution')
+
+
+class BatchOptimizer:
+    """
+    Base dos otimizadores com a mesma interface do GeneticOptimizer.
+
+    O contrato é o de ask/tell em lote: ask(n) devolve 'n' cromossomos
+    (dicionários com s, w, l, height) dentro de 'param_ranges' e tell(cromossomos,
+    delta_amps) incorpora os resultados, em qualquer ordem e em lotes de
+    qualquer tamanho. O modo geracional do main.py (population, evolve) é
+    montado sobre o mesmo contrato: evolve informa os resultados da população
+    atual e pede uma nova população de 'population_size' cromossomos.
+
+    As subclasses implementam _propose(n), que devolve um array (n x 4) de
+    cromossomos, e _learn(genes, fitness), que atualiza o estado interno.
+    """
+
+    def __init__(self, population_size, generations, s_range, w_range, l_range, height_range, seed=None):
+        self.population_size = population_size
+        self.generations = generations
+        self.mutation_rate = None
+        self.param_ranges = {
+            's': s_range,
+            'w': w_range,
+            'l': l_range,
+            'height': height_range
+        }
+        self.param_names = list(self.param_ranges.keys())
+        self._lower = np.array([self.param_ranges[p][0] for p in self.param_names], dtype=float)
+        self._upper = np.array([self.param_ranges[p][1] for p in self.param_names], dtype=float)
+        self.rng = np.random.default_rng(seed)
+
+        self.genes = np.empty((0, len(self.param_names)))
+        self.best_individual = None
+        self.best_fitness = -float('inf')
+        self.fitness_history = []
+        self.evaluations = 0
+
+    # --- Conversões ---
+
+    def _to_dicts(self, genes):
+        return [dict(zip(self.param_names, row)) for row in genes.tolist()]
+
+    def _to_array(self, chromosomes):
+        return np.array([[c[p] for p in self.param_names] for c in chromosomes],
+                        dtype=float).reshape(-1, len(self.param_names))
+
+    def _normalize(self, genes):
+        """Parâmetros físicos -> cubo unitário [0, 1]^4."""
+        return (genes - self._lower) / (self._upper - self._lower)
+
+    def _denormalize(self, unit):
+        """Cubo unitário -> parâmetros físicos, limitados aos ranges."""
+        return self._lower + np.clip(unit, 0.0, 1.0) * (self._upper - self._lower)
+
+    def calculate_fitness_batch(self, delta_amps):
+        fitness = np.asarray(delta_amps, dtype=float).copy()
+        fitness[~np.isfinite(fitness)] = -np.inf
+        return fitness
+
+    # --- Contrato ask/tell ---
+
+    def _propose(self, n):
+        raise NotImplementedError
+
+    def _learn(self, genes, fitness):
+        raise NotImplementedError
+
+    def ask(self, n=1):
+        """Retorna 'n' novos cromossomos para avaliar (lista de dicionários)."""
+        return self._to_dicts(self._propose(n))
+
+    def tell(self, chromosomes, delta_amps):
+        """
+        Incorpora os resultados de cromossomos avaliados.
+
+        O histórico de fitness recebe um ponto a cada 'population_size'
+        avaliações, equivalente a uma geração (como no GeneticOptimizer).
+        """
+        if len(chromosomes) != len(delta_amps):
+            raise ValueError("O número de resultados de delta_amp não corresponde ao número de cromossomos.")
+        if len(chromosomes) == 0:
+            return
+
+        genes = self._to_array(chromosomes)
+        fitness = self.calculate_fitness_batch(delta_amps)
+
+        running_best = np.maximum.accumulate(np.concatenate([[self.best_fitness], fitness]))[1:]
+        counts = self.evaluations + np.arange(1, len(fitness) + 1)
+        self.fitness_history.extend(running_best[counts % self.population_size == 0].tolist())
+        self.evaluations += len(fitness)
+
+        best = int(np.argmax(fitness))
+        if fitness[best] > self.best_fitness:
+            self.best_fitness = float(fitness[best])
+            self.best_individual = dict(zip(self.param_names, genes[best].tolist()))
+            self.best_individual['fitness'] = self.best_fitness
+
+        self._learn(genes, fitness)
+
+    # --- Interface geracional (main.py) ---
+
+    @property
+    def population(self):
+        return self._to_dicts(self.genes)
+
+    def initialize_population(self):
+        self.genes = self._propose(self.population_size)
+
+    def evolve(self, current_generation_delta_amps, offspring_selector=None):
+        """
+        Informa os resultados da população atual e gera a próxima.
+
+        Args:
+            current_generation_delta_amps (list): delta_amp de cada indivíduo, na ordem da população.
+            offspring_selector (callable): Opcional. Como no GeneticOptimizer: são propostos
+                'oversample_factor' vezes mais cromossomos e o selecionador escolhe os simulados.
+        """
+        if len(current_generation_delta_amps) != len(self.genes):
+            raise ValueError("O número de resultados de delta_amp não corresponde ao tamanho da população.")
+        self.tell(self.population, current_generation_delta_amps)
+
+        if offspring_selector is None:
+            self.genes = self._propose(self.population_size)
+        else:
+            candidates = self.ask(self.population_size * offspring_selector.oversample_factor)
+            self.genes = self._to_array(offspring_selector(candidates, self.population_size))
+        return self.population
+
+
+class CMAESOptimizer(BatchOptimizer):
+    """
+    CMA-ES (estratégia evolutiva com adaptação da matriz de covariância).
+
+    A busca é feita no cubo unitário (parâmetros normalizados pelos ranges);
+    amostras fora dele são limitadas à borda antes de serem avaliadas, e é o
+    ponto limitado que entra na atualização. Os resultados são acumulados e
+    a distribuição é atualizada a cada 'population_size' (lambda) avaliações,
+    venham elas de uma geração completa ou de avaliações assíncronas.
+    Simulações que falharam (-inf) ficam no fim da ordenação.
+
+    Args:
+        sigma0 (float): Passo inicial, em fração dos ranges.
+        initial_mean (dict): Opcional. Centro inicial da busca (padrão: centro dos ranges).
+    """
+
+    def __init__(self, population_size, generations, s_range, w_range, l_range, height_range,
+                 sigma0=0.3, initial_mean=None, seed=None):
+        super().__init__(population_size, generations, s_range, w_range, l_range, height_range, seed)
+        n = len(self.param_names)
+        if initial_mean is None:
+            self.mean = np.full(n, 0.5)
+        else:
+            self.mean = self._normalize(self._to_array([initial_mean])[0])
+        self.sigma = sigma0
+
+        # Constantes padrão (Hansen, "The CMA Evolution Strategy: A Tutorial")
+        self.mu = max(1, population_size // 2)
+        weights = np.log(self.mu + 0.5) - np.log(np.arange(1, self.mu + 1))
+        self.weights = weights / weights.sum()
+        self.mueff = 1.0 / np.sum(self.weights ** 2)
+        self.cc = (4 + self.mueff / n) / (n + 4 + 2 * self.mueff / n)
+        self.cs = (self.mueff + 2) / (n + self.mueff + 5)
+        self.c1 = 2 / ((n + 1.3) ** 2 + self.mueff)
+        self.cmu = min(1 - self.c1, 2 * (self.mueff - 2 + 1 / self.mueff) / ((n + 2) ** 2 + self.mueff))
+        self.damps = 1 + 2 * max(0.0, math.sqrt((self.mueff - 1) / (n + 1)) - 1) + self.cs
+        self.chi_n = math.sqrt(n) * (1 - 1 / (4 * n) + 1 / (21 * n ** 2))
+
+        self.pc = np.zeros(n)
+        self.ps = np.zeros(n)
+        self.B = np.eye(n)
+        self.D = np.ones(n)
+        self.C = np.eye(n)
+        self.updates = 0
+        self._buffer_x = np.empty((0, n))
+        self._buffer_fitness = np.empty(0)
+
+    def _propose(self, n):
+        z = self.rng.standard_normal((n, len(self.param_names)))
+        unit = self.mean + self.sigma * (z * self.D) @ self.B.T
+        return self._denormalize(unit)
+
+    def _learn(self, genes, fitness):
+        self._buffer_x = np.vstack([self._buffer_x, self._normalize(genes)])
+        self._buffer_fitness = np.concatenate([self._buffer_fitness, fitness])
+        while len(self._buffer_fitness) >= self.population_size:
+            x = self._buffer_x[:self.population_size]
+            f = self._buffer_fitness[:self.population_size]
+            self._buffer_x = self._buffer_x[self.population_size:]
+            self._buffer_fitness = self._buffer_fitness[self.population_size:]
+            if np.isfinite(f).any():
+                self._update_distribution(x, f)
+
+    def _update_distribution(self, x, fitness):
+        n = len(self.param_names)
+        order = np.argsort(-fitness, kind='stable')[:self.mu]
+        old_mean = self.mean
+        self.mean = self.weights @ x[order]
+        step = (self.mean - old_mean) / self.sigma
+
+        inv_sqrt_C = self.B @ np.diag(1 / self.D) @ self.B.T
+        self.ps = (1 - self.cs) * self.ps + math.sqrt(self.cs * (2 - self.cs) * self.mueff) * inv_sqrt_C @ step
+        self.updates += 1
+        ps_norm = np.linalg.norm(self.ps)
+        hsig = ps_norm / math.sqrt(1 - (1 - self.cs) ** (2 * self.updates)) / self.chi_n < 1.4 + 2 / (n + 1)
+        self.pc = (1 - self.cc) * self.pc + hsig * math.sqrt(self.cc * (2 - self.cc) * self.mueff) * step
+
+        artmp = (x[order] - old_mean) / self.sigma
+        self.C = ((1 - self.c1 - self.cmu) * self.C
+                  + self.c1 * (np.outer(self.pc, self.pc) + (1 - hsig) * self.cc * (2 - self.cc) * self.C)
+                  + self.cmu * artmp.T @ np.diag(self.weights) @ artmp)
+        # O passo não passa do tamanho do cubo unitário
+        self.sigma = min(1.0, self.sigma * math.exp((self.cs / self.damps) * (ps_norm / self.chi_n - 1)))
+
+        self.C = np.triu(self.C) + np.triu(self.C, 1).T
+        eigenvalues, self.B = np.linalg.eigh(self.C)
+        self.D = np.sqrt(np.maximum(eigenvalues, 1e-20))
+
+
+class DifferentialEvolutionOptimizer(BatchOptimizer):
+    """
+    Evolução diferencial (DE/current-to-best/1/bin).
+
+    Os 'population_size' primeiros cromossomos são sorteados nos ranges e
+    formam a população. Depois, cada cromossomo pedido é um vetor de teste
+    para um membro (percorridos em ordem circular): membro + F (melhor - membro)
+    + F (r1 - r2), com cruzamento binomial de taxa CR. Quando o resultado
+    chega, o teste substitui o seu membro se não for pior. Em uma geração
+    completa isso é a DE clássica; no modo steady-state, cada teste é gerado
+    com a população do momento.
+
+    Args:
+        differential_weight (float): Fator F (registrado como 'mutation_rate').
+        crossover_rate (float): Probabilidade CR de cada parâmetro vir do vetor mutante.
+    """
+
+    def __init__(self, population_size, generations, s_range, w_range, l_range, height_range,
+                 differential_weight=0.7, crossover_rate=0.9, seed=None):
+        super().__init__(population_size, generations, s_range, w_range, l_range, height_range, seed)
+        self.differential_weight = differential_weight
+        self.crossover_rate = crossover_rate
+        self.mutation_rate = differential_weight
+        self.members = np.empty((0, len(self.param_names)))
+        self.member_fitness = np.empty(0)
+        self._next_target = 0
+        self._pending = {}  # cromossomo proposto -> membros alvo (None para os aleatórios)
+        self._pending_random = 0
+
+    def _trial(self, target):
+        unit = self._normalize(self.members)
+        others = np.setdiff1d(np.arange(len(unit)), [target])
+        r1, r2 = self.rng.choice(others, 2, replace=False)
+        best = int(np.argmax(self.member_fitness))
+        F = self.differential_weight
+        mutant = unit[target] + F * (unit[best] - unit[target]) + F * (unit[r1] - unit[r2])
+        # Fora dos ranges: ponto médio entre o membro e a borda violada
+        mutant = np.where(mutant < 0, unit[target] / 2, mutant)
+        mutant = np.where(mutant > 1, (unit[target] + 1) / 2, mutant)
+        from_mutant = self.rng.random(len(mutant)) < self.crossover_rate
+        from_mutant[self.rng.integers(len(mutant))] = True
+        return np.where(from_mutant, mutant, unit[target])
+
+    def _propose(self, n):
+        proposals = []
+        for _ in range(n):
+            if len(self.members) + self._pending_random < self.population_size or len(self.members) < 3:
+                unit, target = self.rng.random(len(self.param_names)), None
+                self._pending_random += 1
+            else:
+                target = self._next_target % len(self.members)
+                self._next_target = target + 1
+                unit = self._trial(target)
+            genes = self._denormalize(unit)
+            self._pending.setdefault(tuple(genes.tolist()), []).append(target)
+            proposals.append(genes)
+        return np.array(proposals).reshape(-1, len(self.param_names))
+
+    def _learn(self, genes, fitness):
+        for row, value in zip(genes, fitness):
+            targets = self._pending.get(tuple(row.tolist()))
+            target = targets.pop(0) if targets else None
+            if targets == []:
+                del self._pending[tuple(row.tolist())]
+            if target is None:
+                if targets is not None:
+                    self._pending_random = max(0, self._pending_random - 1)
+                # Cromossomo aleatório (ou vindo de fora, ex.: do cache): entra se houver vaga ou se for melhor que o pior
+                if len(self.members) < self.population_size:
+                    self.members = np.vstack([self.members, row])
+                    self.member_fitness = np.append(self.member_fitness, value)
+                else:
+                    worst = int(np.argmin(self.member_fitness))
+                    if value > self.member_fitness[worst]:
+                        self.members[worst], self.member_fitness[worst] = row, value
+            elif value >= self.member_fitness[target]:
+                self.members[target], self.member_fitness[target] = row, value
+
+
+def create_optimizer(algorithm, population_size, mutation_rate, generations,
+                     s_range, w_range, l_range, height_range, seed=None, **options):
+    """
+    Cria o otimizador escolhido em main.py.
+
+    Args:
+        algorithm (str): 'genetic', 'cmaes' ou 'differential_evolution'.
+        mutation_rate (float): Usado só pelo algoritmo genético.
+        **options: Parâmetros específicos do algoritmo (ex.: sigma0, differential_weight).
+    """
+    ranges = (s_range, w_range, l_range, height_range)
+    if algorithm == 'genetic':
+        return GeneticOptimizer(population_size, mutation_rate, generations, *ranges, seed=seed, **options)
+    if algorithm == 'cmaes':
+        return CMAESOptimizer(population_size, generations, *ranges, seed=seed, **options)
+    if algorithm == 'differential_evolution':
+        return DifferentialEvolutionOptimizer(population_size, generations, *ranges, seed=seed, **options)
+    raise ValueError(f"Algoritmo de otimização desconhecido: '{algorithm}'. Use um de {OPTIMIZER_ALGORITHMS}.")
+
+
+def experiment_param_ranges(config=None):
+    """
+    Os ranges dos parâmetros de um experimento do main.py.
+
+    Args:
+        config (dict): Opcional. Configurações do experimento (ver main.run_experiment);
+            sem elas, os valores padrão do main.py.
+
+    Returns:
+        Um dicionário {'s', 'w', 'l', 'height': (mínimo, máximo)}.
+    """
+    import main
+    from utils.experiment_config import apply_config
+
+    settings = apply_config(main._DEFAULT_SETTINGS, config or {})
+    return {name: tuple(settings[f'{name}_range']) for name in ('s', 'w', 'l', 'height')}
+
+
+def compare_optimizers(csv_paths=None, algorithms=OPTIMIZER_ALGORITHMS, population_size=30, max_generations=100,
+                       target_fraction=0.99, target_delta_amp=None, seeds=range(5), mutation_rate=0.2,
+                       max_training_points=1500, param_ranges=None):
+    """
+    Compara os otimizadores em um modelo substituto ajustado aos CSVs registrados.
+
+    O processo gaussiano de utils.surrogate é ajustado com as avaliações de
+    alta fidelidade registradas e a sua média prevista faz o papel do FDTD. Cada
+    algoritmo roda no modo geracional do main.py (initialize_population /
+    evolve) até alcançar o delta_amp alvo ou esgotar 'max_generations'.
+
+    Args:
+        csv_paths: Lista de caminhos ou padrão glob (padrão: simulation_results/full_optimization_data_*.csv).
+        target_fraction (float): Se 'target_delta_amp' não for informado, o alvo é esta
+            fração do maior delta_amp registrado.
+        seeds: Sementes; cada algoritmo roda uma vez por semente.
+        param_ranges (dict): Opcional. Os ranges de 's', 'w', 'l' e 'height' (padrão: os do
+            main.py, ver experiment_param_ranges).
+
+    Returns:
+        Um dicionário {algoritmo: {'evaluations_to_target': lista por semente (None se não
+        alcançou), 'best_fitness': lista por semente}} e o alvo em 'target'.
+    """
+    import pandas as pd
+
+    from utils.surrogate import GaussianProcessSurrogate, load_training_data, PARAM_NAMES
+
+    if param_ranges is None:
+        param_ranges = experiment_param_ranges()
+    ranges = tuple(tuple(param_ranges[name]) for name in PARAM_NAMES)
+    if csv_paths is None:
+        results_directory = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                         "simulation_results")
+        csv_paths = os.path.join(results_directory, "full_optimization_data_*.csv")
+    X, y = load_training_data(csv_paths)
+    # Elites e cópias se repetem muito nos CSVs: o modelo é ajustado com a média de cada cromossomo distinto
+    df = pd.DataFrame(X, columns=list(PARAM_NAMES))
+    df['delta_amp'] = y
+    unique = df.groupby(list(PARAM_NAMES), as_index=False)['delta_amp'].mean()
+    surrogate = GaussianProcessSurrogate(dict(zip(PARAM_NAMES, ranges)), max_points=max_training_points)
+    surrogate.fit(unique[list(PARAM_NAMES)].to_numpy(), unique['delta_amp'].to_numpy())
+
+    if target_delta_amp is None:
+        target_delta_amp = target_fraction * y.max()
+    print(f"  [Otimizadores] Substituto ajustado com {len(unique)} cromossomos distintos; "
+          f"alvo: delta_amp >= {target_delta_amp:.4f}")
+
+    results = {'target': target_delta_amp}
+    for algorithm in algorithms:
+        evaluations_to_target, best_values = [], []
+        for seed in seeds:
+            optimizer = create_optimizer(algorithm, population_size, mutation_rate, max_generations,
+                                         *ranges, seed=seed)
+            optimizer.initialize_population()
+            population = optimizer.population
+            evaluations = 0
+            reached = None
+            for _ in range(max_generations):
+                delta_amps = surrogate.predict_mean(population).tolist()
+                hits = np.flatnonzero(np.asarray(delta_amps) >= target_delta_amp)
+                if hits.size:
+                    reached = evaluations + int(hits[0]) + 1
+                evaluations += len(delta_amps)
+                population = optimizer.evolve(delta_amps)
+                if reached is not None:
+                    break
+            evaluations_to_target.append(reached)
+            best_values.append(optimizer.best_fitness)
+        results[algorithm] = {'evaluations_to_target': evaluations_to_target, 'best_fitness': best_values}
+
+        successes = [e for e in evaluations_to_target if e is not None]
+        median = f"{np.median(successes):7.0f}" if successes else "      -"
+        print(f"  [Otimizadores] {algorithm:>22}: alvo alcançado em {len(successes)}/{len(evaluations_to_target)} "
+              f"execuções; mediana de {median} avaliações; melhor previsto {np.max(best_values):.4f}")
+    return results
+
+
+if __name__ == '__main__':
+    # Um arquivo de configuração opcional (TOML ou JSON) define os ranges, como em main.py --config
+    from utils.experiment_config import load_experiment_config
+
+    config = load_experiment_config(sys.argv[1]) if len(sys.argv) > 1 else None
+    print("Comparando os otimizadores em um modelo substituto ajustado aos CSVs registrados...")
+    compare_optimizers(param_ranges=experiment_param_ranges(config))
@@ -0,0 +1,123 @@
+# plot_worker.py
+
+import os
+import time
+import queue
+import datetime
+import multiprocessing
+
+
+def _render(kind, request, readers):
+    # Importados só no processo de desenho: o loop de otimização não espera o matplotlib
+    from utils.analysis import plot_correlation_heatmap, plot_pairplot, ANALYSIS_COLUMNS
+    from utils.experiment_end import plot_fitness_history
+    from utils.results_log import ResultsLogReader
+
+    if kind == 'fitness_history':
+        fitness_history, plot_path, current_time = request
+        plot_fitness_history(fitness_history, plot_path, current_time)
+    elif kind == 'heatmap':
+        correlation_matrix, heatmap_output_path = request
+        plot_correlation_heatmap(correlation_matrix, heatmap_output_path)
+    elif kind == 'pairplot':
+        csv_path, pairplot_output_path = request
+        # O CSV é lido incrementalmente pelo próprio processo de desenho
+        reader = readers.setdefault(csv_path, ResultsLogReader(csv_path))
+        reader.read_new()
+        df = reader.data
+        df = df[df['delta_amp'] > -1e30]
+        if len(df) > 1:
+            plot_pairplot(df[ANALYSIS_COLUMNS], pairplot_output_path)
+
+
+def _plot_worker_loop(requests, pairplot_interval):
+    import matplotlib
+    matplotlib.use('Agg')
+
+    pending = {}
+    readers = {}
+    last_pairplot = -float('inf')
+    closing = False
+    while True:
+        timeout = None
+        if 'pairplot' in pending:
+            timeout = max(0.0, last_pairplot + pairplot_interval - time.monotonic())
+        try:
+            message = requests.get(timeout=timeout)
+        except queue.Empty:
+            message = None
+
+        # Agrupa tudo o que já está na fila: de cada tipo, só o pedido mais recente é desenhado
+        while message is not None:
+            if message[0] == 'close':
+                closing = True
+            else:
+                pending[message[0]] = message[1]
+            try:
+                message = requests.get_nowait()
+            except queue.Empty:
+                message = None
+
+        for kind in list(pending):
+            throttled = kind == 'pairplot' and not closing and \
+                time.monotonic() - last_pairplot < pairplot_interval
+            if throttled:
+                continue
+            request = pending.pop(kind)
+            try:
+                _render(kind, request, readers)
+            except Exception as e:
+                print(f"!!! Erro ao desenhar o gráfico '{kind}' em segundo plano: {e}")
+            if kind == 'pairplot':
+                last_pairplot = time.monotonic()
+
+        if closing:
+            return
+
+
+class PlotWorker:
+    """
+    Processo em segundo plano que desenha os gráficos do experimento.
+
+    Os pedidos são enviados sem bloqueio. Se vários pedidos do mesmo tipo
+    se acumularem enquanto um gráfico está sendo desenhado, só o mais recente
+    é desenhado. O pairplot (o gráfico mais caro) é desenhado no máximo uma
+    vez a cada 'pairplot_interval' segundos; os pedidos pendentes são sempre
+    desenhados ao fechar o processo.
+
+    Args:
+        pairplot_interval (float): Intervalo mínimo, em segundos, entre dois pairplots.
+    """
+
+    def __init__(self, pairplot_interval=60.0):
+        context = multiprocessing.get_context('spawn')
+        self._requests = context.Queue()
+        self._process = context.Process(
+            target=_plot_worker_loop, args=(self._requests, pairplot_interval), daemon=True
+        )
+        self._process.start()
+
+    def _submit(self, kind, request):
+        self._requests.put((kind, request))
+
+    def submit_fitness_history(self, fitness_history, plot_path, current_time=None):
+        self._submit('fitness_history', (fitness_history, plot_path, current_time or datetime.datetime.now()))
+
+    def submit_heatmap(self, correlation_matrix, heatmap_output_path):
+        self._submit('heatmap', (correlation_matrix, heatmap_output_path))
+
+    def submit_pairplot(self, csv_path, pairplot_output_path):
+        self._submit('pairplot', (os.path.abspath(csv_path), pairplot_output_path))
+
+    def close(self, timeout=None):
+        """Desenha os pedidos pendentes e encerra o processo."""
+        if self._process.is_alive():
+            self._submit('close', None)
+            self._process.join(timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
@@ -3,7 +3,9 @@ import numpy as np
 import os
 import re
 
-def calculate_delta_amp(output_h5_path, monitor_name='in'):
+
+def _read_spectrum(output_h5_path, monitor_name='in'):
+    """Lê o espectro |E|(f) de um arquivo H5 gerado pelo workflow."""
     with h5py.File(output_h5_path, 'r') as f:
         # Verifica se o monitor existe e tem os datasets esperados
         if 'frequencies_hz' not in f or \
@@ -13,33 +15,154 @@ def calculate_delta_amp(output_h5_path, monitor_name='in'):
         # Coleta os dados de frequência e magnitude do campo elétrico
         frequencies_hz = f['frequencies_hz'][:].flatten()
         spectrum_E_magnitude = f[f'{monitor_name}_spectrum_E_magnitude'][:].flatten()
+    return frequencies_hz, spectrum_E_magnitude
+
+
+def job_result_path(fsp_path):
+    """Arquivo de resultado reduzido de um job, gravado ao lado do seu FSP."""
+    return os.path.splitext(fsp_path)[0] + "_result.h5"
+
+
+def write_job_result(result_path, frequencies_hz, spectrum_E_magnitude, parameters=None, monitor_name='in'):
+    """
+    Grava o resultado reduzido de um job: só |E|(f) do monitor e os parâmetros do guia.
+
+    O formato é o mesmo dos arquivos de espectro do workflow (ver _read_spectrum),
+    de modo que o arquivo pode ser lido diretamente ou movido para o diretório
+    de espectros. A escrita é atômica: quem espera o arquivo nunca lê um
+    resultado gravado pela metade.
+
+    Args:
+        parameters (dict): Opcional. Parâmetros do guia (s, w, l, height), gravados como atributos.
+    """
+    temp_path = f"{result_path}.{os.getpid()}.tmp"
+    with h5py.File(temp_path, 'w') as hf:
+        hf.create_dataset(f'{monitor_name}_spectrum_E_magnitude', data=spectrum_E_magnitude)
+        hf.create_dataset('frequencies_hz', data=frequencies_hz)
+        for name, value in (parameters or {}).items():
+            hf.attrs[name] = value
+    os.replace(temp_path, result_path)
+
+
+def read_job_result(result_path, monitor_name='in'):
+    """
+    Lê um resultado gravado por write_job_result.
+
+    Returns:
+        Uma tupla (frequências em Hz, magnitude |E| do espectro, parâmetros do guia).
+    """
+    if not os.path.exists(result_path):
+        # O job não terminou com sucesso e não gravou o resultado reduzido
+        raise FileNotFoundError(f"O job não gravou o resultado '{os.path.basename(result_path)}'.")
+    with h5py.File(result_path, 'r') as f:
+        if 'frequencies_hz' not in f or f'{monitor_name}_spectrum_E_magnitude' not in f:
+            raise ValueError(f"Arquivo H5 '{result_path}' não contém os datasets esperados ('frequencies_hz' e '{monitor_name}_spectrum_E_magnitude').")
+        frequencies_hz = f['frequencies_hz'][:].flatten()
+        spectrum_E_magnitude = f[f'{monitor_name}_spectrum_E_magnitude'][:].flatten()
+        parameters = {name: float(value) for name, value in f.attrs.items()}
+    return frequencies_hz, spectrum_E_magnitude, parameters
+
+
+def delta_amp_from_spectra(spectra):
+    """
+    Calcula o delta_amp de vários espectros de uma só vez.
+
+    Um ponto interior é pico se for maior que os dois vizinhos e vale se for
+    menor. Cada pico é pareado com o primeiro vale à sua direita e o delta_amp
+    é a soma de |pico - vale| na ordem dos picos, exatamente como no laço
+    original. Os extremos de todos os espectros são listados juntos e o vale
+    seguinte de cada pico sai de um mínimo acumulado reverso, sem laços em Python.
+
+    Args:
+        spectra (array): Matriz (n_espectros x n_pontos) ou vetor de um único espectro.
+            Todos os espectros da matriz devem ter o mesmo número de pontos.
+
+    Returns:
+        Um array com o delta_amp de cada espectro (ou um float para um vetor).
+    """
+    spectra = np.ascontiguousarray(spectra)
+    single = spectra.ndim == 1
+    spectra = np.atleast_2d(spectra)
+    n_spectra, n_points = spectra.shape
+    result = np.zeros(n_spectra)
+    if n_points < 3:
+        return float(result[0]) if single else result
+
+    # Máscaras de picos e vales nos pontos interiores (n_espectros x n_pontos-2)
+    rising = spectra[:, 1:] > spectra[:, :-1]
+    falling = spectra[:, 1:] < spectra[:, :-1]
+    is_peak = rising[:, :-1] & falling[:, 1:]
+    is_valley = falling[:, :-1] & rising[:, 1:]
+    width = n_points - 2
+
+    # Para cada extremo (índice linear), o índice linear do próximo vale
+    extrema = np.flatnonzero(is_peak | is_valley)
+    extremum_is_valley = is_valley.reshape(-1)[extrema]
+    sentinel = n_spectra * width
+    next_valley = np.minimum.accumulate(np.where(extremum_is_valley, extrema, sentinel)[::-1])[::-1]
+
+    # Descarta picos sem vale seguinte no mesmo espectro
+    peaks = extrema[~extremum_is_valley]
+    valleys = next_valley[~extremum_is_valley]
+    peak_rows = peaks // width
+    same_row = (valleys < sentinel) & (valleys // width == peak_rows)
+    peaks, valleys, peak_rows = peaks[same_row], valleys[same_row], peak_rows[same_row]
+    if len(peaks) == 0:
+        return float(result[0]) if single else result
+
+    # Converte os índices da grade interior para a matriz completa (+1 coluna, +2 por linha)
+    flat = spectra.reshape(-1)
+    differences = np.abs(flat[peaks + 2 * peak_rows + 1] - flat[valleys + 2 * peak_rows + 1])
+
+    # Soma sequencial por espectro (cumsum), reproduzindo o arredondamento do laço original
+    counts = np.bincount(peak_rows, minlength=n_spectra)
+    slots = np.arange(len(differences)) - (np.cumsum(counts) - counts)[peak_rows]
+    padded = np.zeros((n_spectra, counts.max()), dtype=differences.dtype)
+    padded[peak_rows, slots] = differences
+    result = np.cumsum(padded, axis=1)[:, -1]
+    return float(result[0]) if single else result
+
+
+def calculate_delta_amp(output_h5_path, monitor_name='in'):
+    _, spectrum_E_magnitude = _read_spectrum(output_h5_path, monitor_name)
+    return delta_amp_from_spectra(spectrum_E_magnitude)
+
+
+def calculate_delta_amp_batch(output_h5_paths, monitor_name='in'):
+    """
+    Calcula o delta_amp de uma geração inteira (ou de um arquivo de espectros).
+
+    Os espectros são empilhados por número de pontos (e tipo numérico) e
+    avaliados em uma única chamada vetorizada por grupo. Arquivos ausentes
+    (None) ou inválidos recebem -inf, mantendo o alinhamento com a lista.
+
+    Args:
+        output_h5_paths (list): Lista de caminhos para os arquivos .h5 (ou None).
+        monitor_name (str): Nome do monitor usado nos datasets.
+
+    Returns:
+        Uma lista de delta_amp na mesma ordem dos caminhos.
+    """
+    results = [-float('inf')] * len(output_h5_paths)
+    spectra_by_shape = {}
+    for i, h5_path in enumerate(output_h5_paths):
+        if h5_path is None:
+            continue
+        try:
+            _, spectrum_E_magnitude = _read_spectrum(h5_path, monitor_name)
+        except Exception as e:
+            print(f"!!! Erro no pós-processamento do arquivo {os.path.basename(h5_path)}: {e}")
+            continue
+        shape_key = (len(spectrum_E_magnitude), spectrum_E_magnitude.dtype)
+        spectra_by_shape.setdefault(shape_key, []).append((i, spectrum_E_magnitude))
+
+    for group in spectra_by_shape.values():
+        indices = [i for i, _ in group]
+        delta_amps = delta_amp_from_spectra(np.vstack([spectrum for _, spectrum in group]))
+        for i, delta_amp in zip(indices, delta_amps):
+            results[i] = float(delta_amp)
+    return results
 
-        # Encontra picos e vales
-        # Usamos uma detecção de picos/vales simples: um ponto é pico se maior que vizinhos, vale se menor.
-        peaks = []
-        valleys = []
-
-        # Itera sobre o espectro para encontrar picos e vales
-        for i in range(1, len(spectrum_E_magnitude) - 1):
-            if spectrum_E_magnitude[i] > spectrum_E_magnitude[i-1] and spectrum_E_magnitude[i] > spectrum_E_magnitude[i+1]:
-                peaks.append((i, spectrum_E_magnitude[i]))
-            elif spectrum_E_magnitude[i] < spectrum_E_magnitude[i-1] and spectrum_E_magnitude[i] < spectrum_E_magnitude[i+1]:
-                valleys.append((i, spectrum_E_magnitude[i]))
-        
-        total_delta_amp = 0.0
-        # Itera sobre os picos e encontra o vale imediatamente seguinte
-        for peak_idx, peak_val in peaks:
-            # Procura o primeiro vale que sucede o pico atual
-            next_valley_val = None
-            for valley_idx, valley_val in valleys:
-                if valley_idx > peak_idx:
-                    next_valley_val = valley_val
-                    break
-            
-            if next_valley_val is not None:
-                total_delta_amp += abs(peak_val - next_valley_val) # Acumula a diferença absoluta
-
-        return total_delta_amp
 
 if __name__ == '__main__':
      # --- Exemplo de Uso (para teste local e modularidade) ---
@@ -48,4 +171,4 @@ if __name__ == '__main__':
      output_h5_path = "current_monitor_data.h5"
      output_h5_path = os.path.join(_spectra_directory, output_h5_path)
      delta_amp_value = calculate_delta_amp(output_h5_path, monitor_name='in')
-     print(f"Delta Amplitude Acumulada para o arquivo de teste ({output_h5_path}): {delta_amp_value:.4f}")
\ No newline at end of file
+     print(f"Delta Amplitude Acumulada para o arquivo de teste ({output_h5_path}): {delta_amp_value:.4f}")
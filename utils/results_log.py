@@ -0,0 +1,157 @@
+# results_log.py
+
+import io
+import os
+import csv
+
+import pandas as pd
+
+RESULT_COLUMNS = ('s', 'w', 'l', 'height', 'delta_amp', 'generation')
+
+
+class ResultsLogWriter:
+    """
+    Escrita incremental (somente acréscimo) do CSV full_optimization_data_<ts>.csv.
+
+    Cada chamada de append_rows grava apenas as linhas novas em uma única
+    escrita, seguida de flush e fsync. Se o processo morrer no meio de uma
+    escrita, a linha incompleta no final do arquivo é descartada na próxima
+    abertura, e o arquivo continua sendo um CSV válido com o mesmo formato de
+    antes (lido normalmente com pd.read_csv).
+
+    Args:
+        csv_path (str): Caminho do arquivo CSV.
+        columns (tuple): Colunas, na ordem em que são gravadas.
+    """
+
+    def __init__(self, csv_path, columns=RESULT_COLUMNS):
+        self.csv_path = csv_path
+        self.columns = list(columns)
+        self.rows_written = 0
+        self._file = open(csv_path, 'ab+')
+        self._truncate_partial_line()
+        if self._file.tell() == 0:
+            self._write(self._format_lines([self.columns]))
+
+    def _truncate_partial_line(self):
+        self._file.seek(0, os.SEEK_END)
+        size = self._file.tell()
+        if size == 0:
+            return
+        # Procura a última quebra de linha a partir do final, em blocos
+        position = size
+        while position > 0:
+            block_start = max(0, position - 65536)
+            self._file.seek(block_start)
+            block = self._file.read(position - block_start)
+            newline = block.rfind(b'\n')
+            if newline != -1:
+                last_complete = block_start + newline + 1
+                break
+            position = block_start
+        else:
+            last_complete = 0
+        if last_complete != size:
+            print(f"  [Resultados] Linha incompleta descartada no final de {os.path.basename(self.csv_path)}.")
+            self._file.truncate(last_complete)
+        self._file.seek(0, os.SEEK_END)
+
+    def _format_lines(self, rows):
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator='\n').writerows(rows)
+        return buffer.getvalue().encode('utf-8')
+
+    def _write(self, data):
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def append_rows(self, rows):
+        """
+        Acrescenta linhas ao CSV.
+
+        Args:
+            rows (list): Lista de dicionários (como os de all_individuals_data).
+        """
+        if not rows:
+            return
+        self._write(self._format_lines([[row[column] for column in self.columns] for row in rows]))
+        self.rows_written += len(rows)
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+class ResultsLogReader:
+    """
+    Leitura incremental de um CSV gravado por ResultsLogWriter.
+
+    O leitor guarda a posição (em bytes) até onde o arquivo já foi lido e, a
+    cada chamada de read_new, interpreta somente as linhas completas
+    acrescentadas desde então. Os dados acumulados ficam em 'data', sem que o
+    histórico inteiro seja lido de novo a cada geração.
+
+    Args:
+        csv_path (str): Caminho do arquivo CSV.
+    """
+
+    def __init__(self, csv_path):
+        self.csv_path = csv_path
+        self.columns = None
+        self.offset = 0
+        self._chunks = []
+        self._data = None
+
+    def read_new(self):
+        """
+        Lê as linhas completas acrescentadas desde a última chamada.
+
+        Returns:
+            Um DataFrame apenas com as linhas novas (vazio se não houver nenhuma).
+        """
+        if not os.path.exists(self.csv_path):
+            return pd.DataFrame(columns=self.columns or list(RESULT_COLUMNS))
+
+        with open(self.csv_path, 'rb') as f:
+            f.seek(self.offset)
+            chunk = f.read()
+        # Só linhas completas: uma escrita em andamento fica para a próxima leitura
+        complete = chunk.rfind(b'\n') + 1
+        chunk = chunk[:complete]
+
+        if self.columns is None:
+            header_end = chunk.find(b'\n') + 1
+            if header_end == 0:
+                return pd.DataFrame(columns=list(RESULT_COLUMNS))
+            self.columns = chunk[:header_end].decode('utf-8').strip().split(',')
+            self.offset += header_end
+            chunk = chunk[header_end:]
+            complete -= header_end
+
+        self.offset += complete
+        if not chunk:
+            return pd.DataFrame(columns=self.columns)
+
+        new_rows = pd.read_csv(io.BytesIO(chunk), header=None, names=self.columns)
+        self._chunks.append(new_rows)
+        self._data = None
+        return new_rows
+
+    @property
+    def data(self):
+        """Todas as linhas lidas até agora, em um único DataFrame."""
+        if self._data is None:
+            if self._chunks:
+                self._data = pd.concat(self._chunks, ignore_index=True)
+                self._chunks = [self._data]
+            else:
+                self._data = pd.DataFrame(columns=self.columns or list(RESULT_COLUMNS))
+        return self._data
@@ -0,0 +1,253 @@
+# session_pool.py
+
+import os
+import sys
+import time
+import multiprocessing
+from multiprocessing.util import Finalize
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.simulation_backend import create_backend
+from utils.lumerical_workflow import (
+    prepare_lumerical_job, extract_monitor_spectrum, read_monitor_spectrum, exports_job_results,
+    LumericalJobTemplate
+)
+from utils.post_processing import delta_amp_from_spectra
+
+# Estado de cada processo do pool: a sessão própria e, no modo template, o template dela
+_worker_session = None
+_worker_template = None
+
+
+def _close_worker(session, template):
+    if template is not None and os.path.exists(template.template_fsp_path):
+        os.remove(template.template_fsp_path)
+    session.close()
+
+
+def _init_worker(backend_name, backend_options, template_scripts, quiet):
+    global _worker_session, _worker_template
+    if quiet:
+        sys.stdout = open(os.devnull, 'w')
+    _worker_session = create_backend(backend_name, **backend_options)
+    if template_scripts is not None:
+        fsp_base_path, geometry_lsf_path, simulation_lsf_path, update_lsf_path = template_scripts
+        # Cada processo tem o seu próprio template, salvo ao lado do arquivo base
+        template_fsp_path = f"{os.path.splitext(fsp_base_path)[0]}_template_{os.getpid()}.fsp"
+        _worker_template = LumericalJobTemplate(
+            fsp_base_path, geometry_lsf_path, simulation_lsf_path, update_lsf_path, template_fsp_path
+        )
+    # Fecha a sessão quando o processo do pool for encerrado
+    Finalize(None, _close_worker, args=(_worker_session, _worker_template), exitpriority=10)
+
+
+def _prepare_task(chromosome, fsp_base_path, geometry_lsf_path, simulation_lsf_path, temp_directory,
+                  fidelity=None):
+    if _worker_template is not None:
+        return _worker_template.prepare_job(_worker_session, chromosome, temp_directory, fidelity)
+    return prepare_lumerical_job(
+        _worker_session, chromosome, fsp_base_path, geometry_lsf_path, simulation_lsf_path, temp_directory,
+        fidelity
+    )
+
+
+def _extract_task(fsp_path, simulation_spectra_directory, return_spectrum=False):
+    # Com o resultado exportado pelo job, o FSP simulado não é carregado e o template continua aberto
+    if _worker_template is not None and not exports_job_results(_worker_session):
+        _worker_template.deactivate(_worker_session)
+    try:
+        if return_spectrum:
+            # O espectro volta ao processo principal (para o arquivo consolidado), sem gerar .h5
+            frequencies_hz, E = read_monitor_spectrum(_worker_session, fsp_path)
+            return None, delta_amp_from_spectra(E), (frequencies_hz, E)
+        h5_path, E = extract_monitor_spectrum(_worker_session, fsp_path, simulation_spectra_directory)
+        return h5_path, delta_amp_from_spectra(E), None
+    except Exception as e:
+        print(f"!!! Erro no pós-processamento do arquivo {os.path.basename(fsp_path)}: {e}")
+        return None, -float('inf'), None
+
+
+def _evaluate_task(chromosome, fsp_base_path, geometry_lsf_path, simulation_lsf_path,
+                   simulation_spectra_directory, temp_directory, return_spectrum=False):
+    # Avaliação completa de um cromossomo na sessão do processo: prepara, simula e extrai
+    try:
+        fsp_path = _prepare_task(chromosome, fsp_base_path, geometry_lsf_path, simulation_lsf_path, temp_directory)
+        _worker_session.addjob(fsp_path)
+        _worker_session.runjobs()
+    except Exception as e:
+        # Como na extração, a falha vira um resultado -inf em vez de derrubar quem espera pelo Future
+        print(f"!!! Erro na preparação ou simulação do cromossomo {chromosome}: {e}")
+        return None, -float('inf'), None
+    return _extract_task(fsp_path, simulation_spectra_directory, return_spectrum)
+
+
+class SessionPool:
+    """
+    Pool de processos, cada um com a sua própria sessão de simulação.
+
+    A preparação dos FSPs e a extração dos resultados são distribuídas entre
+    os processos, em vez de passarem todas pela sessão única do main.py. A
+    fila de jobs (addjob/runjobs) continua na sessão principal.
+
+    Args:
+        n_workers (int): Número de processos (e de sessões) do pool.
+        backend_name (str): Nome do backend usado por cada processo (ver create_backend).
+        backend_options (dict): Opções do backend de cada processo.
+        template_scripts (tuple): Opcional. (fsp_base_path, geometry_lsf_path,
+            simulation_lsf_path, update_lsf_path) para preparar os jobs no modo template.
+        quiet (bool): Se True, descarta as mensagens impressas pelos processos.
+    """
+
+    def __init__(self, n_workers, backend_name, backend_options=None, template_scripts=None, quiet=False):
+        self.n_workers = n_workers
+        # 'spawn' é o único método disponível no Windows, onde o Lumerical é executado
+        self._executor = ProcessPoolExecutor(
+            max_workers=n_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(backend_name, backend_options or {}, template_scripts, quiet)
+        )
+
+    def prepare_jobs(self, population, fsp_base_path, geometry_lsf_path, simulation_lsf_path, temp_directory,
+                     fidelity=None):
+        """
+        Prepara os FSPs de uma população em paralelo.
+
+        Args:
+            fidelity (dict): Opcional. Parâmetros de fidelidade dos jobs (ver utils/fidelity.py).
+
+        Returns:
+            A lista de caminhos dos FSPs, na ordem da população.
+        """
+        n = len(population)
+        return list(self._executor.map(
+            _prepare_task, population, [fsp_base_path] * n, [geometry_lsf_path] * n,
+            [simulation_lsf_path] * n, [temp_directory] * n, [fidelity] * n
+        ))
+
+    def submit_extraction(self, fsp_path, simulation_spectra_directory, return_spectrum=False):
+        """
+        Envia a extração de um FSP simulado para o pool.
+
+        Args:
+            return_spectrum (bool): Se True, o espectro é devolvido em vez de salvo em um .h5.
+
+        Returns:
+            Um Future cujo resultado é (h5_path ou None, delta_amp, (frequências, |E|) ou None).
+        """
+        return self._executor.submit(_extract_task, fsp_path, simulation_spectra_directory, return_spectrum)
+
+    def submit_evaluation(self, chromosome, fsp_base_path, geometry_lsf_path, simulation_lsf_path,
+                          simulation_spectra_directory, temp_directory, return_spectrum=False):
+        """
+        Envia a avaliação completa de um cromossomo (preparação, simulação e
+        extração) para um processo livre do pool.
+
+        Returns:
+            Um Future cujo resultado é (h5_path ou None, delta_amp, (frequências, |E|) ou None).
+            Uma falha em qualquer etapa produz (None, -inf, None).
+        """
+        return self._executor.submit(
+            _evaluate_task, chromosome, fsp_base_path, geometry_lsf_path, simulation_lsf_path,
+            simulation_spectra_directory, temp_directory, return_spectrum
+        )
+
+    def extract_results(self, fsp_paths, simulation_spectra_directory):
+        """
+        Extrai e pontua vários FSPs simulados em paralelo.
+
+        Returns:
+            Uma lista de (h5_path ou None, delta_amp, None), na ordem dos caminhos.
+        """
+        return list(self._executor.map(
+            _extract_task, fsp_paths, [simulation_spectra_directory] * len(fsp_paths)
+        ))
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+def measure_pool_speedup(worker_counts=(1, 2, 4, 8), n_jobs=30, work_directory='pool_benchmark',
+                         backend_options=None, geometry_lsf_path=None, simulation_lsf_path=None):
+    """
+    Mede o tempo de preparação + extração de 'n_jobs' indivíduos com o backend
+    sintético, sem pool (sessão única) e com pools de tamanhos crescentes.
+
+    Returns:
+        Um dicionário {número de processos: (tempo em segundos, speedup)}; a
+        chave 0 corresponde à sessão única, usada como referência.
+    """
+    import random
+    import shutil
+    import contextlib
+    import io
+
+    resources_directory = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "resources")
+    geometry_lsf_path = geometry_lsf_path or os.path.join(resources_directory, "create_guide_fdtd.lsf")
+    simulation_lsf_path = simulation_lsf_path or os.path.join(resources_directory, "run_simu_guide_fdtd.lsf")
+    if backend_options is None:
+        # Latências por comando de uma sessão sintética "lenta", na ordem de grandeza das reais
+        backend_options = {'eval_latency': 0.01, 'load_latency': 0.1, 'save_latency': 0.05}
+
+    work_directory = os.path.abspath(work_directory)
+    temp_directory = os.path.join(work_directory, "temp")
+    spectra_directory = os.path.join(work_directory, "spectra")
+    os.makedirs(temp_directory, exist_ok=True)
+    os.makedirs(spectra_directory, exist_ok=True)
+    fsp_base_path = os.path.join(work_directory, "base.fsp")
+
+    rng = random.Random(0)
+    population = [
+        {'s': rng.uniform(0.1e-6, 0.25e-6), 'w': rng.uniform(0.3e-6, 0.7e-6),
+         'l': rng.uniform(0.1e-6, 0.25e-6), 'height': rng.uniform(0.15e-6, 0.3e-6)}
+        for _ in range(n_jobs)
+    ]
+
+    results = {}
+    with create_backend('synthetic', **backend_options) as main_session:
+        main_session.save(fsp_base_path)
+        for n_workers in (0,) + tuple(worker_counts):
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                if n_workers == 0:
+                    fsp_paths = [
+                        prepare_lumerical_job(main_session, c, fsp_base_path, geometry_lsf_path,
+                                              simulation_lsf_path, temp_directory)
+                        for c in population
+                    ]
+                    for fsp_path in fsp_paths:
+                        main_session.addjob(fsp_path)
+                    main_session.runjobs()
+                    for fsp_path in fsp_paths:
+                        extract_monitor_spectrum(main_session, fsp_path, spectra_directory)
+                else:
+                    with SessionPool(n_workers, 'synthetic', backend_options, quiet=True) as pool:
+                        # A partida dos processos não entra na medição
+                        list(pool._executor.map(time.sleep, [0.2] * n_workers))
+                        start = time.perf_counter()
+                        fsp_paths = pool.prepare_jobs(population, fsp_base_path, geometry_lsf_path,
+                                                      simulation_lsf_path, temp_directory)
+                        for fsp_path in fsp_paths:
+                            main_session.addjob(fsp_path)
+                        main_session.runjobs()
+                        pool.extract_results(fsp_paths, spectra_directory)
+            elapsed = time.perf_counter() - start
+            reference = results[0][0] if results else elapsed
+            results[n_workers] = (elapsed, reference / elapsed)
+            label = "sessão única" if n_workers == 0 else f"{n_workers} processo(s)"
+            print(f"  [Pool] {label:>14}: {elapsed:7.2f} s  (speedup {reference / elapsed:4.1f}x)")
+
+    shutil.rmtree(work_directory, ignore_errors=True)
+    return results
+
+
+if __name__ == '__main__':
+    print("Medindo o ganho do pool de sessões com o backend sintético...")
+    measure_pool_speedup()
@@ -0,0 +1,639 @@
+# simulation_backend.py
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+
+from utils.fidelity import HIGH_FIDELITY, points_per_wavelength, relative_cost
+from utils.post_processing import job_result_path, write_job_result
+from utils.job_manager import new_job_counters
+
+_DEFAULT_LUMAPI_PATH = "C:\\Program Files\\Lumerical\\v241\\api\\python"
+
+# Constantes físicas usadas pelo modelo sintético
+_SPEED_OF_LIGHT = 299792458.0
+_N_SILICON = 3.48
+_N_WATER = 1.32
+
+
+class SimulationBackend:
+    """
+    Interface mínima de uma sessão de simulação usada pelo workflow.
+
+    Corresponde ao subconjunto da API do lumapi.FDTD chamado por
+    utils/lumerical_workflow.py. Qualquer objeto que implemente estes
+    métodos pode ser passado como 'fdtd' para simulate_generation_lumerical.
+
+    Backends com 'exports_job_results' verdadeiro gravam, ao fim de cada job,
+    o resultado reduzido (|E|(f) do monitor 'in', ver write_job_result) em
+    job_result_path(fsp_path); o workflow lê esse arquivo em vez de carregar
+    o FSP simulado.
+
+    Backends que aplicam tempo limite ou cópias especulativas (ver
+    iter_completed_jobs) contam os eventos em 'job_counters' (ver
+    utils/job_manager.py) e guardam em 'timed_out_jobs' os FSPs da última
+    fila cujo tempo limite esgotou.
+    """
+
+    exports_job_results = False
+
+    def load(self, fsp_path):
+        raise NotImplementedError
+
+    def switchtolayout(self):
+        raise NotImplementedError
+
+    def eval(self, script):
+        raise NotImplementedError
+
+    def setnamed(self, name, prop, value):
+        raise NotImplementedError
+
+    def getnamed(self, name, prop):
+        raise NotImplementedError
+
+    def setglobalmonitor(self, prop, value):
+        raise NotImplementedError
+
+    def save(self, fsp_path):
+        raise NotImplementedError
+
+    def addjob(self, fsp_path):
+        raise NotImplementedError
+
+    def runjobs(self):
+        raise NotImplementedError
+
+    def getdata(self, monitor_name, dataset_name):
+        raise NotImplementedError
+
+    def iter_completed_jobs(self, timeout_s=None, straggler_factor=None):
+        """
+        Executa a fila de jobs e produz o caminho de cada FSP assim que ele termina.
+
+        A implementação padrão é a barreira do runjobs: todos os jobs são
+        produzidos juntos ao final, sem tempo limite nem cópias especulativas.
+        Backends que conseguem observar a conclusão individual dos jobs
+        sobrescrevem este método.
+
+        Args:
+            timeout_s (float): Opcional. Um job em execução há mais de 'timeout_s'
+                segundos é abandonado e produzido sem resultado.
+            straggler_factor (float): Opcional. Depois que metade da fila terminou, um job
+                em execução há mais de 'straggler_factor' vezes a mediana das durações
+                ganha uma cópia; vale o resultado da que terminar primeiro.
+        """
+        jobs = list(self._queued_jobs)
+        self._queued_jobs = []
+        self.runjobs()
+        yield from jobs
+
+    def extraction_session(self):
+        """
+        Sessão usada para ler os resultados enquanto a fila ainda executa.
+
+        Por padrão é a própria sessão; o backend Lumerical pode abrir uma
+        segunda sessão, pois a principal fica bloqueada no runjobs.
+        """
+        return self
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+class LumericalBackend(SimulationBackend):
+    """
+    Backend real: delega todas as chamadas para uma sessão lumapi.FDTD.
+
+    O módulo lumapi só é importado quando a sessão é aberta, de modo que o
+    restante do código pode ser importado em máquinas sem o Lumerical.
+
+    O solver executado pelo runjobs não roda scripts de análise: os dados do
+    monitor só ficam acessíveis carregando o FSP simulado em uma sessão. Por
+    isso este backend não exporta resultados por job, e a extração continua
+    carregando cada FSP, na sessão de extração (ou nas sessões do pool), fora
+    da sessão que executa a fila.
+
+    Com 'separate_extraction_session', uma segunda sessão lumapi.FDTD (que
+    ocupa mais uma licença da interface gráfica) é aberta para extrair cada
+    job assim que ele termina, enquanto a fila ainda executa. Sem ela (o
+    padrão), a sessão principal só extrai os resultados depois do runjobs.
+
+    O runjobs não permite cancelar um job isolado: com 'timeout_s', um job
+    cujo log existe há mais tempo que o limite é marcado como esgotado e,
+    quando só restam jobs esgotados (ou que ainda não começaram) na fila, a
+    sessão é fechada e reaberta, abandonando todos eles. Cópias especulativas
+    não são lançadas: os jobs da fila já disputam os mesmos recursos do solver.
+    """
+
+    # Linhas com que o solver encerra o log do job: o fim normal da simulação
+    # ou a mensagem de erro que a interrompe
+    completion_pattern = re.compile(r'^(?:Simulation completed successfully|Error: )', re.MULTILINE)
+
+    def __init__(self, lumapi_path=_DEFAULT_LUMAPI_PATH, hide=False, poll_interval=1.0,
+                 separate_extraction_session=False):
+        if lumapi_path and lumapi_path not in sys.path:
+            sys.path.append(lumapi_path)
+        import lumapi
+        self._lumapi = lumapi
+        self._hide = hide
+        self._session = lumapi.FDTD(hide=hide)
+        self._extraction_session = None
+        self.separate_extraction_session = separate_extraction_session
+        self._queued_jobs = []
+        self.poll_interval = poll_interval
+        self.job_counters = new_job_counters()
+        self.timed_out_jobs = set()
+        # Cada reinício é uma nova sessão: o template precisa ser carregado de novo
+        self.session_restarts = 0
+
+    def __getattr__(self, name):
+        # Qualquer comando da API (load, eval, setnamed, addjob, ...) vai direto para a sessão
+        return getattr(self._session, name)
+
+    def load(self, fsp_path):
+        return self._session.load(fsp_path)
+
+    def switchtolayout(self):
+        return self._session.switchtolayout()
+
+    def eval(self, script):
+        return self._session.eval(script)
+
+    def setnamed(self, name, prop, value):
+        return self._session.setnamed(name, prop, value)
+
+    def getnamed(self, name, prop):
+        return self._session.getnamed(name, prop)
+
+    def setglobalmonitor(self, prop, value):
+        return self._session.setglobalmonitor(prop, value)
+
+    def save(self, fsp_path):
+        return self._session.save(fsp_path)
+
+    def addjob(self, fsp_path):
+        self._queued_jobs.append(fsp_path)
+        return self._session.addjob(fsp_path)
+
+    def runjobs(self):
+        self._queued_jobs = []
+        return self._session.runjobs()
+
+    def getdata(self, monitor_name, dataset_name):
+        return self._session.getdata(monitor_name, dataset_name)
+
+    def iter_completed_jobs(self, timeout_s=None, straggler_factor=None):
+        """
+        Executa o runjobs em segundo plano e produz cada FSP assim que o seu
+        log indica o fim da simulação e o arquivo para de ser modificado. Sem
+        'separate_extraction_session', os FSPs só são produzidos quando o
+        runjobs retorna: a sessão principal não pode extraí-los antes.
+
+        O tempo de um job conta a partir do aparecimento do seu log;
+        'straggler_factor' é ignorado (ver a documentação da classe).
+        """
+        jobs, self._queued_jobs = self._queued_jobs, []
+        self.timed_out_jobs = set()
+        runner_errors = []
+
+        def run_queue():
+            try:
+                self._session.runjobs()
+            except Exception as e:
+                runner_errors.append(e)
+
+        runner = threading.Thread(target=run_queue, daemon=True)
+        runner.start()
+
+        pending = list(jobs)
+        last_stat = {}
+        started_at = {}
+        while pending:
+            queue_finished = not runner.is_alive()
+            now = time.monotonic()
+            for fsp_path in list(pending):
+                # Quando o runjobs retorna, todos os jobs restantes já terminaram
+                if queue_finished or (self.separate_extraction_session and self._job_finished(fsp_path, last_stat)):
+                    pending.remove(fsp_path)
+                    yield fsp_path
+                elif fsp_path not in started_at and os.path.exists(self._job_log_path(fsp_path)):
+                    started_at[fsp_path] = now
+                elif timeout_s is not None and fsp_path in started_at and now - started_at[fsp_path] > timeout_s:
+                    self.timed_out_jobs.add(fsp_path)
+            running = [fsp_path for fsp_path in pending if fsp_path in started_at]
+            if self.timed_out_jobs and all(fsp_path in self.timed_out_jobs for fsp_path in running):
+                # Só restam jobs travados (e os que esperam a vaga deles): a sessão é reiniciada
+                self.job_counters['timeouts'] += len(self.timed_out_jobs)
+                print(f"  [Job Manager] Tempo limite de {timeout_s:g} s esgotado em "
+                      f"{len(self.timed_out_jobs)} jobs; reiniciando a sessão e abandonando "
+                      f"{len(pending)} jobs da fila.")
+                self._restart_session()
+                for fsp_path in pending:
+                    yield fsp_path
+                # O runjobs interrompido termina com erro: ele não se refere mais a esta sessão
+                return
+            if pending:
+                time.sleep(self.poll_interval)
+
+        runner.join()
+        if runner_errors:
+            raise runner_errors[0]
+
+    def _restart_session(self):
+        try:
+            self._session.close()
+        except Exception as e:
+            print(f"!!! Erro ao fechar a sessão: {e}")
+        self._session = self._lumapi.FDTD(hide=self._hide)
+        self.session_restarts += 1
+
+    def _job_log_path(self, fsp_path):
+        return os.path.splitext(fsp_path)[0] + "_p0.log"
+
+    def _job_finished(self, fsp_path, last_stat):
+        log_path = self._job_log_path(fsp_path)
+        try:
+            with open(log_path, 'r', errors='ignore') as f:
+                log = f.read()
+            stat = os.stat(fsp_path)
+        except OSError:
+            return False
+        # Só o início de cada linha do fim do log é comparado; a primeira linha do trecho pode estar cortada
+        log_tail = log[-4096:]
+        if len(log) > len(log_tail):
+            log_tail = log_tail[log_tail.find('\n') + 1:]
+        if not self.completion_pattern.search(log_tail):
+            return False
+        # Só considera o job concluído depois que o solver terminou de gravar o FSP
+        current = (stat.st_size, stat.st_mtime)
+        stable = last_stat.get(fsp_path) == current
+        last_stat[fsp_path] = current
+        return stable
+
+    def extraction_session(self):
+        if not self.separate_extraction_session:
+            return self
+        if self._extraction_session is None:
+            self._extraction_session = self._lumapi.FDTD(hide=True)
+        return self._extraction_session
+
+    def close(self):
+        if self._extraction_session is not None:
+            self._extraction_session.close()
+        self._session.close()
+
+
+class SyntheticBackend(SimulationBackend):
+    """
+    Backend sintético que imita uma sessão lumapi.FDTD sem precisar de licença.
+
+    Os "projetos" .fsp são pequenos arquivos JSON com os parâmetros do guia.
+    Ao executar a fila de jobs, cada job espera uma latência aleatória (em
+    paralelo, até 'max_concurrent_jobs'), pode falhar com probabilidade
+    'failure_rate' e travar (nunca terminar) com probabilidade 'hang_rate'.
+    Jobs travados ou lentos podem ser abandonados ou copiados conforme o
+    tempo limite e o fator de stragglers de iter_completed_jobs. Os espectros Ex/Ey/Ez e f do monitor 'in' são gerados a
+    partir de (s, w, l, height) por um modelo de grade de Bragg com
+    ressonâncias Fabry-Perot, reproduzindo a ordem de grandeza dos delta_amp
+    obtidos com o FDTD real.
+
+    A fidelidade definida no projeto (tempo de simulação e precisão de malha
+    da região "FDTD" e pontos de frequência do monitor global) altera a duração
+    de cada job, proporcional a relative_cost, e a qualidade do espectro.
+
+    Args:
+        job_latency (tuple): Intervalo (min, max) em segundos da duração de cada job.
+        failure_rate (float): Probabilidade de um job terminar sem dados.
+        hang_rate (float): Probabilidade de um job travar até ser abandonado.
+        max_concurrent_jobs (int): Número de jobs executados simultaneamente.
+        points (int): Número de pontos de frequência do monitor.
+        noise_level (float): Desvio padrão relativo do ruído adicionado ao espectro.
+        eval_latency (float): Tempo em segundos de cada eval(), acrescido do mesmo valor
+            para cada comando 'add...' do script.
+        load_latency (float): Tempo em segundos gasto em cada chamada de load().
+        save_latency (float): Tempo em segundos gasto em cada chamada de save().
+        seed (int): Semente para latências e falhas (o espectro é sempre determinístico).
+        export_job_results (bool): Se True, cada job solucionado grava o seu resultado
+            reduzido ao terminar, como um job com exportação no próprio solver faria.
+    """
+
+    group_name = "Guia Metamaterial"
+    default_properties = {
+        'total_length': 40e-6,
+        'height': 0.5e-6,
+        'w': 7.34e-07,
+        'l': 1.85e-7,
+        's': 1.85e-07,
+    }
+
+    def __init__(self, job_latency=(0.0, 0.0), failure_rate=0.0, max_concurrent_jobs=4,
+                 points=500, noise_level=0.01, eval_latency=0.0, load_latency=0.0,
+                 save_latency=0.0, seed=None, export_job_results=True, hang_rate=0.0):
+        self.job_latency = job_latency
+        self.failure_rate = failure_rate
+        self.hang_rate = hang_rate
+        self.max_concurrent_jobs = max_concurrent_jobs
+        self.points = points
+        self.noise_level = noise_level
+        self.eval_latency = eval_latency
+        self.load_latency = load_latency
+        self.save_latency = save_latency
+        self.exports_job_results = export_job_results
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._queued_jobs = []
+        self._project = self._new_project()
+        # Custo acumulado dos jobs executados, em simulações de alta fidelidade equivalentes
+        self.solver_cost = 0.0
+        # Tempo total de solver (soma das durações dos jobs), para medir a utilização das vagas
+        self.solver_time = 0.0
+        self.job_counters = new_job_counters()
+        self.timed_out_jobs = set()
+
+    def _new_project(self):
+        return {'properties': {self.group_name: dict(self.default_properties)},
+                'status': 'layout'}
+
+    # --- Edição do projeto ---
+
+    def load(self, fsp_path):
+        if self.load_latency:
+            time.sleep(self.load_latency)
+        try:
+            with open(fsp_path, 'r') as f:
+                self._project = json.load(f)
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            # Um .fsp real do Lumerical é tratado como um projeto base vazio
+            self._project = self._new_project()
+
+    def switchtolayout(self):
+        self._project['status'] = 'layout'
+
+    def eval(self, script):
+        if self.eval_latency:
+            # Recriar objetos (addrect, addfdtd, addport, ...) é o que torna um script caro
+            time.sleep(self.eval_latency * (1 + script.count('add')))
+        # 'deleteall' no script de geometria recria o grupo com as propriedades padrão
+        if 'deleteall' in script:
+            self._project = self._new_project()
+
+    def setnamed(self, name, prop, value):
+        self._project['properties'].setdefault(name, {})[prop] = value
+
+    def getnamed(self, name, prop):
+        try:
+            return self._project['properties'][name][prop]
+        except KeyError:
+            raise RuntimeError(f"O objeto '{name}' não possui a propriedade '{prop}'.")
+
+    def setglobalmonitor(self, prop, value):
+        self._project.setdefault('global_monitor', {})[prop] = value
+
+    def save(self, fsp_path):
+        if self.save_latency:
+            time.sleep(self.save_latency)
+        self._write_project(fsp_path, self._project)
+
+    def _write_project(self, fsp_path, project):
+        # Escrita atômica: um job (ou outra sessão) nunca lê um projeto gravado pela metade
+        temp_path = f"{fsp_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(project, f)
+        os.replace(temp_path, fsp_path)
+
+    # --- Fila de jobs ---
+
+    def addjob(self, fsp_path):
+        self._queued_jobs.append(fsp_path)
+
+    def runjobs(self):
+        for _ in self.iter_completed_jobs():
+            pass
+
+    def iter_completed_jobs(self, timeout_s=None, straggler_factor=None):
+        jobs, self._queued_jobs = self._queued_jobs, []
+        self.timed_out_jobs = set()
+        if not jobs:
+            return
+        # Um único evento por job: quem o marca primeiro (o job original, a cópia ou o tempo limite) vence
+        claims = {fsp_path: threading.Event() for fsp_path in jobs}
+        started_at = {}
+        durations = []
+        pending = set(jobs)
+        speculated = set()
+        # Sem tempo limite nem cópias, basta esperar a próxima conclusão
+        poll_interval = 0.05 if timeout_s is not None or straggler_factor is not None else None
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrent_jobs)
+        try:
+            futures = {executor.submit(self._run_job, fsp_path, claims[fsp_path], started_at): (fsp_path, False)
+                       for fsp_path in jobs}
+            while pending:
+                done, _ = wait(futures, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    fsp_path, speculative = futures.pop(future)
+                    duration = future.result()
+                    # Sem duração: o job perdeu para a sua cópia ou foi abandonado
+                    if duration is None or fsp_path not in pending:
+                        continue
+                    pending.discard(fsp_path)
+                    durations.append(duration)
+                    if speculative:
+                        self.job_counters['speculative_wins'] += 1
+                    yield fsp_path
+
+                now = time.perf_counter()
+                if timeout_s is not None:
+                    for fsp_path in [p for p in pending if p in started_at and now - started_at[p] > timeout_s]:
+                        with self._lock:
+                            if claims[fsp_path].is_set():
+                                continue
+                            claims[fsp_path].set()
+                        pending.discard(fsp_path)
+                        self.timed_out_jobs.add(fsp_path)
+                        self.job_counters['timeouts'] += 1
+                        print(f"  [Job Manager] Tempo limite de {timeout_s:g} s esgotado: "
+                              f"{os.path.basename(fsp_path)}")
+                        yield fsp_path
+
+                if straggler_factor is not None and durations and len(durations) >= len(jobs) / 2:
+                    limit = straggler_factor * float(np.median(durations))
+                    for fsp_path in [p for p in pending if p not in speculated and p in started_at
+                                     and now - started_at[p] > limit]:
+                        speculated.add(fsp_path)
+                        self.job_counters['speculative_launches'] += 1
+                        future = executor.submit(self._run_job, fsp_path, claims[fsp_path])
+                        futures[future] = (fsp_path, True)
+        finally:
+            # Libera os jobs travados e as cópias que perderam a disputa
+            for claim in claims.values():
+                claim.set()
+            executor.shutdown(wait=True)
+
+    def _draw_job_outcome(self):
+        with self._lock:
+            latency = self._rng.uniform(*self.job_latency)
+            failed = self._rng.random() < self.failure_rate
+            hung = self._rng.random() < self.hang_rate
+        return (None if hung else latency), failed
+
+    def _project_fidelity(self, project):
+        fdtd_properties = project['properties'].get('FDTD', {})
+        return {
+            'sim_time': fdtd_properties.get('simulation time', HIGH_FIDELITY['sim_time']),
+            'mesh_accuracy': fdtd_properties.get('mesh accuracy', HIGH_FIDELITY['mesh_accuracy']),
+            'points': project.get('global_monitor', {}).get('frequency points', self.points),
+        }
+
+    def _run_job(self, fsp_path, claim, started_at=None):
+        # Retorna a duração do job, ou None se ele foi abandonado ou perdeu para a sua cópia
+        start = time.perf_counter()
+        if started_at is not None:
+            started_at[fsp_path] = start
+        latency, failed = self._draw_job_outcome()
+        with open(fsp_path, 'r') as f:
+            project = json.load(f)
+        cost = relative_cost(self._project_fidelity(project))
+        if latency is not None:
+            latency *= cost
+        # Um job travado (latência None) só termina quando é abandonado
+        if claim.wait(latency):
+            return None
+        with self._lock:
+            if claim.is_set():
+                return None
+            claim.set()
+            self.solver_cost += cost
+            self.solver_time += latency
+        project['status'] = 'failed' if failed else 'solved'
+        project['job_duration'] = latency
+        # O resultado reduzido é gravado antes do projeto: quando o job aparece como concluído, ele já existe
+        if self.exports_job_results and not failed:
+            frequencies_hz, E = self._monitor_spectrum(project)
+            params = project['properties'][self.group_name]
+            write_job_result(job_result_path(fsp_path), frequencies_hz, E,
+                             {name: params[name] for name in ('s', 'w', 'l', 'height')})
+        self._write_project(fsp_path, project)
+        return time.perf_counter() - start
+
+    # --- Resultados ---
+
+    def _monitor_fields(self, project):
+        params = project['properties'][self.group_name]
+        fidelity = self._project_fidelity(project)
+        return synthetic_monitor_fields(
+            params['s'], params['w'], params['l'], params['height'],
+            points=fidelity['points'], noise_level=self.noise_level,
+            sim_time=fidelity['sim_time'], mesh_accuracy=fidelity['mesh_accuracy']
+        )
+
+    def _monitor_spectrum(self, project):
+        # Mesma redução de read_monitor_spectrum: |E| a partir de Ex, Ey e Ez
+        f, Ex, Ey, Ez = self._monitor_fields(project)
+        E = np.sqrt(np.abs(Ex[0, 0, 0, :]) ** 2 + np.abs(Ey[0, 0, 0, :]) ** 2 + np.abs(Ez[0, 0, 0, :]) ** 2)
+        return f, E
+
+    def getdata(self, monitor_name, dataset_name):
+        if self._project.get('status') != 'solved' or monitor_name != 'in':
+            raise RuntimeError(f"O monitor '{monitor_name}' não possui dados para '{dataset_name}'.")
+        f, Ex, Ey, Ez = self._monitor_fields(self._project)
+        data = {'f': f.reshape(-1, 1), 'Ex': Ex, 'Ey': Ey, 'Ez': Ez}
+        if dataset_name not in data:
+            raise RuntimeError(f"Dataset '{dataset_name}' inexistente no monitor '{monitor_name}'.")
+        return data[dataset_name]
+
+
+def synthetic_monitor_fields(s, w, l, height, points=500, noise_level=0.01,
+                             total_length=40e-6, amplitude=3.0,
+                             wavelength_start=1.45e-6, wavelength_stop=1.62e-6,
+                             sim_time=HIGH_FIDELITY['sim_time'], mesh_accuracy=HIGH_FIDELITY['mesh_accuracy']):
+    """
+    Gera o espectro do monitor de entrada para um guia SWG (modelo aproximado).
+
+    O índice efetivo vem de um meio efetivo ponderado pelo duty cycle l/(s+l)
+    e por fatores de confinamento em w e height. A refletividade combina um
+    fundo de descasamento de modo com a banda de Bragg em 2*n_eff*(s+l); a
+    interferência com a onda incidente produz as franjas Fabry-Perot medidas.
+
+    Fora da fidelidade de referência (HIGH_FIDELITY), a malha mais grossa
+    desloca o índice efetivo (dispersão numérica) e aumenta o ruído, e um
+    tempo de simulação menor que o de ida e volta no guia trunca as reflexões,
+    reduzindo o contraste das franjas.
+
+    Returns:
+        Uma tupla (f, Ex, Ey, Ez), com f de forma (points,) e os campos
+        complexos de forma (1, 1, 1, points), como retornado pelo getdata.
+    """
+    wavelengths = np.linspace(wavelength_start, wavelength_stop, points)
+    f = _SPEED_OF_LIGHT / wavelengths
+
+    period = s + l
+    duty_cycle = l / period
+    n_swg = np.sqrt(duty_cycle * _N_SILICON ** 2 + (1 - duty_cycle) * _N_WATER ** 2)
+    confinement = (1 - np.exp(-w / 0.4e-6)) * (1 - np.exp(-height / 0.2e-6))
+    n_eff = _N_WATER + (n_swg - _N_WATER) * confinement
+
+    # Erro de dispersão numérica: cresce com o inverso do quadrado dos pontos por comprimento de onda
+    mesh_error = (points_per_wavelength(HIGH_FIDELITY['mesh_accuracy']) / points_per_wavelength(mesh_accuracy)) ** 2
+    n_eff = n_eff * (1 + 0.004 * (mesh_error - 1))
+
+    bragg_wavelength = 2 * n_eff * period
+    index_contrast = (n_swg - _N_WATER) / n_swg
+    bragg_bandwidth = bragg_wavelength * index_contrast * duty_cycle * (1 - duty_cycle) + 5e-9
+
+    background_reflection = 0.15 * index_contrast * confinement
+    bragg_reflection = 0.6 * np.exp(-((wavelengths - bragg_wavelength) / bragg_bandwidth) ** 2)
+    reflection = np.clip(background_reflection + bragg_reflection, 0.0, 0.95)
+
+    # Fração das reflexões que volta ao monitor antes do fim da simulação
+    round_trip_time = 2 * n_eff * total_length / _SPEED_OF_LIGHT
+    captured = 1 - np.exp(-(sim_time / round_trip_time) ** 2)
+    reference_captured = 1 - np.exp(-(HIGH_FIDELITY['sim_time'] / round_trip_time) ** 2)
+    reflection = reflection * captured / reference_captured
+
+    phase = 4 * np.pi * n_eff * total_length / wavelengths
+    field = amplitude * (1 + reflection * np.exp(1j * phase))
+
+    # Ruído determinístico por cromossomo: o mesmo guia gera sempre o mesmo espectro
+    seed_key = f"{s:.6e}_{w:.6e}_{l:.6e}_{height:.6e}".encode()
+    rng = np.random.default_rng(int.from_bytes(hashlib.sha1(seed_key).digest()[:8], 'little'))
+    field = field * (1 + noise_level * mesh_error * rng.standard_normal(points))
+
+    # O modo é quase TE: a maior parte da energia em Ey, o resto dividido em Ex e Ez
+    Ey = (0.95 * field).reshape(1, 1, 1, points)
+    Ex = (0.25 * field * np.exp(1j * 0.3)).reshape(1, 1, 1, points)
+    Ez = (np.sqrt(1 - 0.95 ** 2 - 0.25 ** 2) * field).reshape(1, 1, 1, points)
+    return f, Ex, Ey, Ez
+
+
+def create_backend(name='lumerical', **options):
+    """
+    Cria a sessão de simulação pelo nome.
+
+    Args:
+        name (str): 'lumerical' para o FDTD real ou 'synthetic' para o backend sintético.
+        **options: Argumentos repassados ao construtor do backend.
+
+    Returns:
+        Uma instância de SimulationBackend.
+    """
+    if name == 'lumerical':
+        return LumericalBackend(**options)
+    if name == 'synthetic':
+        return SyntheticBackend(**options)
+    raise ValueError(f"Backend de simulação desconhecido: '{name}'.")
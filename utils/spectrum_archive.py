@@ -0,0 +1,204 @@
+# spectrum_archive.py
+
+import os
+
+import h5py
+import numpy as np
+
+from utils.post_processing import delta_amp_from_spectra
+
+PARAM_NAMES = ('s', 'w', 'l', 'height')
+
+
+class SpectrumArchive:
+    """
+    Arquivo HDF5 único com todos os espectros de um experimento.
+
+    Os espectros são acrescentados a datasets 2-D (um espectro por linha),
+    redimensionáveis, em blocos (chunks) e comprimidos, junto com os
+    parâmetros do cromossomo, a geração e o delta_amp de cada linha.
+    Espectros com números de pontos diferentes ficam em grupos separados
+    ('points_<n>'), cada um com o seu vetor de frequências.
+
+    As linhas acrescentadas ficam em memória até flush(), que as grava em
+    uma única operação por grupo. O arquivo só fica aberto durante flush e
+    leituras, de modo que uma interrupção entre gerações não o corrompe e
+    ele pode ser lido por outro processo enquanto o experimento roda.
+
+    Args:
+        archive_path (str): Caminho do arquivo .h5.
+        monitor_name (str): Nome do monitor cujos espectros são armazenados.
+        chunk_rows (int): Número de espectros por bloco de armazenamento.
+        compression_level (int): Nível de compressão gzip (0 a 9).
+    """
+
+    def __init__(self, archive_path, monitor_name='in', chunk_rows=64, compression_level=4):
+        self.path = archive_path
+        self.monitor_name = monitor_name
+        self.chunk_rows = chunk_rows
+        self.compression_level = compression_level
+        self._pending = {}
+
+    def append(self, chromosome, frequencies_hz, spectrum_E_magnitude, generation=0, delta_amp=None):
+        """
+        Acrescenta um espectro ao arquivo (gravado de fato no próximo flush).
+
+        Args:
+            chromosome (dict): Parâmetros do indivíduo.
+            frequencies_hz (array): Frequências do espectro.
+            spectrum_E_magnitude (array): Magnitude |E| do espectro.
+            generation (int): Geração do indivíduo.
+            delta_amp (float): Opcional. Se não informado, é calculado a partir do espectro.
+        """
+        spectrum = np.asarray(spectrum_E_magnitude, dtype=float).ravel()
+        if delta_amp is None:
+            delta_amp = delta_amp_from_spectra(spectrum)
+        group = self._pending.setdefault(len(spectrum), {
+            'frequencies_hz': np.asarray(frequencies_hz, dtype=float).ravel(),
+            'rows': []
+        })
+        group['rows'].append(([chromosome[p] for p in PARAM_NAMES], generation, delta_amp, spectrum))
+
+    def flush(self):
+        """Grava as linhas pendentes (um redimensionamento por dataset e por grupo)."""
+        if not self._pending:
+            return 0
+        written = 0
+        with h5py.File(self.path, 'a') as hf:
+            hf.attrs['monitor_name'] = self.monitor_name
+            for n_points, pending in self._pending.items():
+                group = self._require_group(hf, n_points, pending['frequencies_hz'])
+                rows = pending['rows']
+                new_data = {
+                    'chromosomes': np.array([row[0] for row in rows], dtype=float),
+                    'generation': np.array([row[1] for row in rows], dtype=np.int32),
+                    'delta_amp': np.array([row[2] for row in rows], dtype=float),
+                    'spectra': np.vstack([row[3] for row in rows]),
+                }
+                start = group['spectra'].shape[0]
+                for name, values in new_data.items():
+                    dataset = group[name]
+                    dataset.resize(start + len(rows), axis=0)
+                    dataset[start:] = values
+                written += len(rows)
+        self._pending = {}
+        return written
+
+    def _require_group(self, hf, n_points, frequencies_hz):
+        name = f"points_{n_points}"
+        if name in hf:
+            group = hf[name]
+            if not np.allclose(group['frequencies_hz'][:], frequencies_hz):
+                raise ValueError(f"As frequências do espectro não correspondem às do grupo '{name}' do arquivo.")
+            return group
+
+        group = hf.create_group(name)
+        group.create_dataset('frequencies_hz', data=frequencies_hz)
+        compression = {'compression': 'gzip', 'compression_opts': self.compression_level, 'shuffle': True}
+        group.create_dataset('spectra', shape=(0, n_points), maxshape=(None, n_points), dtype=float,
+                             chunks=(self.chunk_rows, n_points), **compression)
+        group.create_dataset('chromosomes', shape=(0, len(PARAM_NAMES)), maxshape=(None, len(PARAM_NAMES)),
+                             dtype=float, chunks=(1024, len(PARAM_NAMES)), **compression)
+        group.create_dataset('generation', shape=(0,), maxshape=(None,), dtype=np.int32,
+                             chunks=(1024,), **compression)
+        group.create_dataset('delta_amp', shape=(0,), maxshape=(None,), dtype=float,
+                             chunks=(1024,), **compression)
+        group.attrs['param_names'] = list(PARAM_NAMES)
+        return group
+
+    def groups(self):
+        """Os grupos do arquivo (um por número de pontos do espectro)."""
+        if not os.path.exists(self.path):
+            return []
+        with h5py.File(self.path, 'r') as hf:
+            return sorted(name for name in hf if name.startswith('points_'))
+
+    def _resolve_group(self, hf, group):
+        if group is not None:
+            return hf[group]
+        names = sorted(name for name in hf if name.startswith('points_'))
+        if len(names) != 1:
+            raise ValueError(f"O arquivo tem {len(names)} grupos de espectros; informe o grupo ({names}).")
+        return hf[names[0]]
+
+    def __len__(self):
+        pending = sum(len(group['rows']) for group in self._pending.values())
+        if not os.path.exists(self.path):
+            return pending
+        with h5py.File(self.path, 'r') as hf:
+            return pending + sum(hf[name]['spectra'].shape[0] for name in hf if name.startswith('points_'))
+
+    def find(self, generation=None, chromosome=None, group=None, tolerance=1e-12):
+        """
+        Índices das linhas de uma geração e/ou de um cromossomo.
+
+        Args:
+            generation (int or list): Opcional. Geração (ou gerações) desejada(s).
+            chromosome (dict): Opcional. Parâmetros do cromossomo procurado.
+            group (str): Grupo do arquivo (obrigatório se houver mais de um).
+
+        Returns:
+            Um array crescente de índices de linha.
+        """
+        with h5py.File(self.path, 'r') as hf:
+            hf_group = self._resolve_group(hf, group)
+            mask = np.ones(hf_group['spectra'].shape[0], dtype=bool)
+            if generation is not None:
+                mask &= np.isin(hf_group['generation'][:], np.atleast_1d(generation))
+            if chromosome is not None:
+                target = np.array([chromosome[p] for p in PARAM_NAMES])
+                mask &= np.all(np.abs(hf_group['chromosomes'][:] - target) <= tolerance, axis=1)
+        return np.flatnonzero(mask)
+
+    def read(self, indices=None, group=None):
+        """
+        Lê várias linhas de uma vez.
+
+        Args:
+            indices (array or slice): Opcional. Linhas desejadas (todas, se None).
+            group (str): Grupo do arquivo (obrigatório se houver mais de um).
+
+        Returns:
+            Um dicionário com 'frequencies_hz', 'spectra' (n x pontos), 'chromosomes'
+            (n x 4), 'generation' e 'delta_amp', na ordem dos índices pedidos.
+        """
+        with h5py.File(self.path, 'r') as hf:
+            hf_group = self._resolve_group(hf, group)
+            result = {'frequencies_hz': hf_group['frequencies_hz'][:]}
+            if indices is None or isinstance(indices, slice):
+                selection = slice(None) if indices is None else indices
+                for name in ('spectra', 'chromosomes', 'generation', 'delta_amp'):
+                    result[name] = hf_group[name][selection]
+                return result
+
+            # O h5py exige índices crescentes e sem repetição: lê ordenado e reordena
+            indices = np.asarray(indices, dtype=np.int64)
+            unique, inverse = np.unique(indices, return_inverse=True)
+            for name in ('spectra', 'chromosomes', 'generation', 'delta_amp'):
+                result[name] = hf_group[name][unique][inverse]
+            return result
+
+    def rescore(self, scoring_function=delta_amp_from_spectra, group=None, batch_rows=4096, update=False):
+        """
+        Recalcula a pontuação de todos os espectros armazenados, sem simular de novo.
+
+        Args:
+            scoring_function (callable): Recebe uma matriz (n x pontos) e retorna n valores.
+            group (str): Grupo do arquivo (obrigatório se houver mais de um).
+            batch_rows (int): Número de espectros lidos e pontuados por vez.
+            update (bool): Se True, grava as novas pontuações no dataset 'delta_amp'.
+
+        Returns:
+            Um array com a nova pontuação de cada linha.
+        """
+        with h5py.File(self.path, 'r+' if update else 'r') as hf:
+            hf_group = self._resolve_group(hf, group)
+            spectra = hf_group['spectra']
+            scores = np.empty(spectra.shape[0])
+            # Lotes múltiplos do chunk: cada bloco comprimido é descomprimido uma única vez
+            batch_rows = max(self.chunk_rows, batch_rows - batch_rows % spectra.chunks[0])
+            for start in range(0, spectra.shape[0], batch_rows):
+                scores[start:start + batch_rows] = scoring_function(spectra[start:start + batch_rows])
+            if update:
+                hf_group['delta_amp'][:] = scores
+        return scores
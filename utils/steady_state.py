@@ -0,0 +1,115 @@
+# steady_state.py
+
+import time
+from concurrent.futures import wait, FIRST_COMPLETED
+
+from utils.telemetry import timed
+from utils.lumerical_workflow import job_fsp_path
+
+
+def run_steady_state(optimizer, session_pool, max_evaluations, fsp_base_path, geometry_lsf_path,
+                     simulation_lsf_path, simulation_spectra_directory, temp_directory,
+                     fitness_cache=None, on_result=None, should_stop=None, spectrum_archive=None,
+                     telemetry=None, workspace=None):
+    """
+    Executa o algoritmo genético no modo steady-state (assíncrono).
+
+    Cada processo do pool avalia um cromossomo por vez. Assim que uma
+    avaliação termina, o resultado é informado ao otimizador (tell) e um novo
+    filho é pedido (ask) e enviado ao mesmo processo, de modo que nenhum
+    processo fica parado esperando o job mais lento de uma geração.
+
+    Args:
+        optimizer (GeneticOptimizer): O otimizador, com a população inicial já criada.
+        session_pool (SessionPool): O pool de sessões que executa as avaliações.
+        max_evaluations (int): Número total de avaliações (incluindo acertos do cache).
+        fitness_cache (FitnessCache): Opcional. Cromossomos já avaliados não são simulados.
+        on_result (callable): Opcional. Chamado como on_result(chromosome, delta_amp, h5_path)
+            após cada avaliação.
+        should_stop (callable): Opcional. Se retornar True, nenhuma nova avaliação é enviada.
+        spectrum_archive (SpectrumArchive): Opcional. Guarda os espectros no arquivo consolidado;
+            a geração registrada é a equivalente (avaliações / population_size + 1).
+        telemetry (RunTelemetry): Opcional. Registra os tempos das fases e de cada avaliação;
+            o tempo de cada job é o de preparação, simulação e extração no processo do pool.
+        workspace (SimulationWorkspace): Opcional. Remove o projeto de cada avaliação
+            assim que ela termina e, com um orçamento de disco, limita as avaliações simultâneas.
+        Os demais argumentos são os mesmos de simulate_generation_lumerical.
+
+    Returns:
+        Um dicionário com o número de avaliações, simulações, o tempo total e a
+        utilização média dos processos (fração do tempo ocupada por simulações).
+    """
+    in_flight = {}
+    submitted = 0
+    completed = 0
+    simulated = 0
+    busy_time = 0.0
+    start_time = time.perf_counter()
+
+    def record(chromosome, delta_amp, h5_path):
+        nonlocal completed
+        with timed(telemetry, 'tell'):
+            optimizer.tell([chromosome], [delta_amp])
+        completed += 1
+        if on_result is not None:
+            on_result(chromosome, delta_amp, h5_path)
+
+    def fill_workers():
+        nonlocal submitted
+        while len(in_flight) < session_pool.n_workers and submitted < max_evaluations:
+            if should_stop is not None and should_stop():
+                return
+            if workspace is not None and in_flight and workspace.jobs_within_budget(1) == 0:
+                return
+            with timed(telemetry, 'ask'):
+                chromosome = optimizer.ask()[0]
+            submitted += 1
+            with timed(telemetry, 'cache_lookup'):
+                cached_delta_amp = fitness_cache.get(chromosome) if fitness_cache is not None else None
+            if cached_delta_amp is not None:
+                record(chromosome, cached_delta_amp, None)
+                continue
+            if workspace is not None:
+                workspace.register([job_fsp_path(chromosome, temp_directory)])
+            future = session_pool.submit_evaluation(
+                chromosome, fsp_base_path, geometry_lsf_path, simulation_lsf_path,
+                simulation_spectra_directory, temp_directory, return_spectrum=spectrum_archive is not None
+            )
+            in_flight[future] = (chromosome, time.perf_counter())
+
+    fill_workers()
+    while in_flight:
+        with timed(telemetry, 'waiting_for_jobs'):
+            done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+        for future in done:
+            chromosome, submit_time = in_flight.pop(future)
+            turnaround = time.perf_counter() - submit_time
+            busy_time += turnaround
+            simulated += 1
+            h5_path, delta_amp, spectrum = future.result()
+            if workspace is not None:
+                with timed(telemetry, 'cleanup'):
+                    workspace.release(job_fsp_path(chromosome, temp_directory),
+                                      failed=delta_amp == -float('inf'))
+            if telemetry is not None:
+                telemetry.record_job(turnaround_s=turnaround, failed=delta_amp == -float('inf'))
+            if fitness_cache is not None:
+                fitness_cache.put(chromosome, delta_amp)
+            if spectrum_archive is not None and spectrum is not None:
+                generation = optimizer.evaluations // optimizer.population_size + 1
+                with timed(telemetry, 'spectrum_archive'):
+                    spectrum_archive.append(chromosome, spectrum[0], spectrum[1], generation, delta_amp)
+                h5_path = spectrum_archive.path
+            record(chromosome, delta_amp, h5_path)
+        fill_workers()
+
+    elapsed = time.perf_counter() - start_time
+    utilization = busy_time / (session_pool.n_workers * elapsed) if elapsed > 0 else 0.0
+    print(f"  [Steady-State] {completed} avaliações ({simulated} simuladas) em {elapsed:.1f} s; "
+          f"utilização média dos processos: {utilization:.0%}")
+    return {
+        'evaluations': completed,
+        'simulations': simulated,
+        'elapsed_seconds': elapsed,
+        'worker_utilization': utilization,
+    }
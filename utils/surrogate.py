@@ -0,0 +1,339 @@
+# surrogate.py
+
+import os
+import glob
+import math
+
+import numpy as np
+
+PARAM_NAMES = ('s', 'w', 'l', 'height')
+
+
+def recorded_evaluations(df, backend='lumerical'):
+    """
+    As linhas de um full_optimization_data_*.csv que são avaliações completas do backend informado.
+
+    Linhas com delta_amp -inf/NaN (simulações que falharam), de triagem em
+    baixa fidelidade e de outro backend (ex.: 'synthetic') são descartadas.
+    CSVs sem a coluna 'backend' são anteriores a ela e vêm do FDTD real.
+    """
+    df = df[np.isfinite(df['delta_amp'])]
+    if 'fidelity' in df:
+        df = df[df['fidelity'].fillna('high') == 'high']
+    if 'backend' in df:
+        df = df[df['backend'].fillna('lumerical') == backend]
+    elif backend != 'lumerical':
+        df = df.iloc[:0]
+    return df
+
+
+def load_training_data(csv_paths, backend='lumerical'):
+    """
+    Lê avaliações (s, w, l, height, delta_amp) de arquivos full_optimization_data_*.csv.
+
+    Args:
+        csv_paths: Lista de caminhos ou um padrão glob.
+        backend (str): O backend cujas avaliações são lidas (ver recorded_evaluations).
+
+    Returns:
+        Uma tupla (X, y), com X de forma (n, 4) e y de forma (n,), só com as
+        linhas de recorded_evaluations.
+    """
+    import pandas as pd
+
+    if isinstance(csv_paths, str):
+        csv_paths = sorted(glob.glob(csv_paths))
+    frames = [pd.read_csv(path) for path in csv_paths]
+    if not frames:
+        return np.empty((0, len(PARAM_NAMES))), np.empty(0)
+    df = recorded_evaluations(pd.concat(frames, ignore_index=True), backend)
+    return df[list(PARAM_NAMES)].to_numpy(dtype=float), df['delta_amp'].to_numpy(dtype=float)
+
+
+class GaussianProcessSurrogate:
+    """
+    Modelo substituto (processo gaussiano) de (s, w, l, height) -> delta_amp.
+
+    Os parâmetros são normalizados para [0, 1] pelos ranges do otimizador e o
+    delta_amp é padronizado. O comprimento de correlação do kernel RBF é
+    escolhido pela verossimilhança marginal em uma grade pequena a cada ajuste.
+    Para manter o custo do ajuste limitado (O(n³)), apenas 'max_points'
+    avaliações são usadas: as melhores e, em seguida, as mais recentes.
+
+    Args:
+        param_ranges (dict): Os ranges de cada parâmetro ({'s': (min, max), ...}).
+        max_points (int): Número máximo de avaliações usadas no ajuste.
+        noise (float): Variância do ruído, na escala padronizada de delta_amp.
+        length_scales (tuple): Valores candidatos para o comprimento de correlação.
+    """
+
+    def __init__(self, param_ranges, max_points=800, noise=0.05,
+                 length_scales=(0.05, 0.1, 0.2, 0.4)):
+        self.param_ranges = param_ranges
+        self.max_points = max_points
+        self.noise = noise
+        self.length_scales = length_scales
+        self.length_scale = length_scales[len(length_scales) // 2]
+        self._lower = np.array([param_ranges[p][0] for p in PARAM_NAMES])
+        self._span = np.array([param_ranges[p][1] - param_ranges[p][0] for p in PARAM_NAMES])
+        self._X_all = np.empty((0, len(PARAM_NAMES)))
+        self._y_all = np.empty(0)
+        self._fitted = False
+
+    def __len__(self):
+        return len(self._y_all)
+
+    def _normalize(self, X):
+        return (np.asarray(X, dtype=float) - self._lower) / self._span
+
+    def _kernel(self, A, B, length_scale):
+        squared_distances = (
+            np.sum(A ** 2, axis=1)[:, None] + np.sum(B ** 2, axis=1)[None, :] - 2 * A @ B.T
+        )
+        return np.exp(-0.5 * np.maximum(squared_distances, 0.0) / length_scale ** 2)
+
+    def _training_subset(self):
+        n = len(self._y_all)
+        if n <= self.max_points:
+            return np.arange(n)
+        # Metade com as melhores avaliações (região de interesse), metade com as mais recentes
+        n_best = self.max_points // 2
+        best = np.argsort(self._y_all)[-n_best:]
+        remaining = np.setdiff1d(np.arange(n), best)
+        recent = remaining[-(self.max_points - n_best):]
+        return np.concatenate([best, recent])
+
+    def fit(self, X, y):
+        """Substitui os dados de treino e ajusta o modelo."""
+        self._X_all = np.empty((0, len(PARAM_NAMES)))
+        self._y_all = np.empty(0)
+        return self.update(X, y)
+
+    def update(self, X, y):
+        """
+        Acrescenta novas avaliações e reajusta o modelo.
+
+        Args:
+            X (array): Matriz (n, 4) de parâmetros ou lista de dicionários de cromossomos.
+            y (array): delta_amp correspondentes; valores -inf/NaN são ignorados.
+        """
+        if len(X) and isinstance(X[0], dict):
+            X = [[chromosome[p] for p in PARAM_NAMES] for chromosome in X]
+        X = np.asarray(X, dtype=float).reshape(-1, len(PARAM_NAMES))
+        y = np.asarray(y, dtype=float)
+        valid = np.isfinite(y)
+        self._X_all = np.vstack([self._X_all, X[valid]])
+        self._y_all = np.concatenate([self._y_all, y[valid]])
+        if len(self._y_all) < 2:
+            return self
+
+        subset = self._training_subset()
+        X_train = self._normalize(self._X_all[subset])
+        y_train = self._y_all[subset]
+        self._y_mean = y_train.mean()
+        self._y_std = y_train.std() or 1.0
+        y_standard = (y_train - self._y_mean) / self._y_std
+
+        best_likelihood = -np.inf
+        for length_scale in self.length_scales:
+            K = self._kernel(X_train, X_train, length_scale) + self.noise * np.eye(len(y_standard))
+            try:
+                L = np.linalg.cholesky(K)
+            except np.linalg.LinAlgError:
+                continue
+            alpha = np.linalg.solve(L.T, np.linalg.solve(L, y_standard))
+            log_likelihood = -0.5 * y_standard @ alpha - np.sum(np.log(np.diag(L)))
+            if log_likelihood > best_likelihood:
+                best_likelihood = log_likelihood
+                self.length_scale = length_scale
+                self._L, self._alpha = L, alpha
+        self._X_train = X_train
+        self._fitted = best_likelihood > -np.inf
+        return self
+
+    def predict_mean(self, X):
+        """Só a média prevista (sem o custo do cálculo da incerteza)."""
+        if len(X) and isinstance(X[0], dict):
+            X = [[chromosome[p] for p in PARAM_NAMES] for chromosome in X]
+        X = self._normalize(np.asarray(X, dtype=float).reshape(-1, len(PARAM_NAMES)))
+        if not self._fitted:
+            return np.zeros(len(X))
+        return self._kernel(X, self._X_train, self.length_scale) @ self._alpha * self._y_std + self._y_mean
+
+    def predict(self, X):
+        """
+        Prevê o delta_amp e a incerteza para novos cromossomos.
+
+        Args:
+            X: Matriz (n, 4) de parâmetros ou lista de dicionários de cromossomos.
+
+        Returns:
+            Uma tupla (média, desvio padrão), ambos na escala de delta_amp.
+        """
+        if len(X) and isinstance(X[0], dict):
+            X = [[chromosome[p] for p in PARAM_NAMES] for chromosome in X]
+        X = self._normalize(np.asarray(X, dtype=float).reshape(-1, len(PARAM_NAMES)))
+        if not self._fitted:
+            return np.zeros(len(X)), np.full(len(X), np.inf)
+        K_star = self._kernel(X, self._X_train, self.length_scale)
+        mean = K_star @ self._alpha
+        v = np.linalg.solve(self._L, K_star.T)
+        variance = np.maximum(1.0 + self.noise - np.sum(v ** 2, axis=0), 1e-12)
+        return mean * self._y_std + self._y_mean, np.sqrt(variance) * self._y_std
+
+
+class SurrogateScreener:
+    """
+    Seleciona, entre muitos filhos candidatos, os que vão para o FDTD.
+
+    Usado como 'offspring_selector' em GeneticOptimizer.evolve: o otimizador
+    gera 'oversample_factor' vezes mais filhos do que o necessário e o
+    selecionador mantém os de maior delta_amp previsto e, em uma fração
+    'exploration_fraction', os de maior incerteza.
+
+    Args:
+        surrogate (GaussianProcessSurrogate): O modelo substituto.
+        oversample_factor (int): Quantos candidatos gerar por vaga na população.
+        exploration_fraction (float): Fração das vagas preenchida pelos candidatos mais incertos.
+        min_training_points (int): Abaixo disso o modelo não é usado e os primeiros candidatos são mantidos.
+    """
+
+    def __init__(self, surrogate, oversample_factor=4, exploration_fraction=0.25, min_training_points=20):
+        self.surrogate = surrogate
+        self.oversample_factor = oversample_factor
+        self.exploration_fraction = exploration_fraction
+        self.min_training_points = min_training_points
+        self.candidates_screened = 0
+        self.candidates_rejected = 0
+
+    def __call__(self, candidates, n_select):
+        self.candidates_screened += len(candidates)
+        if len(self.surrogate) < self.min_training_points or len(candidates) <= n_select:
+            self.candidates_rejected += max(len(candidates) - n_select, 0)
+            return candidates[:n_select]
+
+        # Filhos repetidos (cruzamento sem mutação) e cromossomos já avaliados não
+        # trazem informação nova: só entram se faltarem candidatos inéditos
+        evaluated = {tuple(x) for x in self.surrogate._X_all}
+        unique_indices = {}
+        for i, candidate in enumerate(candidates):
+            unique_indices.setdefault(tuple(candidate[p] for p in PARAM_NAMES), i)
+        new = [i for key, i in unique_indices.items() if key not in evaluated]
+        known = [i for key, i in unique_indices.items() if key in evaluated]
+
+        chosen = []
+        if new:
+            mean, std = self.surrogate.predict([candidates[i] for i in new])
+            n_explore = int(round(min(n_select, len(new)) * self.exploration_fraction))
+            chosen = [new[i] for i in np.argsort(-mean)[:n_select - n_explore]]
+            chosen_set = set(chosen)
+            for i in np.argsort(-std):
+                if len(chosen) >= n_select:
+                    break
+                if new[i] not in chosen_set:
+                    chosen.append(new[i])
+                    chosen_set.add(new[i])
+        remaining = [i for i in known + list(range(len(candidates))) if i not in chosen]
+        chosen.extend(remaining[:n_select - len(chosen)])
+        self.candidates_rejected += len(candidates) - len(chosen)
+        return [candidates[i] for i in chosen]
+
+
+def surrogate_savings_report(csv_paths, param_ranges, screen_fraction=0.5, exploration_fraction=0.25,
+                             max_points=800, backend='lumerical'):
+    """
+    Estima, a partir das execuções registradas, quantas simulações o filtro
+    do modelo substituto teria economizado para alcançar o mesmo melhor fitness.
+
+    A reconstituição é retrospectiva: para cada geração g de uma execução, o
+    modelo é ajustado com as gerações anteriores e só a fração
+    'screen_fraction' dos indivíduos de g (os de maior previsão, mais os mais
+    incertos) é considerada "simulada". Como o caminho real do GA mudaria com
+    o filtro, o resultado é uma estimativa, mas usa apenas dados medidos.
+
+    Args:
+        csv_paths: Lista de caminhos ou um padrão glob de full_optimization_data_*.csv.
+        param_ranges (dict): Os ranges de cada parâmetro.
+        screen_fraction (float): Fração de cada geração enviada ao solver.
+        backend (str): Só as execuções deste backend entram (ver recorded_evaluations).
+
+    Returns:
+        Uma lista de dicionários, um por execução, com as simulações (cromossomos
+        inéditos) registradas e filtradas até o melhor fitness e o melhor fitness alcançado em cada caso.
+    """
+    import pandas as pd
+
+    if isinstance(csv_paths, str):
+        csv_paths = sorted(glob.glob(csv_paths))
+
+    report = []
+    for csv_path in csv_paths:
+        df = recorded_evaluations(pd.read_csv(csv_path), backend)
+        if df.empty:
+            continue
+        generations = sorted(df['generation'].unique())
+        best_recorded = df['delta_amp'].max()
+
+        # Simulações até o melhor fitness na execução registrada (na ordem do CSV). Cromossomos
+        # repetidos (elite, cópias) não contam: com o cache de avaliações eles não são simulados
+        keys = [tuple(row) for row in df[list(PARAM_NAMES)].to_numpy()]
+        is_new = []
+        seen = set()
+        for key in keys:
+            is_new.append(key not in seen)
+            seen.add(key)
+        is_new = np.array(is_new)
+        recorded_total = int(is_new.sum())
+        recorded_calls = int(is_new[:int(np.argmax(df['delta_amp'].to_numpy() >= best_recorded)) + 1].sum())
+
+        surrogate = GaussianProcessSurrogate(param_ranges, max_points=max_points)
+        screener = SurrogateScreener(surrogate, exploration_fraction=exploration_fraction)
+        screened_calls = 0
+        calls_to_best = None
+        best_screened = -np.inf
+        simulated = set()
+        for generation in generations:
+            gen_df = df[df['generation'] == generation]
+            candidates = gen_df[list(PARAM_NAMES)].to_dict('records')
+            n_select = len(candidates) if generation == generations[0] else \
+                max(1, math.ceil(len(candidates) * screen_fraction))
+            selected = screener(candidates, n_select)
+            selected_keys = {tuple(c[p] for p in PARAM_NAMES) for c in selected}
+            for row in gen_df[list(PARAM_NAMES) + ['delta_amp']].itertuples(index=False):
+                key = tuple(row[:len(PARAM_NAMES)])
+                if key not in selected_keys:
+                    continue
+                if key not in simulated:
+                    screened_calls += 1
+                    simulated.add(key)
+                best_screened = max(best_screened, row.delta_amp)
+                if calls_to_best is None and row.delta_amp >= best_recorded:
+                    calls_to_best = screened_calls
+            surrogate.update(gen_df[list(PARAM_NAMES)].to_numpy(), gen_df['delta_amp'].to_numpy())
+
+        entry = {
+            'experiment': os.path.basename(csv_path),
+            'recorded_calls_total': recorded_total,
+            'recorded_calls_to_best': recorded_calls,
+            'best_fitness_recorded': float(best_recorded),
+            'screened_calls_total': screened_calls,
+            'screened_calls_to_best': calls_to_best,
+            'best_fitness_screened': float(best_screened),
+        }
+        report.append(entry)
+
+        saved = "melhor fitness não alcançado" if calls_to_best is None else \
+            f"{recorded_calls - calls_to_best} simulações economizadas até o melhor fitness"
+        print(f"  - {entry['experiment']}: registradas {recorded_calls} até o melhor "
+              f"({best_recorded:.3f}); com filtro {calls_to_best} ({saved}). "
+              f"Total: {recorded_total} -> {screened_calls}.")
+    return report
+
+
+if __name__ == '__main__':
+    from utils.optimizers import experiment_param_ranges
+
+    results_directory = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "simulation_results")
+    ranges = experiment_param_ranges()
+    print("Relatório de economia do modelo substituto (reconstituição das execuções registradas):")
+    surrogate_savings_report(os.path.join(results_directory, "full_optimization_data_*.csv"), ranges)
@@ -0,0 +1,166 @@
+# telemetry.py
+
+import os
+import json
+import time
+import datetime
+import contextlib
+
+import numpy as np
+
+# Tempos registrados para cada job simulado
+JOB_TIMINGS = ('prepare_s', 'turnaround_s', 'queue_wait_s', 'extraction_s', 'delta_amp_s')
+
+
+class RunTelemetry:
+    """
+    Tempos por fase e por job de cada geração da otimização.
+
+    As fases são medidas no processo principal (preparação dos FSPs, espera
+    pelos jobs, extração, cálculo do delta_amp, CSV, análise, limpeza...);
+    fases com o mesmo nome dentro de uma geração são somadas. Ao final de cada
+    geração, um registro com as fases, os tempos de cada job e a vazão
+    (indivíduos por hora) é acrescentado ao arquivo JSONL, uma linha por geração.
+
+    Args:
+        jsonl_path (str): Opcional. Arquivo JSONL dos registros por geração. Se
+            já existir (execução retomada), os registros anteriores entram no resumo.
+    """
+
+    def __init__(self, jsonl_path=None):
+        self.jsonl_path = jsonl_path
+        self.records = []
+        self._current = None
+        self._generation_start = None
+        if jsonl_path is not None and os.path.exists(jsonl_path):
+            with open(jsonl_path, 'r') as f:
+                for line in f:
+                    try:
+                        self.records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # Linha incompleta de uma execução interrompida
+                        continue
+
+    def start_generation(self, generation):
+        self._current = {
+            'generation': generation,
+            'started_at': datetime.datetime.now().isoformat(),
+            'phases': {},
+            'jobs': [],
+            'counts': {},
+        }
+        self._generation_start = time.perf_counter()
+
+    def add_phase(self, name, seconds):
+        """Soma 'seconds' à fase 'name' da geração em andamento."""
+        if self._current is not None:
+            phases = self._current['phases']
+            phases[name] = phases.get(name, 0.0) + seconds
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - start)
+
+    def record_job(self, **timings):
+        """
+        Registra os tempos de um job simulado.
+
+        Args:
+            **timings: Tempos em segundos (ver JOB_TIMINGS) e outros campos do
+                job (índice, 'failed', ...). Tempos não medidos podem ser omitidos.
+        """
+        if self._current is not None:
+            self._current['jobs'].append(timings)
+
+    def add_counts(self, counts):
+        """Soma contadores (falhas, novas tentativas, tempos esgotados...) aos da geração em andamento."""
+        if self._current is not None:
+            current_counts = self._current['counts']
+            for name, value in counts.items():
+                current_counts[name] = current_counts.get(name, 0) + value
+
+    def end_generation(self, n_individuals):
+        """
+        Fecha a geração em andamento e grava o seu registro no JSONL.
+
+        Args:
+            n_individuals (int): Indivíduos avaliados na geração (simulados ou do cache).
+
+        Returns:
+            O registro da geração.
+        """
+        if self._current is None:
+            return None
+        record = self._current
+        wall = time.perf_counter() - self._generation_start
+        record['wall_s'] = wall
+        record['n_individuals'] = n_individuals
+        record['n_simulated'] = len(record['jobs'])
+        record['n_failed'] = sum(1 for job in record['jobs'] if job.get('failed'))
+        record['individuals_per_hour'] = n_individuals / wall * 3600 if wall > 0 else 0.0
+        record['simulations_per_hour'] = record['n_simulated'] / wall * 3600 if wall > 0 else 0.0
+        record['unaccounted_s'] = max(0.0, wall - sum(record['phases'].values()))
+        self.records.append(record)
+        self._current = None
+
+        if self.jsonl_path is not None:
+            with open(self.jsonl_path, 'a') as f:
+                f.write(json.dumps(record) + '\n')
+        return record
+
+    def summary(self):
+        """
+        Resumo de todas as gerações concluídas, para o JSON do experimento.
+
+        Returns:
+            Um dicionário com o tempo total, o tempo e a fração de cada fase, a
+            média e o percentil 95 de cada tempo por job e a vazão média.
+        """
+        wall = sum(record['wall_s'] for record in self.records)
+        phase_totals = {}
+        for record in self.records:
+            for name, seconds in record['phases'].items():
+                phase_totals[name] = phase_totals.get(name, 0.0) + seconds
+        phase_totals['unaccounted'] = sum(record['unaccounted_s'] for record in self.records)
+        count_totals = {}
+        for record in self.records:
+            # Registros de execuções anteriores podem não ter contadores
+            for name, value in record.get('counts', {}).items():
+                count_totals[name] = count_totals.get(name, 0) + value
+
+        jobs = [job for record in self.records for job in record['jobs']]
+        job_statistics = {}
+        for name in JOB_TIMINGS:
+            values = np.array([job[name] for job in jobs if job.get(name) is not None], dtype=float)
+            if len(values):
+                job_statistics[name] = {'mean': float(values.mean()), 'p95': float(np.percentile(values, 95))}
+
+        n_individuals = sum(record['n_individuals'] for record in self.records)
+        n_simulated = sum(record['n_simulated'] for record in self.records)
+        return {
+            'generations': len(self.records),
+            'wall_s': wall,
+            'phases': {
+                name: {'total_s': seconds, 'fraction': seconds / wall if wall > 0 else 0.0}
+                for name, seconds in sorted(phase_totals.items(), key=lambda item: -item[1])
+            },
+            'jobs': {
+                'count': len(jobs),
+                'failed': sum(1 for job in jobs if job.get('failed')),
+                **job_statistics,
+            },
+            'counts': count_totals,
+            'individuals_per_hour': n_individuals / wall * 3600 if wall > 0 else 0.0,
+            'simulations_per_hour': n_simulated / wall * 3600 if wall > 0 else 0.0,
+        }
+
+
+def timed(telemetry, name):
+    """Mede a fase 'name' se houver telemetria; caso contrário, não faz nada."""
+    if telemetry is None:
+        return contextlib.nullcontext()
+    return telemetry.phase(name)
@@ -0,0 +1,192 @@
+# workspace.py
+
+import os
+import glob
+import shutil
+
+from utils.post_processing import job_result_path
+
+# Arquivos gerados pelos jobs no diretório temporário (projetos, logs do solver,
+# resultados reduzidos e gravações atômicas interrompidas)
+_ARTIFACT_SUFFIXES = ('.fsp', '.log', '_result.h5', '.tmp')
+
+FAILED_JOBS_DIRECTORY_NAME = "failed_jobs"
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+class SimulationWorkspace:
+    """
+    Controla o espaço em disco ocupado pelos projetos dos jobs.
+
+    Cada FSP enfileirado é registrado e, assim que o seu espectro é extraído, o
+    projeto e os arquivos associados (logs do solver e resultado reduzido) são
+    removidos, em vez de esperarem a limpeza da geração seguinte. Com um
+    orçamento de disco, as levas de jobs são limitadas ao número de projetos
+    simulados que cabem nele.
+
+    O tamanho de um projeto simulado é medido a cada remoção. Até a primeira,
+    vale 'project_size_mb'; sem essa estimativa, a primeira leva tem um único
+    job, cujo projeto é medido antes de as demais serem dimensionadas.
+
+    Args:
+        temp_directory: O diretório dos FSPs temporários.
+        disk_budget_gb (float): Opcional. Espaço máximo para os projetos dos jobs; se None,
+            as levas não são limitadas.
+        project_size_mb (float): Opcional. Tamanho estimado de um projeto simulado.
+        keep_failed (bool): Se True, os projetos dos jobs que falharam são movidos para
+            'failed_jobs' (dentro do diretório temporário) para inspeção. Eles contam no
+            orçamento e os mais antigos são removidos primeiro.
+    """
+
+    def __init__(self, temp_directory, disk_budget_gb=None, project_size_mb=None, keep_failed=False):
+        self.temp_directory = temp_directory
+        self.disk_budget_bytes = int(disk_budget_gb * 1e9) if disk_budget_gb is not None else None
+        self.keep_failed = keep_failed
+        self.failed_directory = os.path.join(temp_directory, FAILED_JOBS_DIRECTORY_NAME)
+        self._estimated_project_bytes = int(project_size_mb * 1e6) if project_size_mb is not None else None
+        self._measured_project_bytes = 0
+        self._in_flight = set()
+        self._kept = []
+        self.projects_released = 0
+        self.bytes_released = 0
+        self.peak_bytes = 0
+        os.makedirs(temp_directory, exist_ok=True)
+        if keep_failed:
+            os.makedirs(self.failed_directory, exist_ok=True)
+            # Projetos mantidos por execuções anteriores continuam contando no orçamento
+            kept_paths = sorted(
+                (os.path.join(self.failed_directory, name) for name in os.listdir(self.failed_directory)),
+                key=os.path.getmtime
+            )
+            self._kept = [(path, _file_size(path)) for path in kept_paths if os.path.isfile(path)]
+
+    @property
+    def project_bytes(self):
+        """Tamanho estimado, em bytes, de um projeto simulado com os seus arquivos associados."""
+        if self._measured_project_bytes:
+            return self._measured_project_bytes
+        if self._estimated_project_bytes is not None:
+            return self._estimated_project_bytes
+        return None
+
+    @property
+    def kept_bytes(self):
+        return sum(size for _, size in self._kept)
+
+    def _job_artifacts(self, fsp_path):
+        # O FSP, os logs do solver (<projeto>_p0.log etc.) e o resultado reduzido do job
+        stem = os.path.splitext(fsp_path)[0]
+        return [fsp_path, job_result_path(fsp_path)] + glob.glob(glob.escape(stem) + "*.log")
+
+    def _is_artifact(self, file_name):
+        return file_name.endswith(_ARTIFACT_SUFFIXES)
+
+    def collect_garbage(self):
+        """
+        Remove os arquivos de jobs que não estão registrados: os deixados por
+        execuções anteriores (por exemplo, interrompidas antes da limpeza final)
+        e sobras de jobs cujos projetos já foram liberados.
+
+        Os projetos em andamento e os mantidos em 'failed_jobs' não são removidos.
+
+        Returns:
+            Uma tupla (número de arquivos removidos, bytes liberados).
+        """
+        removed, freed = 0, 0
+        for file_name in os.listdir(self.temp_directory):
+            path = os.path.join(self.temp_directory, file_name)
+            if not self._is_artifact(file_name) or not os.path.isfile(path) or path in self._in_flight:
+                continue
+            size = _file_size(path)
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"Erro ao remover o arquivo {path}: {e}")
+                continue
+            removed += 1
+            freed += size
+        if removed:
+            print(f"[Workspace] {removed} arquivos órfãos removidos de {self.temp_directory} "
+                  f"({freed / 1e6:.1f} MB liberados).")
+        return removed, freed
+
+    def register(self, fsp_paths):
+        """Registra os FSPs de jobs enfileirados (ou prestes a ser enfileirados)."""
+        self._in_flight.update(fsp_paths)
+
+    def release(self, fsp_path, failed=False):
+        """
+        Remove o projeto de um job cujo resultado já foi extraído (ou que falhou).
+
+        Com 'keep_failed', o projeto de um job que falhou é movido para
+        'failed_jobs' em vez de removido.
+        """
+        self._in_flight.discard(fsp_path)
+        artifacts = [(path, _file_size(path)) for path in self._job_artifacts(fsp_path) if os.path.isfile(path)]
+        footprint = sum(size for _, size in artifacts)
+        if not failed:
+            # O maior projeto simulado é a estimativa usada para o orçamento
+            self._measured_project_bytes = max(self._measured_project_bytes, footprint)
+        # Pico aproximado: projetos em andamento (na estimativa atual) mais o que está sendo liberado
+        self.peak_bytes = max(
+            self.peak_bytes, footprint + len(self._in_flight) * (self.project_bytes or 0) + self.kept_bytes
+        )
+
+        for path, size in artifacts:
+            try:
+                if failed and self.keep_failed:
+                    kept_path = os.path.join(self.failed_directory, os.path.basename(path))
+                    shutil.move(path, kept_path)
+                    self._kept.append((kept_path, size))
+                else:
+                    os.remove(path)
+                    self.bytes_released += size
+            except OSError as e:
+                print(f"Erro ao remover o arquivo {path}: {e}")
+        self.projects_released += 1
+        if failed and self.keep_failed:
+            self._evict_kept()
+
+    def _evict_kept(self):
+        # Os projetos mantidos mais antigos saem primeiro quando excedem o orçamento
+        if self.disk_budget_bytes is None:
+            return
+        in_flight_bytes = len(self._in_flight) * (self.project_bytes or 0)
+        while self._kept and self.kept_bytes > self.disk_budget_bytes - in_flight_bytes:
+            path, size = self._kept.pop(0)
+            try:
+                os.remove(path)
+                self.bytes_released += size
+            except OSError:
+                pass
+
+    def jobs_within_budget(self, n_jobs):
+        """
+        Quantos dos 'n_jobs' novos jobs cabem no orçamento, além dos já registrados.
+
+        Returns:
+            Um número entre 0 e 'n_jobs' ('n_jobs' se não há orçamento).
+        """
+        if self.disk_budget_bytes is None:
+            return n_jobs
+        if self.project_bytes is None:
+            # Tamanho ainda desconhecido: um job por vez até o primeiro projeto ser medido
+            return min(n_jobs, 0 if self._in_flight else 1)
+        free_bytes = self.disk_budget_bytes - self.kept_bytes - len(self._in_flight) * self.project_bytes
+        return max(0, min(n_jobs, free_bytes // self.project_bytes))
+
+    def summary(self):
+        """Retorna um resumo do uso do diretório temporário na execução."""
+        return {
+            'projects_released': self.projects_released,
+            'bytes_released': self.bytes_released,
+            'peak_bytes': self.peak_bytes,
+            'project_bytes': self.project_bytes,
+            'failed_projects_kept': len(self._kept),
+        }